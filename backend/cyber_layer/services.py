@@ -12,11 +12,15 @@ import numpy as np
 from sklearn.ensemble import IsolationForest
 import joblib
 from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
 from logs.models import CyberLog
 
 
 # Cache for anomaly detector
 _anomaly_detector = None
+# Modification time of the detector file, part of the cached verdict keys
+_anomaly_detector_version = None
 
 
 def get_anomaly_detector():
@@ -26,7 +30,7 @@ def get_anomaly_detector():
     Returns:
         Trained IsolationForest model
     """
-    global _anomaly_detector
+    global _anomaly_detector, _anomaly_detector_version
     
     if _anomaly_detector is not None:
         return _anomaly_detector
@@ -66,6 +70,7 @@ def get_anomaly_detector():
         # Save detector
         joblib.dump(_anomaly_detector, detector_path)
     
+    _anomaly_detector_version = detector_path.stat().st_mtime_ns
     return _anomaly_detector
 
 
@@ -94,6 +99,33 @@ def compute_integrity_hash(soil_data):
     return hash_object.hexdigest()
 
 
+def anomaly_verdict_cache_key(soil_data):
+    """
+    Build the cache key for an anomaly verdict.
+
+    Keyed on the exact values the detector sees (not the rounded integrity
+    hash), the detector file version and the prediction cache generation.
+
+    Args:
+        soil_data: Dictionary of soil parameters
+
+    Returns:
+        str: Cache key
+    """
+    from ml_engine.prediction_cache import get_cache_generation
+
+    detector_version = _anomaly_detector_version
+    if detector_version is None:
+        get_anomaly_detector()
+        detector_version = _anomaly_detector_version
+    values = '|'.join(
+        repr(float(soil_data[field]))
+        for field in ('N_level', 'P_level', 'K_level', 'ph', 'moisture', 'temperature')
+    )
+    digest = hashlib.sha256(values.encode()).hexdigest()
+    return f"anomaly_verdict:{get_cache_generation()}:{detector_version}:{digest}"
+
+
 def validate_ranges(soil_data):
     """
     Validate that soil parameters are within acceptable ranges.
@@ -148,6 +180,33 @@ def detect_anomaly(soil_data):
     return prediction[0] == -1
 
 
+def detect_anomaly_batch(soil_data_list):
+    """
+    Detect anomalies for many soil readings with a single IsolationForest call.
+
+    Args:
+        soil_data_list: List of soil parameter dictionaries
+
+    Returns:
+        numpy.ndarray: Boolean array, True where an anomaly was detected
+    """
+    if not soil_data_list:
+        return np.zeros(0, dtype=bool)
+
+    detector = get_anomaly_detector()
+
+    features = np.array([[
+        soil_data['N_level'],
+        soil_data['P_level'],
+        soil_data['K_level'],
+        soil_data['ph'],
+        soil_data['moisture'],
+        soil_data['temperature']
+    ] for soil_data in soil_data_list])
+
+    return detector.predict(features) == -1
+
+
 def pre_ml_checks(soil_data, user):
     """
     Perform pre-ML cybersecurity checks on soil input data.
@@ -191,8 +250,15 @@ def pre_ml_checks(soil_data, user):
     # 2. Compute integrity hash
     integrity_hash = compute_integrity_hash(soil_data)
     
-    # 3. Detect anomalies
-    is_anomalous = detect_anomaly(soil_data)
+    # 3. Detect anomalies (verdicts are cached alongside predictions)
+    if settings.PREDICTION_CACHE_ENABLED:
+        anomaly_cache_key = anomaly_verdict_cache_key(soil_data)
+        is_anomalous = cache.get(anomaly_cache_key)
+        if is_anomalous is None:
+            is_anomalous = bool(detect_anomaly(soil_data))
+            cache.set(anomaly_cache_key, is_anomalous, timeout=settings.PREDICTION_CACHE_TIMEOUT)
+    else:
+        is_anomalous = bool(detect_anomaly(soil_data))
     
     # 4. Determine integrity status
     if is_anomalous:
@@ -1,3 +1,56 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from accounts.models import User
+from ml_engine.prediction_cache import invalidate_prediction_cache
+from .services import pre_ml_checks
 
-# Create your tests here.
+
+SOIL_DATA = {
+    'N_level': 90.0,
+    'P_level': 42.0,
+    'K_level': 43.0,
+    'ph': 6.5,
+    'moisture': 80.0,
+    'temperature': 25.0,
+}
+
+
+class AnomalyVerdictCacheTest(TestCase):
+    """Test cases for caching IsolationForest verdicts in pre_ml_checks."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='farmer@example.com',
+            username='farmer',
+            password='testpass123'
+        )
+        patcher = mock.patch('cyber_layer.services.detect_anomaly', return_value=False)
+        self.detect_anomaly = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_reading_reuses_verdict(self):
+        """The same reading is scored once, until the cache generation moves on."""
+        pre_ml_checks(dict(SOIL_DATA), self.user)
+        pre_ml_checks(dict(SOIL_DATA), self.user)
+        self.assertEqual(self.detect_anomaly.call_count, 1)
+
+        invalidate_prediction_cache()
+        pre_ml_checks(dict(SOIL_DATA), self.user)
+        self.assertEqual(self.detect_anomaly.call_count, 2)
+
+    def test_keyed_on_unrounded_values(self):
+        """Readings that share an integrity hash but differ in value are scored separately."""
+        first = pre_ml_checks(dict(SOIL_DATA), self.user)
+        second = pre_ml_checks({**SOIL_DATA, 'N_level': 90.001}, self.user)
+
+        self.assertEqual(first['integrity_hash'], second['integrity_hash'])
+        self.assertEqual(self.detect_anomaly.call_count, 2)
+
+    @override_settings(PREDICTION_CACHE_ENABLED=False)
+    def test_disabled_with_prediction_cache(self):
+        """Verdicts are not cached when the prediction cache is disabled."""
+        pre_ml_checks(dict(SOIL_DATA), self.user)
+        pre_ml_checks(dict(SOIL_DATA), self.user)
+        self.assertEqual(self.detect_anomaly.call_count, 2)
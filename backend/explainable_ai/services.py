@@ -2,17 +2,30 @@
 Explainable AI services using SHAP for model interpretability.
 
 This module provides:
-1. SHAP value computation for tree-based models
-2. Feature importance analysis
-3. Human-readable explanations for farmers
+1. SHAP value computation for tree-based models (single rows and batches)
+2. Fast approximate explanations from the flat forest (Saabas decomposition)
+3. Feature importance analysis
+4. Human-readable explanations for farmers
 """
 
+from contextlib import contextmanager
 import numpy as np
 import shap
-from ml_engine.services import get_feature_names, load_scaler, load_label_encoder
+from django.conf import settings
+from django.core.cache import cache
+from ml_engine.forest import FlatForest
+from ml_engine.services import (
+    ModelVersionMismatch, get_feature_names, get_input_feature_names, get_model_bundle, load_model, use_model_bundle
+)
 
 
-# Cache for SHAP explainer
+# Explanation modes: exact TreeSHAP, fast Saabas decomposition, or fast only under load
+EXPLANATION_MODES = ('exact', 'fast', 'auto')
+
+# Shared count of exact SHAP computations currently running (all workers with a shared cache)
+EXACT_IN_FLIGHT_KEY = 'explanations:exact_in_flight'
+
+# Cache for SHAP explainer: (model, explainer) so a swapped model gets a new explainer
 _explainer_cache = None
 
 
@@ -28,181 +41,337 @@ def get_explainer(model):
     """
     global _explainer_cache
     
-    if _explainer_cache is not None:
-        return _explainer_cache
+    if _explainer_cache is not None and _explainer_cache[0] is model:
+        return _explainer_cache[1]
     
     # Create appropriate explainer based on model type
     model_name = type(model).__name__
     
     if 'RandomForest' in model_name or 'Tree' in model_name:
         # Use TreeExplainer for tree-based models
-        _explainer_cache = shap.TreeExplainer(model)
+        explainer = shap.TreeExplainer(model)
     else:
         # Use KernelExplainer for other models (slower but universal)
         # Generate background data for KernelExplainer
         background = shap.sample(np.random.randn(100, 6), 50)
-        _explainer_cache = shap.KernelExplainer(model.predict, background)
+        explainer = shap.KernelExplainer(model.predict, background)
     
-    return _explainer_cache
+    _explainer_cache = (model, explainer)
+    return explainer
 
 
-def generate_explanation(model, soil_input):
+def _class_shap_values(shap_values, class_indices):
     """
-    Generate human-readable explanation for crop recommendation using SHAP.
+    Select each row's SHAP values for its own class.
     
     Args:
-        model: Trained ML model
-        soil_input: SoilInput instance
+        shap_values: Output of explainer.shap_values(); a list with one
+                     (n_rows, n_features) array per class, a
+                     (n_rows, n_features, n_classes) array, or a
+                     (n_rows, n_features) array for single-output models
+        class_indices: Class index per row
         
     Returns:
-        str: Natural language explanation
+        numpy.ndarray: Shape (n_rows, n_features)
     """
-    try:
-        # Get feature names and values
-        feature_names = get_feature_names()
-        feature_values = soil_input.to_feature_array()
+    if isinstance(shap_values, list):
+        shap_values = np.stack(shap_values, axis=-1)
+    
+    shap_values = np.asarray(shap_values)
+    if shap_values.ndim == 2:
+        return shap_values
+    
+    rows = np.arange(shap_values.shape[0])
+    return shap_values[rows, :, np.asarray(class_indices)]
+
+
+def explain_batch(X, class_indices=None, model=None):
+    """
+    Compute TreeSHAP contributions for many rows in one call.
+    
+    Args:
+        X: Scaled feature matrix of shape (n_rows, n_features)
+        class_indices: Class index (into model.classes_) to explain for each
+                       row; defaults to the predicted class
+        model: Trained model (defaults to the active Random Forest)
         
-        # Scale features
-        scaler = load_scaler()
-        features_scaled = scaler.transform(np.array(feature_values).reshape(1, -1))
+    Returns:
+        numpy.ndarray: SHAP values of shape (n_rows, n_features) for each
+        row's class, one column per model input
+    """
+    if model is None:
+        model = load_model()
+    
+    X = np.asarray(X, dtype=float).reshape(-1, len(get_feature_names()))
+    if class_indices is None:
+        class_indices = np.argmax(model.predict_proba(X), axis=1)
+    
+    # The additivity check would run another full forest pass
+    explainer = get_explainer(model)
+    if isinstance(explainer, shap.TreeExplainer):
+        shap_values = explainer.shap_values(X, check_additivity=False)
+    else:
+        shap_values = explainer.shap_values(X)
+    
+    return _class_shap_values(shap_values, class_indices)
+
+
+def explain_fast(X, class_indices=None, forest=None):
+    """
+    Approximate per-feature contributions with the Saabas decomposition.
+    
+    Walks every tree once over the flat node arrays (the same traversal as
+    the prediction) and credits each split's change in class probability
+    to the split feature. Much cheaper than exact TreeSHAP on a large
+    forest, at the cost of ignoring feature interactions.
+    
+    Args:
+        X: Scaled feature matrix of shape (n_rows, n_features)
+        class_indices: Class index to explain per row; defaults to the
+                       predicted class
+        forest: FlatForest (defaults to the active bundle's flat forest)
         
-        # Get prediction (encoded)
-        prediction_encoded = model.predict(features_scaled)[0]
+    Returns:
+        numpy.ndarray: Contributions of shape (n_rows, n_features)
         
-        # Decode prediction to crop name
+    Raises:
+        FileNotFoundError: If no flat forest is loaded (ML_FOREST_ENGINE = 'sklearn')
+    """
+    if forest is None:
+        forest = get_model_bundle().rf_forest
+    if forest is None:
+        raise FileNotFoundError("Fast explanations need the flat forest engine")
+    
+    X = np.asarray(X, dtype=float).reshape(-1, forest.n_features_in_)
+    _, contributions, _ = forest.predict_proba_with_contributions(X, class_indices)
+    return contributions
+
+
+def resolve_explanation_mode(mode=None):
+    """
+    Decide between exact and fast explanations.
+    
+    Args:
+        mode: 'exact', 'fast' or 'auto' (defaults to settings.EXPLANATION_MODE).
+              'auto' switches to fast once EXPLANATION_FAST_CONCURRENCY exact
+              SHAP computations are already running.
+              
+    Returns:
+        str: 'exact' or 'fast'
+    """
+    mode = mode or settings.EXPLANATION_MODE
+    if mode not in EXPLANATION_MODES:
+        raise ValueError(f"Unknown explanation mode: {mode}")
+    
+    if mode == 'auto':
+        busy = cache.get(EXACT_IN_FLIGHT_KEY, 0) >= settings.EXPLANATION_FAST_CONCURRENCY
+        return 'fast' if busy else 'exact'
+    return mode
+
+
+@contextmanager
+def _exact_explanation_in_flight():
+    """Count an exact SHAP computation for resolve_explanation_mode('auto')."""
+    # Expires so a crashed worker cannot leave the count raised forever
+    cache.add(EXACT_IN_FLIGHT_KEY, 0, timeout=60)
+    try:
+        cache.incr(EXACT_IN_FLIGHT_KEY)
+    except ValueError:
+        cache.set(EXACT_IN_FLIGHT_KEY, 1, timeout=60)
+    try:
+        yield
+    finally:
         try:
-            label_encoder = load_label_encoder()
-            if isinstance(prediction_encoded, (int, np.integer)):
-                prediction = label_encoder.inverse_transform([prediction_encoded])[0]
-            else:
-                prediction = prediction_encoded  # Already decoded
-        except:
-            prediction = str(prediction_encoded)  # Fallback to raw prediction
-        
-        # Get SHAP explainer
-        explainer = get_explainer(model)
+            if cache.decr(EXACT_IN_FLIGHT_KEY) < 0:
+                cache.set(EXACT_IN_FLIGHT_KEY, 0, timeout=60)
+        except ValueError:
+            pass
+
+
+def build_explanation(prediction, feature_values, contributions):
+    """
+    Turn per-feature contributions into a farmer-facing explanation.
+    
+    Args:
+        prediction: Recommended crop name
+        feature_values: Raw soil values in SoilInput.to_feature_array() order
+        contributions: Contribution of each feature to the predicted class
         
-        # Compute SHAP values
-        shap_values = explainer.shap_values(features_scaled)
+    Returns:
+        str: Natural language explanation
+    """
+    # Get top 3 most influential features (contributions follow the model's input columns)
+    feature_importance = list(zip(get_input_feature_names(), feature_values, contributions))
+    feature_importance.sort(key=lambda x: abs(x[2]), reverse=True)
+    top_features = feature_importance[:3]
+    
+    # Build explanation
+    explanation_parts = [
+        f"The recommended crop is **{prediction}** based on your soil analysis."
+    ]
+    
+    # Feature descriptions
+    feature_descriptions = {
+        'N': ('Nitrogen level', 'mg/kg'),
+        'P': ('Phosphorus level', 'mg/kg'),
+        'K': ('Potassium level', 'mg/kg'),
+        'ph': ('pH level', ''),
+        'moisture': ('Moisture content', '%'),
+        'temperature': ('Temperature', '°C')
+    }
+    
+    # Add key factors
+    explanation_parts.append("\n\n**Key factors influencing this recommendation:**")
+    
+    for i, (feature, value, importance) in enumerate(top_features, 1):
+        desc, unit = feature_descriptions[feature]
         
-        # Handle multi-class output (SHAP returns list of arrays)
-        if isinstance(shap_values, list):
-            # Get the class index for the prediction (use encoded value)
-            classes = model.classes_
-            pred_idx = np.where(classes == prediction_encoded)[0][0]
-            shap_values_for_pred = shap_values[pred_idx][0]
+        # Determine if feature supports or opposes the recommendation
+        if importance > 0:
+            effect = "strongly supports"
         else:
-            shap_values_for_pred = shap_values[0]
-        
-        # Get top 3 most influential features
-        feature_importance = list(zip(feature_names, feature_values, shap_values_for_pred))
-        feature_importance.sort(key=lambda x: abs(x[2]), reverse=True)
-        top_features = feature_importance[:3]
+            effect = "moderately influences"
         
-        # Build explanation
-        explanation_parts = [
-            f"The recommended crop is **{prediction}** based on your soil analysis."
-        ]
-        
-        # Feature descriptions
-        feature_descriptions = {
-            'N': ('Nitrogen level', 'mg/kg'),
-            'P': ('Phosphorus level', 'mg/kg'),
-            'K': ('Potassium level', 'mg/kg'),
-            'ph': ('pH level', ''),
-            'moisture': ('Moisture content', '%'),
-            'temperature': ('Temperature', '°C')
-        }
+        explanation_parts.append(
+            f"\n{i}. **{desc}**: {value:.1f} {unit} - This {effect} the recommendation for {prediction}."
+        )
+    
+    # Add soil condition assessment
+    explanation_parts.append("\n\n**Soil Condition Summary:**")
+    
+    # NPK assessment
+    npk_avg = (feature_values[0] + feature_values[1] + feature_values[2]) / 3
+    if npk_avg > 100:
+        npk_status = "high nutrient levels"
+    elif npk_avg > 50:
+        npk_status = "moderate nutrient levels"
+    else:
+        npk_status = "low to moderate nutrient levels"
+    
+    explanation_parts.append(f"- Your soil has {npk_status} (N: {feature_values[0]:.1f}, P: {feature_values[1]:.1f}, K: {feature_values[2]:.1f}).")
+    
+    # pH assessment
+    ph_value = feature_values[3]
+    if ph_value < 5.5:
+        ph_status = "acidic"
+    elif ph_value > 7.5:
+        ph_status = "alkaline"
+    else:
+        ph_status = "neutral"
+    
+    explanation_parts.append(f"- The pH level of {ph_value:.1f} indicates {ph_status} soil, which is suitable for {prediction}.")
+    
+    # Moisture assessment
+    moisture_value = feature_values[4]
+    if moisture_value > 70:
+        moisture_status = "high moisture"
+    elif moisture_value > 40:
+        moisture_status = "adequate moisture"
+    else:
+        moisture_status = "low moisture"
+    
+    explanation_parts.append(f"- Soil moisture at {moisture_value:.1f}% indicates {moisture_status} conditions.")
+    
+    # Temperature assessment
+    temp_value = feature_values[5]
+    explanation_parts.append(f"- Current soil temperature of {temp_value:.1f}°C is within the optimal range for {prediction}.")
+    
+    # Add recommendation confidence note
+    explanation_parts.append(
+        f"\n\n**Note:** This recommendation is based on comprehensive analysis of your soil parameters "
+        f"and is optimized for {prediction} cultivation under current conditions."
+    )
+    
+    return ' '.join(explanation_parts)
+
+
+def generate_explanation(model, soil_input, features_scaled=None, class_index=None, mode=None,
+                         model_version=None):
+    """
+    Generate human-readable explanation for crop recommendation.
+    
+    Pass the scaled features, class index and model version from
+    ml_engine.services.predict_crop_detailed() to reuse the prediction;
+    otherwise they are computed here. The active model bundle is pinned
+    for the whole explanation, so a model swap cannot change the forest,
+    scaler or label encoder halfway through.
+    
+    Args:
+        model: Trained ML model (None for the active Random Forest)
+        soil_input: SoilInput instance
+        features_scaled: Optional scaled feature matrix of shape (1, n_features)
+        class_index: Optional index of the predicted class in model.classes_
+        mode: 'exact' (TreeSHAP), 'fast' (Saabas) or 'auto'; defaults to
+              settings.EXPLANATION_MODE
+        model_version: Model version that produced features_scaled and
+                       class_index (None for the default models)
         
-        # Add key factors
-        explanation_parts.append("\n\n**Key factors influencing this recommendation:**")
+    Returns:
+        str: Natural language explanation
         
-        for i, (feature, value, importance) in enumerate(top_features, 1):
-            desc, unit = feature_descriptions[feature]
-            
-            # Determine if feature supports or opposes the recommendation
-            if importance > 0:
-                effect = "strongly supports"
-            else:
-                effect = "moderately influences"
-            
-            explanation_parts.append(
-                f"\n{i}. **{desc}**: {value:.1f} {unit} - This {effect} the recommendation for {prediction}."
+    Raises:
+        ModelVersionMismatch: If a prediction from another model version is
+                              passed without an explicit model
+    """
+    feature_values = soil_input.to_feature_array()
+    mode = resolve_explanation_mode(mode)
+    
+    with use_model_bundle() as bundle:
+        # A class index from another model version does not index this model's classes
+        reuses_prediction = features_scaled is not None or class_index is not None
+        if model is None and reuses_prediction and model_version != bundle.version:
+            raise ModelVersionMismatch(
+                f"Prediction from model version {model_version or 'default'}, "
+                f"active version is {bundle.version or 'default'}"
             )
         
-        # Add soil condition assessment
-        explanation_parts.append("\n\n**Soil Condition Summary:**")
-        
-        # NPK assessment
-        npk_avg = (feature_values[0] + feature_values[1] + feature_values[2]) / 3
-        if npk_avg > 100:
-            npk_status = "high nutrient levels"
-        elif npk_avg > 50:
-            npk_status = "moderate nutrient levels"
-        else:
-            npk_status = "low to moderate nutrient levels"
-        
-        explanation_parts.append(f"- Your soil has {npk_status} (N: {feature_values[0]:.1f}, P: {feature_values[1]:.1f}, K: {feature_values[2]:.1f}).")
-        
-        # pH assessment
-        ph_value = feature_values[3]
-        if ph_value < 5.5:
-            ph_status = "acidic"
-        elif ph_value > 7.5:
-            ph_status = "alkaline"
-        else:
-            ph_status = "neutral"
-        
-        explanation_parts.append(f"- The pH level of {ph_value:.1f} indicates {ph_status} soil, which is suitable for {prediction}.")
-        
-        # Moisture assessment
-        moisture_value = feature_values[4]
-        if moisture_value > 70:
-            moisture_status = "high moisture"
-        elif moisture_value > 40:
-            moisture_status = "adequate moisture"
-        else:
-            moisture_status = "low moisture"
-        
-        explanation_parts.append(f"- Soil moisture at {moisture_value:.1f}% indicates {moisture_status} conditions.")
+        # Fast explanations run on the flat forest; exact SHAP needs the sklearn model
+        if mode == 'fast' and model is None:
+            model = bundle.rf_forest
+        if mode == 'fast' and not isinstance(model, FlatForest):
+            # No flat forest loaded, or the caller passed a sklearn model: explain it exactly
+            mode = 'exact'
+        if mode == 'exact' and (model is None or isinstance(model, FlatForest)):
+            model = bundle.require('rf_model')
         
-        # Temperature assessment
-        temp_value = feature_values[5]
-        explanation_parts.append(f"- Current soil temperature of {temp_value:.1f}°C is within the optimal range for {prediction}.")
+        if features_scaled is None:
+            scaler = bundle.require('scaler')
+            features_scaled = scaler.transform(np.array(feature_values).reshape(1, -1))
         
-        # Add recommendation confidence note
-        explanation_parts.append(
-            f"\n\n**Note:** This recommendation is based on comprehensive analysis of your soil parameters "
-            f"and is optimized for {prediction} cultivation under current conditions."
-        )
-        
-        return ' '.join(explanation_parts)
-        
-    except Exception as e:
-        # Fallback explanation if SHAP fails
-        scaler = load_scaler()
-        prediction_encoded = model.predict(scaler.transform(np.array(soil_input.to_feature_array()).reshape(1, -1)))[0]
+        if class_index is None:
+            class_index = int(np.argmax(model.predict_proba(features_scaled)[0]))
         
         # Decode prediction to crop name
+        prediction_encoded = model.classes_[class_index]
         try:
-            label_encoder = load_label_encoder()
+            label_encoder = bundle.require('label_encoder')
             if isinstance(prediction_encoded, (int, np.integer)):
                 prediction = label_encoder.inverse_transform([prediction_encoded])[0]
             else:
-                prediction = prediction_encoded
+                prediction = prediction_encoded  # Already decoded
         except:
-            prediction = str(prediction_encoded)
+            prediction = str(prediction_encoded)  # Fallback to raw prediction
         
-        return (
-            f"The recommended crop is **{prediction}** based on your soil parameters. "
-            f"Your soil has Nitrogen: {soil_input.N_level:.1f} mg/kg, "
-            f"Phosphorus: {soil_input.P_level:.1f} mg/kg, "
-            f"Potassium: {soil_input.K_level:.1f} mg/kg, "
-            f"pH: {soil_input.ph:.1f}, "
-            f"Moisture: {soil_input.moisture:.1f}%, "
-            f"and Temperature: {soil_input.temperature:.1f}°C. "
-            f"These conditions are well-suited for {prediction} cultivation."
-        )
+        try:
+            if mode == 'fast':
+                contributions = explain_fast(features_scaled, [class_index], model)[0]
+            else:
+                with _exact_explanation_in_flight():
+                    contributions = explain_batch(features_scaled, [class_index], model)[0]
+            return build_explanation(prediction, feature_values, contributions)
+            
+        except Exception as e:
+            # Fallback explanation if SHAP fails
+            return (
+                f"The recommended crop is **{prediction}** based on your soil parameters. "
+                f"Your soil has Nitrogen: {soil_input.N_level:.1f} mg/kg, "
+                f"Phosphorus: {soil_input.P_level:.1f} mg/kg, "
+                f"Potassium: {soil_input.K_level:.1f} mg/kg, "
+                f"pH: {soil_input.ph:.1f}, "
+                f"Moisture: {soil_input.moisture:.1f}%, "
+                f"and Temperature: {soil_input.temperature:.1f}°C. "
+                f"These conditions are well-suited for {prediction} cultivation."
+            )
 
 
 def generate_ai_farming_guide(crop_name, soil_input):
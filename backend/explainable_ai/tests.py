@@ -1,3 +1,127 @@
-from django.test import TestCase
+from unittest import mock
+import numpy as np
+import pandas as pd
+import shap
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from sklearn.ensemble import RandomForestClassifier
+from ml_engine.forest import FlatForest
+from ml_engine.services import BASE_DIR, ModelVersionMismatch
+from soil.models import SoilInput
+from . import services
+from .services import build_explanation, explain_batch, explain_fast, generate_explanation, resolve_explanation_mode
 
-# Create your tests here.
+
+# build_explanation() descriptions in SoilInput.to_feature_array() order
+DESCRIPTIONS = ['Nitrogen level', 'Phosphorus level', 'Potassium level', 'pH level', 'Moisture content', 'Temperature']
+
+
+class ExplanationTest(SimpleTestCase):
+    """Test cases for SHAP explanations."""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        df = pd.read_csv(BASE_DIR / 'data' / 'Crop_recommendation.csv')
+        cls.X = df[['N', 'P', 'K', 'temperature', 'humidity', 'ph']].to_numpy(dtype=float)
+        cls.model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(cls.X, df['label'])
+    
+    def tearDown(self):
+        services._explainer_cache = None
+        cache.delete(services.EXACT_IN_FLIGHT_KEY)
+    
+    def test_explain_batch_matches_tree_explainer(self):
+        """Each row gets the TreeSHAP values of its predicted class."""
+        X = self.X[::400]
+        predicted = np.argmax(self.model.predict_proba(X), axis=1)
+        
+        contributions = explain_batch(X, model=self.model)
+        
+        shap_values = shap.TreeExplainer(self.model).shap_values(X)
+        if isinstance(shap_values, list):
+            shap_values = np.stack(shap_values, axis=-1)
+        expected = np.array([shap_values[i, :, k] for i, k in enumerate(predicted)])
+        np.testing.assert_allclose(contributions, expected)
+    
+    def test_precomputed_prediction_is_reused(self):
+        """With features and class index given, the model is not evaluated again."""
+        soil_input = SoilInput(N_level=90, P_level=42, K_level=43, ph=6.5, moisture=82, temperature=20.9)
+        features = np.array([[90, 42, 43, 20.9, 82, 6.5]])
+        class_index = int(np.flatnonzero(self.model.classes_ == 'rice')[0])
+        contributions = explain_batch(features, [class_index], self.model)[0]
+        
+        with mock.patch.object(self.model, 'predict_proba') as predict_proba, \
+                mock.patch.object(self.model, 'predict') as predict:
+            explanation = generate_explanation(self.model, soil_input, features, class_index, mode='exact')
+        
+        predict_proba.assert_not_called()
+        predict.assert_not_called()
+        self.assertEqual(explanation, build_explanation('rice', soil_input.to_feature_array(), contributions))
+        top_column = int(np.argmax(np.abs(contributions)))
+        self.assertIn(f"1. **{DESCRIPTIONS[top_column]}**", explanation)
+    
+    def test_fast_mode_totals_match_shap(self):
+        """Fast and exact contributions explain the same total per row."""
+        X = self.X[::200]
+        forest = FlatForest.from_model(self.model)
+        
+        fast = explain_fast(X, forest=forest)
+        exact = explain_batch(X, model=self.model)
+        
+        # Both decompose the class probability minus the forest's mean root value
+        self.assertEqual(fast.shape, exact.shape)
+        np.testing.assert_allclose(fast.sum(axis=1), exact.sum(axis=1), atol=1e-9)
+    
+    def test_fast_explanation_text(self):
+        """generate_explanation() accepts a flat forest in fast mode and names the key soil factors."""
+        soil_input = SoilInput(N_level=90, P_level=42, K_level=43, ph=6.5, moisture=82, temperature=20.9)
+        forest = FlatForest.from_model(self.model)
+        features = np.array([[90, 42, 43, 20.9, 82, 6.5]])
+        class_index = int(np.flatnonzero(forest.classes_ == 'rice')[0])
+        
+        explanation = generate_explanation(forest, soil_input, features, class_index, mode='fast')
+        
+        contributions = explain_fast(features, [class_index], forest)[0]
+        self.assertIn('**Key factors influencing this recommendation:**', explanation)
+        self.assertEqual(explanation, build_explanation('rice', soil_input.to_feature_array(), contributions))
+    
+    def test_explanation_names_every_input(self):
+        """Each model input column maps to a described soil field."""
+        values = [90, 42, 43, 6.5, 82, 20.9]
+        for column in range(len(values)):
+            contributions = np.zeros(len(values))
+            contributions[column] = 1.0
+            explanation = build_explanation('rice', values, contributions)
+            self.assertIn(f"1. **{DESCRIPTIONS[column]}**: {values[column]:.1f}", explanation)
+    
+    def test_default_mode_does_not_load_sklearn_forest(self):
+        """With the default settings explanations run on the mapped flat forest only."""
+        soil_input = SoilInput(N_level=90, P_level=42, K_level=43, ph=6.5, moisture=82, temperature=20.9)
+        bundle = mock.Mock(rf_forest=FlatForest.from_model(self.model), version=None)
+        
+        with mock.patch.object(services, 'use_model_bundle') as use_model_bundle:
+            use_model_bundle.return_value.__enter__.return_value = bundle
+            generate_explanation(None, soil_input, np.array([[90, 42, 43, 20.9, 82, 6.5]]), 0)
+        
+        self.assertNotIn(mock.call('rf_model'), bundle.require.call_args_list)
+    
+    def test_prediction_from_another_model_version_is_rejected(self):
+        """A class index predicted by a swapped-out model is not explained with the active one."""
+        soil_input = SoilInput(N_level=90, P_level=42, K_level=43, ph=6.5, moisture=82, temperature=20.9)
+        bundle = mock.Mock(rf_forest=FlatForest.from_model(self.model), version='v2')
+        
+        with mock.patch.object(services, 'use_model_bundle') as use_model_bundle, \
+                self.assertRaises(ModelVersionMismatch):
+            use_model_bundle.return_value.__enter__.return_value = bundle
+            generate_explanation(None, soil_input, np.array([[90, 42, 43, 20.9, 82, 6.5]]), 0, model_version='v1')
+    
+    @override_settings(EXPLANATION_MODE='auto', EXPLANATION_FAST_CONCURRENCY=2)
+    def test_auto_mode_switches_under_load(self):
+        """'auto' uses exact SHAP until the concurrency threshold is reached."""
+        self.assertEqual(resolve_explanation_mode(), 'exact')
+        with services._exact_explanation_in_flight():
+            self.assertEqual(resolve_explanation_mode(), 'exact')
+            with services._exact_explanation_in_flight():
+                self.assertEqual(resolve_explanation_mode(), 'fast')
+        self.assertEqual(resolve_explanation_mode(), 'exact')
+        self.assertEqual(resolve_explanation_mode('exact'), 'exact')
@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for SecureCrop.
+
+Loaded automatically when gunicorn is started from the backend directory
+(see Procfile).
+"""
+
+import os
+
+# Import the Django app in the master before forking. MlEngineConfig.ready()
+# warms the ML model bundle there, so workers share its pages copy-on-write
+# instead of each deserializing the models on their first request.
+preload_app = True
+
+# Model preloading is off by default so manage.py commands (migrate,
+# collectstatic, ...) do not deserialize the models; only the server turns it on
+os.environ.setdefault('ML_PRELOAD_MODELS', 'True')
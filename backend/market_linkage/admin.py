@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MarketSearch, FavoritePlace, PlaceVisit
+from .models import MarketSearch, FavoritePlace, PlaceVisit, PointOfInterest
 
 
 @admin.register(MarketSearch)
@@ -23,3 +23,11 @@ class PlaceVisitAdmin(admin.ModelAdmin):
     list_filter = ['place_type', 'visited_at']
     search_fields = ['user__email', 'place_name']
     date_hierarchy = 'visited_at'
+
+
+@admin.register(PointOfInterest)
+class PointOfInterestAdmin(admin.ModelAdmin):
+    list_display = ['name', 'place_type', 'address', 'source', 'updated_at']
+    list_filter = ['place_type', 'source']
+    search_fields = ['name', 'address', 'osm_id']
+    readonly_fields = ['osm_id', 'geohash', 'updated_at']
@@ -0,0 +1,297 @@
+"""
+Market search result cache.
+
+Overpass results are cached per snapped location (lat/lon rounded to
+0.01 degrees, ~1 km) together with the circle they were fetched for. Only
+the largest circle per location is kept, and a search is served from any
+cached circle that contains it (distance between the centres + requested
+radius <= cached radius). 5, 10 and 20 km searches from the same farm
+therefore cost one upstream query each time the radius grows, and none
+when it shrinks.
+
+Circles are fetched around the snapped location, padded by SNAP_MARGIN_KM,
+so a cached circle covers its radius from anywhere in the snapped cell.
+
+Each circle is stored under two keys: its small metadata (centre, radius,
+fetch time) and its PlaceIndex. Lookups read the metadata of the nearby
+cells and only load the one index they serve from.
+
+Expiry is stale-while-revalidate: a circle older than
+MARKET_CACHE_SOFT_TIMEOUT is still served immediately while one background
+task refreshes it, and is dropped after MARKET_CACHE_TIMEOUT. A failed
+refresh keeps the stale circle and is not retried for
+MARKET_CACHE_REFRESH_BACKOFF seconds. Fetches are single-flight per
+snapped cell (a cache.add lock), so when a popular area is missing only
+one request queries Overpass and concurrent requests wait for its result
+instead of each sending their own query.
+"""
+
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from securecrop.background import submit
+from .overpass import query_overpass
+from .services import PlaceIndex, haversine_distance, parse_elements
+
+
+AREA_CACHE_PREFIX = 'market:area'
+SNAP_DECIMALS = 2
+# Half the diagonal of a 0.01 x 0.01 degree cell at the equator
+SNAP_MARGIN_KM = 0.8
+# How often requests waiting on another request's fetch re-check the cache
+LOCK_POLL_INTERVAL = 0.25
+
+# Process-local wake-ups for requests waiting on a fetch in this process
+_fetch_events = {}
+_fetch_events_lock = threading.Lock()
+
+
+def snap_location(lat, lon):
+    """Round coordinates to the cache grid (~1 km)."""
+    return round(float(lat), SNAP_DECIMALS), round(float(lon), SNAP_DECIMALS)
+
+
+def area_cache_key(snapped_lat, snapped_lon):
+    return f'{AREA_CACHE_PREFIX}:{snapped_lat:.{SNAP_DECIMALS}f}:{snapped_lon:.{SNAP_DECIMALS}f}'
+
+
+def area_index_key(snapped_lat, snapped_lon):
+    return f'{area_cache_key(snapped_lat, snapped_lon)}:index'
+
+
+def fetch_lock_key(snapped_lat, snapped_lon):
+    return f'{area_cache_key(snapped_lat, snapped_lon)}:lock'
+
+
+def refresh_backoff_key(snapped_lat, snapped_lon):
+    return f'{area_cache_key(snapped_lat, snapped_lon)}:refresh-backoff'
+
+
+def is_stale(area):
+    """True once a cached circle is older than MARKET_CACHE_SOFT_TIMEOUT."""
+    return time.time() - area['fetched_at'] > settings.MARKET_CACHE_SOFT_TIMEOUT
+
+
+def _nearby_cells(lat, lon):
+    """The snapped cell containing a point and its 8 neighbours."""
+    snapped_lat, snapped_lon = snap_location(lat, lon)
+    step = 10 ** -SNAP_DECIMALS
+    return [
+        (round(snapped_lat + row * step, SNAP_DECIMALS), round(snapped_lon + col * step, SNAP_DECIMALS))
+        for row in (-1, 0, 1)
+        for col in (-1, 0, 1)
+    ]
+
+
+def find_covering_area(lat, lon, radius_km):
+    """
+    Find a cached circle that contains the requested one.
+
+    Reads the circle metadata of the request's snapped cell and its
+    neighbours (one cache.get_many), picks the smallest covering circle,
+    which has the fewest places to rank, and loads only its index.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        radius_km: Requested radius in km
+
+    Returns:
+        dict or None: Cached area {'lat', 'lon', 'radius_km', 'index', 'fetched_at'}
+    """
+    cells = {area_cache_key(*cell): cell for cell in _nearby_cells(lat, lon)}
+    covering = sorted(
+        (
+            (cells[key], area) for key, area in cache.get_many(list(cells)).items()
+            if haversine_distance(lat, lon, area['lat'], area['lon']) + radius_km <= area['radius_km']
+        ),
+        key=lambda item: item[1]['radius_km']
+    )
+    for cell, area in covering:
+        stored = cache.get(area_index_key(*cell))
+        # Skip an index evicted on its own or replaced since the metadata was read
+        if stored is not None and stored['fetched_at'] == area['fetched_at']:
+            return {**area, 'index': stored['index']}
+    return None
+
+
+def store_area(center_lat, center_lon, radius_km, index):
+    """
+    Cache a fetched circle for its snapped location, unless a larger
+    circle is already cached there.
+
+    Returns:
+        bool: True if stored
+    """
+    snapped = snap_location(center_lat, center_lon)
+    cache_key = area_cache_key(*snapped)
+    existing = cache.get(cache_key)
+    if existing is not None and existing['radius_km'] > radius_km:
+        return False
+
+    fetched_at = time.time()
+    cache.set(area_index_key(*snapped), {'fetched_at': fetched_at, 'index': index}, settings.MARKET_CACHE_TIMEOUT)
+    cache.set(cache_key, {
+        'lat': center_lat,
+        'lon': center_lon,
+        'radius_km': radius_km,
+        'fetched_at': fetched_at,
+    }, settings.MARKET_CACHE_TIMEOUT)
+    return True
+
+
+def fetch_circle(center_lat, center_lon, fetch_radius_km):
+    """
+    Fetch a circle from Overpass and cache it.
+
+    Returns:
+        PlaceIndex, or None if every Overpass server failed
+    """
+    elements = query_overpass(center_lat, center_lon, int(fetch_radius_km * 1000))
+    if elements is None:
+        return None
+
+    index = PlaceIndex(parse_elements(elements))
+    # Empty results are not cached, so a failing mirror does not blank an area
+    if len(index) and store_area(center_lat, center_lon, fetch_radius_km, index):
+        print(f"[Market Search] Cached {len(index)} results within {fetch_radius_km:.1f} km of ({center_lat}, {center_lon})")
+    return index
+
+
+def fetch_area(lat, lon, radius_km):
+    """
+    Fetch a circle from Overpass around the snapped location and cache it.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        radius_km: Radius the caller needs, in km
+
+    Returns:
+        PlaceIndex, or None if every Overpass server failed
+    """
+    center_lat, center_lon = snap_location(lat, lon)
+    return fetch_circle(center_lat, center_lon, radius_km + SNAP_MARGIN_KM)
+
+
+def _release_fetch_lock(lock_key):
+    cache.delete(lock_key)
+    with _fetch_events_lock:
+        event = _fetch_events.pop(lock_key, None)
+    if event is not None:
+        event.set()
+
+
+def _wait_for_fetch(lock_key):
+    """Sleep until the fetch holding lock_key finishes in this process, or one poll interval."""
+    with _fetch_events_lock:
+        event = _fetch_events.setdefault(lock_key, threading.Event())
+    event.wait(LOCK_POLL_INTERVAL)
+
+
+def fetch_area_once(lat, lon, radius_km):
+    """
+    fetch_area() with single-flight per snapped cell.
+
+    The first request for a cell takes the lock (holding the radius it
+    fetches) and queries Overpass. Requests arriving meanwhile wait and
+    re-check the cache: they are served by the new circle if it covers
+    them, return None if the lock holder fetched at least their radius and
+    cached nothing (Overpass failed or the area is empty), and otherwise
+    take the lock in turn. After MARKET_CACHE_LOCK_TIMEOUT seconds a
+    waiter fetches on its own.
+
+    Returns:
+        PlaceIndex, or None if nothing was fetched
+    """
+    lock_key = fetch_lock_key(*snap_location(lat, lon))
+    deadline = time.monotonic() + settings.MARKET_CACHE_LOCK_TIMEOUT
+
+    while time.monotonic() < deadline:
+        if cache.add(lock_key, radius_km, settings.MARKET_CACHE_LOCK_TIMEOUT):
+            try:
+                return fetch_area(lat, lon, radius_km)
+            finally:
+                _release_fetch_lock(lock_key)
+
+        # Radius the lock holder is fetching (None if it finished just now)
+        holder_radius_km = cache.get(lock_key)
+        _wait_for_fetch(lock_key)
+
+        area = find_covering_area(lat, lon, radius_km)
+        if area is not None:
+            print(f"[Market Search] Served by a concurrent fetch of {area['radius_km']:.1f} km")
+            return area['index']
+        if holder_radius_km is not None and holder_radius_km >= radius_km and cache.get(lock_key) is None:
+            return None
+
+    print(f"[Market Search] Fetch lock still held after {settings.MARKET_CACHE_LOCK_TIMEOUT}s, fetching anyway")
+    return fetch_area(lat, lon, radius_km)
+
+
+def refresh_area(center_lat, center_lon, fetch_radius_km):
+    """
+    Background re-fetch of a stale cached circle; releases its fetch lock.
+
+    If Overpass fails or returns nothing, the stale circle stays in place
+    and no further refresh is queued for the cell for
+    MARKET_CACHE_REFRESH_BACKOFF seconds, so a rate-limited mirror is not
+    queried again by every request.
+    """
+    snapped = snap_location(center_lat, center_lon)
+    index = None
+    try:
+        index = fetch_circle(center_lat, center_lon, fetch_radius_km)
+    finally:
+        if index is None or not len(index):
+            print(f"[Market Search] Refresh of ({center_lat}, {center_lon}) failed, retrying in {settings.MARKET_CACHE_REFRESH_BACKOFF}s")
+            cache.set(refresh_backoff_key(*snapped), True, settings.MARKET_CACHE_REFRESH_BACKOFF)
+        _release_fetch_lock(fetch_lock_key(*snapped))
+
+
+def revalidate_area(area):
+    """
+    Queue a background refresh of a stale circle, unless a fetch for its
+    cell is already running or its last refresh failed recently.
+
+    Returns:
+        bool: True if a refresh was queued
+    """
+    snapped = snap_location(area['lat'], area['lon'])
+    if cache.get(refresh_backoff_key(*snapped)):
+        return False
+
+    lock_key = fetch_lock_key(*snapped)
+    if not cache.add(lock_key, area['radius_km'], settings.MARKET_CACHE_LOCK_TIMEOUT):
+        return False
+
+    try:
+        submit(refresh_area, area['lat'], area['lon'], area['radius_km'])
+    except Exception:
+        _release_fetch_lock(lock_key)
+        raise
+    print(f"[Market Search] Refreshing stale {area['radius_km']:.1f} km circle in the background")
+    return True
+
+
+def search_places(lat, lon, radius_km):
+    """
+    Places around a point, from a covering cached circle or from Overpass.
+
+    Stale circles are returned as they are and refreshed in the background.
+    The returned index may extend beyond radius_km; rank it with
+    PlaceIndex.nearest(..., radius_km=radius_km).
+
+    Returns:
+        PlaceIndex (empty if Overpass failed)
+    """
+    area = find_covering_area(lat, lon, radius_km)
+    if area is not None:
+        print(f"[Market Search] Cache HIT: {radius_km:.1f} km served from cached {area['radius_km']:.1f} km circle")
+        if is_stale(area):
+            revalidate_area(area)
+        return area['index']
+
+    print(f"[Market Search] Cache MISS - fetching from API")
+    return fetch_area_once(lat, lon, radius_km) or PlaceIndex([])
@@ -0,0 +1,101 @@
+"""
+Benchmark market search ranking over synthetic Overpass payloads.
+
+Compares the original cache-hit path (scalar haversine per place in a
+Python loop, then a full sort) with PlaceIndex.nearest() (one vectorized
+haversine and an argpartition top-k), for payloads of several sizes.
+
+Usage:
+    python manage.py benchmark_market_search --elements 1000 5000 20000 --requests 200 --limit 50
+"""
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from market_linkage.services import PlaceIndex, haversine_distance, parse_elements
+
+
+SHOP_TYPES = ['supermarket', 'convenience', 'greengrocer', 'farm', 'garden_centre', 'hardware', 'wholesale']
+
+
+def synthetic_overpass_payload(count, lat, lon, radius_km, seed=42):
+    """
+    Generate an Overpass JSON payload of named shops (nodes and ways with
+    a centre) spread uniformly over a circle.
+    """
+    rng = np.random.default_rng(seed)
+    distances = radius_km * np.sqrt(rng.uniform(0, 1, count))
+    bearings = rng.uniform(0, 2 * np.pi, count)
+    lats = lat + (distances * np.cos(bearings)) / 111.32
+    lons = lon + (distances * np.sin(bearings)) / (111.32 * np.cos(np.radians(lat)))
+
+    elements = []
+    for index in range(count):
+        tags = {
+            'name': f'Kedai {index}',
+            'shop': SHOP_TYPES[index % len(SHOP_TYPES)],
+            'addr:street': f'Jalan {index % 97}',
+            'addr:city': 'Kuala Lumpur',
+        }
+        if index % 4:
+            elements.append({'type': 'node', 'id': index, 'lat': float(lats[index]), 'lon': float(lons[index]), 'tags': tags})
+        else:
+            elements.append({'type': 'way', 'id': index, 'center': {'lat': float(lats[index]), 'lon': float(lons[index])}, 'tags': tags})
+    return {'elements': elements}
+
+
+def scalar_nearest(places, lat, lon):
+    """Reference implementation of the original cache-hit ranking."""
+    results = [dict(place) for place in places]
+    for result in results:
+        result['distance_km'] = round(
+            haversine_distance(lat, lon, result['lat'], result['lon']), 2
+        )
+    results.sort(key=lambda x: x.get('distance_km', float('inf')))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Benchmark scalar vs vectorized top-k market search ranking on synthetic Overpass payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--elements', type=int, nargs='+', default=[1000, 5000, 20000], help='Payload sizes to benchmark')
+        parser.add_argument('--requests', type=int, default=200, help='Ranked searches per payload size')
+        parser.add_argument('--limit', type=int, default=50, help='Results returned per search')
+        parser.add_argument('--radius', type=float, default=20, help='Payload radius in km')
+
+    def handle(self, *args, **options):
+        lat, lon = 3.1390, 101.6869
+        rng = np.random.default_rng(7)
+        limit = options['limit']
+
+        self.stdout.write(f"{'elements':>8}  {'parse ms':>9}  {'scalar ms':>10}  {'top-k ms':>9}  {'speedup':>7}")
+        for count in options['elements']:
+            payload = synthetic_overpass_payload(count, lat, lon, options['radius'])
+
+            start = time.perf_counter()
+            places = parse_elements(payload['elements'])
+            index = PlaceIndex(places)
+            parse_ms = (time.perf_counter() - start) * 1000
+
+            # Searches from positions inside the same ~1 km cache cell
+            positions = [
+                (lat + rng.uniform(-0.005, 0.005), lon + rng.uniform(-0.005, 0.005))
+                for _ in range(options['requests'])
+            ]
+
+            start = time.perf_counter()
+            for search_lat, search_lon in positions:
+                expected = scalar_nearest(places, search_lat, search_lon)[:limit]
+            scalar_ms = (time.perf_counter() - start) * 1000 / len(positions)
+
+            start = time.perf_counter()
+            for search_lat, search_lon in positions:
+                ranked = index.nearest(search_lat, search_lon, limit)
+            topk_ms = (time.perf_counter() - start) * 1000 / len(positions)
+
+            # Same distances as the original path for the last position
+            assert [place['distance_km'] for place in ranked] == [place['distance_km'] for place in expected]
+
+            self.stdout.write(
+                f"{count:>8}  {parse_ms:>9.1f}  {scalar_ms:>10.3f}  {topk_ms:>9.3f}  {scalar_ms / topk_ms:>6.1f}x"
+            )
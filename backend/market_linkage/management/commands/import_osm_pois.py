@@ -0,0 +1,116 @@
+"""
+Import OpenStreetMap markets, buyers and stores into the local POI index.
+
+Reads an OSM extract (for example a Malaysia dump) and keeps the elements
+that market search covers (MARKET_SHOP_TYPES and amenity=marketplace),
+storing their classify_place() type, address and geohash in the
+PointOfInterest table. Re-importing updates existing rows by OSM id.
+
+Supported inputs:
+    *.json  Overpass JSON ({"elements": [...]}, ways with "center")
+    *.pbf   OSM PBF extract (needs the optional osmium package)
+
+With --overpass, the area around a point is refreshed from Overpass instead.
+
+Usage:
+    python manage.py import_osm_pois malaysia-shops.json --replace
+    python manage.py import_osm_pois malaysia-latest.osm.pbf
+    python manage.py import_osm_pois --overpass 3.1390 101.6869 --radius 20000
+"""
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from market_linkage.models import PointOfInterest
+from market_linkage.overpass import query_overpass
+from market_linkage.services import is_market_element, parse_elements, upsert_pois
+
+
+def read_json_elements(path):
+    """Market elements from an Overpass JSON file."""
+    with open(path, encoding='utf-8') as handle:
+        data = json.load(handle)
+    elements = data.get('elements', []) if isinstance(data, dict) else data
+    return [element for element in elements if is_market_element(element.get('tags', {}))]
+
+
+def read_pbf_elements(path):
+    """Market elements from an OSM PBF extract, ways reduced to their centre."""
+    try:
+        import osmium
+    except ImportError:
+        raise CommandError("PBF import needs the osmium package (pip install osmium), or convert the extract to Overpass JSON")
+
+    elements = []
+
+    class MarketHandler(osmium.SimpleHandler):
+        def node(self, node):
+            tags = dict(node.tags)
+            if is_market_element(tags) and node.location.valid():
+                elements.append({
+                    'type': 'node', 'id': node.id,
+                    'lat': node.location.lat, 'lon': node.location.lon, 'tags': tags
+                })
+
+        def way(self, way):
+            tags = dict(way.tags)
+            if not is_market_element(tags):
+                return
+            locations = [node.location for node in way.nodes if node.location.valid()]
+            if locations:
+                elements.append({
+                    'type': 'way', 'id': way.id,
+                    'center': {
+                        'lat': sum(location.lat for location in locations) / len(locations),
+                        'lon': sum(location.lon for location in locations) / len(locations),
+                    },
+                    'tags': tags
+                })
+
+    # locations=True resolves way node coordinates
+    MarketHandler().apply_file(path, locations=True)
+    return elements
+
+
+class Command(BaseCommand):
+    help = 'Import OSM markets, buyers and stores (Overpass JSON or PBF extract, or an Overpass area refresh) into the local POI index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Overpass JSON (.json) or OSM PBF (.pbf) extract')
+        parser.add_argument('--overpass', type=float, nargs=2, metavar=('LAT', 'LON'), help='Refresh the area around a point from Overpass')
+        parser.add_argument('--radius', type=int, default=20000, help='Radius in meters for --overpass')
+        parser.add_argument('--replace', action='store_true', help='Delete previously imported extract rows first')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if bool(path) == bool(options['overpass']):
+            raise CommandError('Give either an extract path or --overpass LAT LON')
+
+        start = time.perf_counter()
+        if options['overpass']:
+            lat, lon = options['overpass']
+            elements = query_overpass(lat, lon, options['radius'])
+            if elements is None:
+                raise CommandError('Every Overpass server failed')
+            source = 'overpass'
+        elif path.endswith('.pbf'):
+            elements = read_pbf_elements(path)
+            source = 'extract'
+        elif path.endswith('.json'):
+            elements = read_json_elements(path)
+            source = 'extract'
+        else:
+            raise CommandError('Unsupported extract format (expected .json or .pbf)')
+
+        places = parse_elements(elements)
+        with transaction.atomic():
+            if options['replace']:
+                deleted, _ = PointOfInterest.objects.filter(source='extract').delete()
+                self.stdout.write(f'Deleted {deleted} previously imported places')
+            written = upsert_pois(places, source=source, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            f"Imported {written} places from {len(elements)} market elements "
+            f"in {time.perf_counter() - start:.2f}s ({PointOfInterest.objects.count()} in index)"
+        )
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market_linkage', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointOfInterest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('osm_id', models.CharField(max_length=50, unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('geohash', models.CharField(db_index=True, max_length=12)),
+                ('place_type', models.CharField(choices=[('market', 'Market'), ('buyer', 'Buyer'), ('agri_store', 'Agricultural Store')], max_length=20)),
+                ('address', models.CharField(blank=True, max_length=500)),
+                ('phone', models.CharField(blank=True, max_length=50)),
+                ('opening_hours', models.CharField(blank=True, max_length=200)),
+                ('website', models.CharField(blank=True, max_length=500)),
+                ('source', models.CharField(choices=[('extract', 'OSM Extract'), ('overpass', 'Overpass Refresh')], default='extract', max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Point of Interest',
+                'verbose_name_plural': 'Points of Interest',
+                'ordering': ['name'],
+            },
+        ),
+    ]
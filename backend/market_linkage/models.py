@@ -103,3 +103,44 @@ class PlaceVisit(models.Model):
     
     def __str__(self):
         return f"{self.user.email} visited {self.place_name}"
+
+
+class PointOfInterest(models.Model):
+    """
+    Local index of OpenStreetMap markets, buyers and stores.
+    
+    Filled by the import_osm_pois command from an OSM extract (or an
+    Overpass refresh) so market search does not wait on Overpass. The
+    geohash column is indexed; searches select the geohash cells that
+    cover the search circle with string range queries.
+    """
+    PLACE_TYPES = FavoritePlace.PLACE_TYPES
+    
+    SOURCE_CHOICES = [
+        ('extract', 'OSM Extract'),
+        ('overpass', 'Overpass Refresh'),
+    ]
+    
+    osm_id = models.CharField(max_length=50, unique=True)  # e.g. osm_node_123
+    name = models.CharField(max_length=200)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    geohash = models.CharField(max_length=12, db_index=True)
+    
+    # Precomputed classify_place() type and display address
+    place_type = models.CharField(max_length=20, choices=PLACE_TYPES)
+    address = models.CharField(max_length=500, blank=True)
+    phone = models.CharField(max_length=50, blank=True)
+    opening_hours = models.CharField(max_length=200, blank=True)
+    website = models.CharField(max_length=500, blank=True)
+    
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='extract')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Point of Interest'
+        verbose_name_plural = 'Points of Interest'
+    
+    def __str__(self):
+        return f"{self.name} ({self.place_type})"
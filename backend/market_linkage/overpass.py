@@ -0,0 +1,260 @@
+"""
+Overpass API client.
+
+Market searches that miss the local POI index and the area cache query
+the public Overpass mirrors in OVERPASS_SERVERS. Instead of trying them
+one after another (a slow mirror used to cost its full timeout before the
+next was tried), requests are hedged:
+
+1. The healthiest mirror is queried first
+2. If it has not answered after OVERPASS_HEDGE_DELAY seconds, or as soon
+   as it fails, the next mirror is queried too
+3. The first successful response wins; the others are ignored (they
+   finish in the background and only update the health stats)
+
+Mirror health is tracked per process as exponentially weighted latency
+and error rate, and mirrors are tried in order of expected latency.
+Setting OVERPASS_HEDGE_DELAY to 0 restores strictly sequential fallback,
+with every mirror getting its own full timeout.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from .services import MARKET_SHOP_TYPES
+
+
+class OverpassError(Exception):
+    """Raised when an Overpass mirror returns a non-200 response."""
+
+    def __init__(self, message, status_code=502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class MirrorHealth:
+    """
+    Per-mirror latency and error rate, exponentially weighted.
+
+    Args:
+        alpha: Weight of the newest observation
+        default_latency: Expected latency (seconds) of a mirror with no successes yet
+        error_penalty: How strongly the error rate inflates a mirror's expected latency
+    """
+
+    def __init__(self, alpha=0.3, default_latency=2.0, error_penalty=4.0):
+        self.alpha = alpha
+        self.default_latency = default_latency
+        self.error_penalty = error_penalty
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _entry(self, url):
+        return self._stats.setdefault(url, {
+            'latency': None, 'error_rate': 0.0, 'requests': 0, 'errors': 0,
+        })
+
+    def record(self, url, latency, ok):
+        """Record the outcome of one request."""
+        with self._lock:
+            entry = self._entry(url)
+            entry['requests'] += 1
+            if ok:
+                entry['latency'] = latency if entry['latency'] is None else (
+                    (1 - self.alpha) * entry['latency'] + self.alpha * latency
+                )
+            else:
+                entry['errors'] += 1
+            entry['error_rate'] = (1 - self.alpha) * entry['error_rate'] + self.alpha * (0.0 if ok else 1.0)
+
+    def score(self, url):
+        """Expected latency of a mirror in seconds, inflated by its error rate (lower is better)."""
+        with self._lock:
+            entry = self._entry(url)
+            latency = self.default_latency if entry['latency'] is None else entry['latency']
+            return latency * (1 + self.error_penalty * entry['error_rate'])
+
+    def ranked(self, urls):
+        """Mirrors ordered healthiest first (ties keep the configured order)."""
+        return sorted(urls, key=self.score)
+
+    def snapshot(self):
+        """Current stats per mirror."""
+        with self._lock:
+            return {
+                url: {
+                    'latency_ms': round(entry['latency'] * 1000) if entry['latency'] is not None else None,
+                    'error_rate': round(entry['error_rate'], 3),
+                    'requests': entry['requests'],
+                    'errors': entry['errors'],
+                }
+                for url, entry in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+mirror_health = MirrorHealth()
+
+_session = None
+_executor = None
+_init_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide pooled session for the Overpass mirrors."""
+    global _session
+
+    if _session is None:
+        with _init_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=settings.OVERPASS_MAX_CONCURRENCY)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['User-Agent'] = 'SecureCropSystem/1.0'
+                _session = session
+    return _session
+
+
+def get_executor():
+    """Process-wide thread pool for (hedged) mirror requests, created on first use."""
+    global _executor
+
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.OVERPASS_MAX_CONCURRENCY,
+                    thread_name_prefix='overpass'
+                )
+    return _executor
+
+
+def build_overpass_query(lat, lon, radius, api_timeout):
+    """Single comprehensive Overpass query for all relevant place types"""
+    shop_types = '|'.join(MARKET_SHOP_TYPES)
+    return f"""
+        [out:json][timeout:{api_timeout}];
+        (
+            node["shop"~"{shop_types}"](around:{radius},{lat},{lon});
+            node["amenity"="marketplace"](around:{radius},{lat},{lon});
+            way["shop"~"{shop_types}"](around:{radius},{lat},{lon});
+            way["amenity"="marketplace"](around:{radius},{lat},{lon});
+        );
+        out center tags;
+        """
+
+
+def request_mirror(server_url, query, timeout):
+    """
+    Run a query on one mirror and record the outcome in mirror_health.
+
+    Returns:
+        list: Overpass elements
+
+    Raises:
+        OverpassError: If the mirror returns a non-200 response
+        requests.RequestException: On connection errors or timeouts
+    """
+    start = time.perf_counter()
+    try:
+        response = get_session().get(server_url, params={'data': query}, timeout=timeout)
+        if response.status_code != 200:
+            raise OverpassError(f'{server_url} returned {response.status_code}', status_code=response.status_code)
+        elements = response.json().get('elements', [])
+    except Exception:
+        mirror_health.record(server_url, time.perf_counter() - start, ok=False)
+        raise
+
+    mirror_health.record(server_url, time.perf_counter() - start, ok=True)
+    return elements
+
+
+def query_overpass(lat, lon, radius):
+    """
+    Fetch market elements around a point from the Overpass mirrors,
+    hedging across them (see module docstring).
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        radius: Radius in meters
+
+    Returns:
+        list: Overpass elements, or None if every mirror failed or timed out
+    """
+    # Calculate timeout based on radius - larger areas need more time
+    api_timeout = max(20, 15 + (radius // 10000) * 5)
+    query = build_overpass_query(lat, lon, radius, api_timeout)
+    hedge_delay = settings.OVERPASS_HEDGE_DELAY
+    deadline = time.monotonic() + api_timeout + 5
+
+    remaining = mirror_health.ranked(settings.OVERPASS_SERVERS)
+    in_flight = {}
+
+    def launch():
+        server_url = remaining.pop(0)
+        print(f"[Market Search] Trying {server_url} with radius={radius}m, timeout={api_timeout}s")
+        in_flight[get_executor().submit(request_mirror, server_url, query, api_timeout + 5)] = server_url
+
+    while True:
+        if not in_flight:
+            if not remaining:
+                return None
+            launch()
+
+        if hedge_delay > 0:
+            wait_for = deadline - time.monotonic()
+            if wait_for <= 0:
+                print(f"[Market Search] No Overpass mirror answered within {api_timeout + 5}s")
+                return None
+            if remaining:
+                wait_for = min(wait_for, hedge_delay)
+        else:
+            # Sequential fallback: each mirror gets its own request timeout
+            wait_for = None
+
+        done, _ = wait(list(in_flight), timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            server_url = in_flight.pop(future)
+            try:
+                elements = future.result()
+            except requests.exceptions.Timeout:
+                print(f"[Market Search] Timeout from {server_url}, trying next server...")
+                continue
+            except OverpassError as e:
+                if e.status_code == 429:
+                    print(f"[Market Search] Rate limited by {server_url}, trying next server...")
+                else:
+                    print(f"[Market Search] Status {e.status_code} from {server_url}, trying next server...")
+                continue
+            except Exception as e:
+                print(f"[Market Search] Error from {server_url}: {e}")
+                continue
+
+            print(f"[Market Search] Found {len(elements)} elements from {server_url}")
+            return elements
+
+        # No answer within the hedge delay, or a mirror failed: bring in the next one
+        if remaining and hedge_delay > 0:
+            launch()
+
+
+def get_mirror_stats():
+    """
+    Report Overpass mirror health for monitoring.
+
+    Returns:
+        dict: Per mirror latency_ms, error_rate, requests, errors, in preference order
+    """
+    stats = mirror_health.snapshot()
+    return {
+        server_url: stats.get(server_url, {'latency_ms': None, 'error_rate': 0.0, 'requests': 0, 'errors': 0})
+        for server_url in mirror_health.ranked(settings.OVERPASS_SERVERS)
+    }
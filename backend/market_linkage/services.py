@@ -0,0 +1,316 @@
+"""
+Market search helpers.
+
+Turns OpenStreetMap data (Overpass payloads, or the local PointOfInterest
+index imported by import_osm_pois) into place results and ranks them by
+distance. Results are kept as a PlaceIndex: the place dicts plus parallel
+NumPy coordinate arrays, so ranking them for a new position is one
+vectorized haversine and an argpartition top-k selection instead of a
+Python loop and a full sort.
+"""
+
+import math
+import numpy as np
+from django.db.models import Q
+from securecrop import geohash
+from .models import PointOfInterest
+
+
+EARTH_RADIUS_KM = 6371
+
+# OSM shop types (and amenity=marketplace) that market search covers
+MARKET_SHOP_TYPES = ['supermarket', 'convenience', 'greengrocer', 'farm', 'garden_centre', 'hardware', 'wholesale']
+
+# PointOfInterest.geohash length (~5 m cells)
+POI_GEOHASH_PRECISION = 9
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Calculate distance between two points in km"""
+    lat1_rad = math.radians(float(lat1))
+    lat2_rad = math.radians(float(lat2))
+    delta_lat = math.radians(float(lat2) - float(lat1))
+    delta_lon = math.radians(float(lon2) - float(lon1))
+
+    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_distances(lat, lon, lats, lons):
+    """
+    Distances in km from one point to many.
+
+    Args:
+        lat: Origin latitude
+        lon: Origin longitude
+        lats: Array of latitudes (degrees)
+        lons: Array of longitudes (degrees)
+
+    Returns:
+        np.ndarray: Distance to each point in km
+    """
+    lat_rad = math.radians(float(lat))
+    lats_rad = np.radians(lats)
+    delta_lat = lats_rad - lat_rad
+    delta_lon = np.radians(lons) - math.radians(float(lon))
+
+    a = np.sin(delta_lat / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(delta_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def classify_place(tags):
+    """Classify a place as market, buyer, or agri_store based on OSM tags"""
+    shop = tags.get('shop', '')
+    amenity = tags.get('amenity', '')
+    building = tags.get('building', '')
+
+    # Markets
+    if shop in ['supermarket', 'convenience', 'greengrocer', 'farm', 'butcher', 'seafood']:
+        return 'market'
+    if amenity in ['marketplace', 'fast_food', 'cafe']:
+        return 'market'
+
+    # Agricultural Stores
+    if shop in ['garden_centre', 'agrarian', 'hardware', 'doityourself', 'trade']:
+        return 'agri_store'
+
+    # Buyers/Wholesale
+    if shop in ['wholesale']:
+        return 'buyer'
+    if building in ['warehouse', 'industrial']:
+        return 'buyer'
+
+    # Default based on name patterns
+    name = tags.get('name', '').lower()
+    if any(w in name for w in ['pasar', 'market', 'mart', 'kedai', 'store', 'shop']):
+        return 'market'
+    if any(w in name for w in ['tani', 'agro', 'pertanian', 'baja', 'benih', 'garden']):
+        return 'agri_store'
+    if any(w in name for w in ['borong', 'wholesale', 'warehouse']):
+        return 'buyer'
+
+    return 'market'  # Default
+
+
+def build_address(tags):
+    """Build a display address from OSM addr:* tags"""
+    address_parts = []
+    if tags.get('addr:street'):
+        if tags.get('addr:housenumber'):
+            address_parts.append(f"{tags.get('addr:housenumber')} {tags.get('addr:street')}")
+        else:
+            address_parts.append(tags.get('addr:street'))
+    if tags.get('addr:city'):
+        address_parts.append(tags.get('addr:city'))
+    if tags.get('addr:postcode'):
+        address_parts.append(tags.get('addr:postcode'))
+
+    return ', '.join(address_parts) if address_parts else tags.get('addr:full', '')
+
+
+def is_market_element(tags):
+    """True for OSM tags that the market search query selects"""
+    return tags.get('shop') in MARKET_SHOP_TYPES or tags.get('amenity') == 'marketplace'
+
+
+def parse_elements(elements):
+    """
+    Convert Overpass elements into place results.
+
+    Elements without a name or coordinates are skipped. Ways use their
+    'center' (the query asks for "out center").
+
+    Args:
+        elements: 'elements' list of an Overpass JSON response
+
+    Returns:
+        list: Place dicts (without distance_km)
+    """
+    places = []
+    for element in elements:
+        tags = element.get('tags', {})
+
+        # Get name - skip if no name
+        name = tags.get('name', tags.get('name:en', tags.get('name:ms', '')))
+        if not name:
+            continue
+
+        # Get coordinates
+        if element['type'] == 'node':
+            elem_lat = element.get('lat')
+            elem_lon = element.get('lon')
+        elif 'center' in element:
+            elem_lat = element['center'].get('lat')
+            elem_lon = element['center'].get('lon')
+        else:
+            continue
+
+        if not elem_lat or not elem_lon:
+            continue
+
+        places.append({
+            'id': f"osm_{element['type']}_{element['id']}",
+            'name': name,
+            'lat': elem_lat,
+            'lon': elem_lon,
+            'type': classify_place(tags),
+            'address': build_address(tags),
+            'phone': tags.get('phone', tags.get('contact:phone', '')),
+            'opening_hours': tags.get('opening_hours', ''),
+            'website': tags.get('website', tags.get('contact:website', '')),
+            'rating': None,
+            'source': 'openstreetmap'
+        })
+
+    return places
+
+
+class PlaceIndex:
+    """
+    Place results with parallel coordinate arrays for fast ranking.
+
+    Picklable, so it can be stored in Django's cache as is.
+
+    Args:
+        places: Place dicts with 'lat', 'lon' and 'type'
+    """
+
+    def __init__(self, places):
+        self.places = list(places)
+        self.lats = np.fromiter((place['lat'] for place in self.places), dtype=np.float64, count=len(self.places))
+        self.lons = np.fromiter((place['lon'] for place in self.places), dtype=np.float64, count=len(self.places))
+        self.types = np.array([place['type'] for place in self.places], dtype=object)
+
+    def __len__(self):
+        return len(self.places)
+
+    def nearest(self, lat, lon, limit=None, radius_km=None, place_type=None):
+        """
+        Rank places by distance from a position.
+
+        Only the `limit` nearest places are selected (argpartition, O(n))
+        and sorted, instead of sorting everything. The radius and type
+        filters apply before the limit.
+
+        Args:
+            lat: Latitude to measure from
+            lon: Longitude to measure from
+            limit: Max places to return (None for all)
+            radius_km: Drop places further than this (None keeps all)
+            place_type: Only keep places of this classify_place() type (None keeps all)
+
+        Returns:
+            list: Copies of the place dicts with distance_km, nearest first
+        """
+        distances = haversine_distances(lat, lon, self.lats, self.lons)
+
+        keep = np.ones(len(distances), dtype=bool)
+        if radius_km is not None:
+            keep &= distances <= radius_km
+        if place_type is not None:
+            keep &= self.types == place_type
+        candidates = np.flatnonzero(keep)
+
+        if limit is not None and limit < len(candidates):
+            if limit <= 0:
+                return []
+            candidates = candidates[np.argpartition(distances[candidates], limit - 1)[:limit]]
+
+        ordered = candidates[np.argsort(distances[candidates], kind='stable')]
+        return [
+            {**self.places[index], 'distance_km': round(float(distances[index]), 2)}
+            for index in ordered
+        ]
+
+
+def local_place_index(lat, lon, radius_km):
+    """
+    Load the imported places around a point from the PointOfInterest table.
+
+    Selects the rows in the geohash cells covering the search circle with
+    indexed string range queries, limited to the circle's bounding box; the
+    caller ranks and trims them to the circle (PlaceIndex.nearest with
+    radius_km).
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        radius_km: Search radius in km
+
+    Returns:
+        PlaceIndex: Places in the covering cells
+    """
+    cells = Q()
+    for prefix in geohash.covering_prefixes(lat, lon, radius_km):
+        # '~' sorts after every geohash character
+        cells |= Q(geohash__gte=prefix, geohash__lt=prefix + '~')
+
+    # Trim the cells' corners to the circle's bounding box in the database
+    lat_delta = radius_km / 111.32
+    lon_delta = radius_km / (111.32 * max(math.cos(math.radians(min(abs(float(lat)) + lat_delta, 89.9))), 1e-6))
+
+    # order_by(): PlaceIndex ranks by distance, so Meta.ordering's sort by name is wasted
+    rows = PointOfInterest.objects.filter(
+        cells,
+        latitude__range=(float(lat) - lat_delta, float(lat) + lat_delta),
+        longitude__range=(float(lon) - lon_delta, float(lon) + lon_delta)
+    ).order_by().values_list(
+        'osm_id', 'name', 'latitude', 'longitude', 'place_type',
+        'address', 'phone', 'opening_hours', 'website'
+    )
+    return PlaceIndex({
+        'id': osm_id,
+        'name': name,
+        'lat': poi_lat,
+        'lon': poi_lon,
+        'type': place_type,
+        'address': address,
+        'phone': phone,
+        'opening_hours': opening_hours,
+        'website': website,
+        'rating': None,
+        'source': 'openstreetmap'
+    } for osm_id, name, poi_lat, poi_lon, place_type, address, phone, opening_hours, website in rows)
+
+
+def upsert_pois(places, source='extract', batch_size=2000):
+    """
+    Insert or update places in the PointOfInterest table, keyed by OSM id.
+
+    Args:
+        places: Place dicts from parse_elements()
+        source: 'extract' or 'overpass'
+        batch_size: Rows per INSERT
+
+    Returns:
+        int: Number of places written
+    """
+    pois = [
+        PointOfInterest(
+            osm_id=place['id'],
+            name=place['name'][:200],
+            latitude=place['lat'],
+            longitude=place['lon'],
+            geohash=geohash.encode(place['lat'], place['lon'], POI_GEOHASH_PRECISION),
+            place_type=place['type'],
+            address=place['address'][:500],
+            phone=place['phone'][:50],
+            opening_hours=place['opening_hours'][:200],
+            website=place['website'][:500],
+            source=source
+        )
+        for place in places
+    ]
+    PointOfInterest.objects.bulk_create(
+        pois,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['osm_id'],
+        update_fields=[
+            'name', 'latitude', 'longitude', 'geohash', 'place_type', 'address',
+            'phone', 'opening_hours', 'website', 'source', 'updated_at'
+        ]
+    )
+    return len(pois)
@@ -0,0 +1,402 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from securecrop import geohash
+from .management.commands.benchmark_market_search import scalar_nearest, synthetic_overpass_payload
+from .area_cache import find_covering_area, refresh_backoff_key, search_places, store_area
+from .models import PointOfInterest
+from .overpass import mirror_health, query_overpass
+from .services import PlaceIndex, haversine_distance, haversine_distances, local_place_index, parse_elements
+from .views import SearchBuyersView
+
+
+KL = (3.1390, 101.6869)
+
+
+def _response(payload, status_code=200):
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = payload
+    return response
+
+
+def _overpass_session(payload=None):
+    """Patch the Overpass session; returns (patcher, the session's get mock)."""
+    session = mock.Mock()
+    session.get.return_value = _response(payload if payload is not None else {'elements': []})
+    return mock.patch('market_linkage.overpass.get_session', return_value=session), session.get
+
+
+class StandInOverpass:
+    """Local HTTP stand-in for an Overpass mirror with an injected delay and status."""
+
+    def __init__(self, payload, delay=0.0, status_code=200):
+        stand_in = self
+        self.payload = payload
+        self.delay = delay
+        self.status_code = status_code
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests += 1
+                time.sleep(stand_in.delay)
+                body = json.dumps(stand_in.payload).encode()
+                self.send_response(stand_in.status_code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/api/interpreter'
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PlaceIndexTest(TestCase):
+    """Test cases for vectorized distance ranking."""
+
+    def setUp(self):
+        self.payload = synthetic_overpass_payload(500, *KL, radius_km=20)
+        self.places = parse_elements(self.payload['elements'])
+
+    def test_vectorized_haversine_matches_scalar(self):
+        """The vectorized haversine agrees with the scalar version."""
+        lats = np.array([place['lat'] for place in self.places])
+        lons = np.array([place['lon'] for place in self.places])
+
+        distances = haversine_distances(*KL, lats, lons)
+
+        expected = [haversine_distance(*KL, place['lat'], place['lon']) for place in self.places]
+        np.testing.assert_allclose(distances, expected, rtol=1e-9, atol=1e-9)
+
+    def test_nearest_returns_top_k_in_order(self):
+        """nearest() returns the same leading results as a full sort."""
+        ranked = PlaceIndex(self.places).nearest(3.1400, 101.6900, limit=25)
+
+        expected = scalar_nearest(self.places, 3.1400, 101.6900)[:25]
+        self.assertEqual(len(ranked), 25)
+        self.assertEqual([place['distance_km'] for place in ranked], [place['distance_km'] for place in expected])
+        self.assertNotIn('distance_km', self.places[0])
+
+    def test_nearest_filters_by_radius(self):
+        """Places outside radius_km are dropped."""
+        ranked = PlaceIndex(self.places).nearest(*KL, radius_km=5)
+
+        self.assertTrue(ranked)
+        self.assertTrue(all(place['distance_km'] <= 5 for place in ranked))
+        self.assertEqual(PlaceIndex([]).nearest(*KL, limit=10), [])
+
+    def test_type_filter_applies_before_limit(self):
+        """The limit counts places of the requested type, not all places."""
+        ranked = PlaceIndex(self.places).nearest(*KL, limit=10, radius_km=15, place_type='buyer')
+
+        expected = [
+            place for place in scalar_nearest(self.places, *KL)
+            if place['type'] == 'buyer' and place['distance_km'] <= 15
+        ][:10]
+        self.assertEqual(len(ranked), 10)
+        self.assertEqual([place['id'] for place in ranked], [place['id'] for place in expected])
+
+
+class SearchAllViewTest(TestCase):
+    """Test cases for the market search endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        mirror_health.reset()
+        self.client = APIClient()
+        self.payload = synthetic_overpass_payload(300, *KL, radius_km=10)
+
+    def test_limit_and_cache_hit(self):
+        """Results are limited and nearest first; a repeat search is served from cache."""
+        patcher, upstream = _overpass_session(self.payload)
+        with patcher:
+            first = self.client.get(reverse('search-all'), {'lat': KL[0], 'lon': KL[1], 'radius': 10000, 'limit': 20})
+            second = self.client.get(reverse('search-all'), {'lat': 3.1410, 'lon': 101.6880, 'radius': 10000, 'limit': 30})
+
+        self.assertEqual(upstream.call_count, 1)
+        self.assertEqual(len(first.data), 20)
+        self.assertEqual(len(second.data), 30)
+        distances = [place['distance_km'] for place in second.data]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_smaller_radius_is_served_from_larger_cached_circle(self):
+        """Searches inside a cached circle reuse it; only larger or distant circles go upstream."""
+        payload = synthetic_overpass_payload(800, *KL, radius_km=35)
+        patcher, upstream = _overpass_session(payload)
+        with patcher:
+            self.client.get(reverse('search-all'), {'lat': KL[0], 'lon': KL[1], 'radius': 20000})
+            small = self.client.get(reverse('search-all'), {'lat': 3.1420, 'lon': 101.6840, 'radius': 5000, 'limit': 1000})
+            self.client.get(reverse('search-all'), {'lat': KL[0], 'lon': KL[1], 'radius': 10000})
+            self.assertEqual(upstream.call_count, 1)
+
+            self.client.get(reverse('search-all'), {'lat': KL[0], 'lon': KL[1], 'radius': 30000})
+            self.assertEqual(upstream.call_count, 2)
+            # Shrinking again is still a hit (the 30 km circle replaced the 20 km one)
+            self.client.get(reverse('search-all'), {'lat': KL[0], 'lon': KL[1], 'radius': 25000})
+            self.assertEqual(upstream.call_count, 2)
+
+            self.client.get(reverse('search-all'), {'lat': 5.4164, 'lon': 100.3327, 'radius': 5000})
+            self.assertEqual(upstream.call_count, 3)
+
+        # The 20 km circle was fetched around the snapped location, padded for the cell
+        query = upstream.call_args_list[0].kwargs['params']['data']
+        self.assertIn('around:20800,3.14,101.69', query)
+        # Results are trimmed to the requested circle
+        expected = PlaceIndex(parse_elements(payload['elements'])).nearest(3.1420, 101.6840, radius_km=5)
+        self.assertEqual([place['id'] for place in small.data], [place['id'] for place in expected])
+
+    def test_typed_search_is_not_truncated_by_other_types(self):
+        """Buyers beyond the nearest `limit` places of any type are still returned."""
+        patcher, _ = _overpass_session(self.payload)
+        request = APIRequestFactory().get('/', {'lat': KL[0], 'lon': KL[1], 'radius': 10000, 'limit': 20})
+        with patcher:
+            response = SearchBuyersView.as_view()(request)
+
+        expected = PlaceIndex(parse_elements(self.payload['elements'])).nearest(*KL, radius_km=10, place_type='buyer')[:20]
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual([place['id'] for place in response.data], [place['id'] for place in expected])
+
+    def test_invalid_limit(self):
+        """A non-integer limit is rejected."""
+        response = self.client.get(reverse('search-all'), {'limit': 'all'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class LocalPOIIndexTest(TestCase):
+    """Test cases for the imported OSM point-of-interest index."""
+
+    def setUp(self):
+        cache.clear()
+        mirror_health.reset()
+        self.client = APIClient()
+        self.path = os.path.join(tempfile.mkdtemp(), 'malaysia.json')
+        payload = synthetic_overpass_payload(400, *KL, radius_km=30)
+        payload['elements'].append({'type': 'node', 'id': 99999, 'lat': 3.14, 'lon': 101.69, 'tags': {'name': 'Klinik', 'amenity': 'clinic'}})
+        with open(self.path, 'w') as handle:
+            json.dump(payload, handle)
+
+    def test_import_stores_classified_places(self):
+        """The import keeps market elements only, with type, address and geohash."""
+        call_command('import_osm_pois', self.path, stdout=StringIO())
+        call_command('import_osm_pois', self.path, stdout=StringIO())
+
+        self.assertEqual(PointOfInterest.objects.count(), 400)
+        poi = PointOfInterest.objects.get(osm_id='osm_way_0')
+        self.assertEqual(poi.place_type, 'market')
+        self.assertEqual(poi.address, 'Jalan 0, Kuala Lumpur')
+        self.assertEqual(poi.geohash, geohash.encode(poi.latitude, poi.longitude, 9))
+
+    def test_search_is_served_locally(self):
+        """With an imported index, search returns exactly the places in the radius without Overpass."""
+        call_command('import_osm_pois', self.path, stdout=StringIO())
+        places = parse_elements(synthetic_overpass_payload(400, *KL, radius_km=30)['elements'])
+
+        patcher, upstream = _overpass_session()
+        with patcher:
+            response = self.client.get(reverse('search-all'), {'lat': 3.1500, 'lon': 101.7000, 'radius': 8000, 'limit': 1000})
+
+        upstream.assert_not_called()
+        expected = PlaceIndex(places).nearest(3.1500, 101.7000, radius_km=8)
+        self.assertEqual([place['id'] for place in response.data], [place['id'] for place in expected])
+
+    def test_local_query_is_unsorted(self):
+        """The POI query skips the model's default ordering; ranking happens in PlaceIndex."""
+        call_command('import_osm_pois', self.path, stdout=StringIO())
+
+        with CaptureQueriesContext(connection) as queries:
+            index = local_place_index(*KL, 5)
+
+        self.assertTrue(len(index))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('ORDER BY', queries[0]['sql'])
+
+    def test_empty_area_falls_back_to_overpass(self):
+        """Areas with no imported places still query Overpass in auto mode."""
+        payload = synthetic_overpass_payload(50, 5.4164, 100.3327, radius_km=5)
+        patcher, upstream = _overpass_session(payload)
+        with patcher:
+            response = self.client.get(reverse('search-all'), {'lat': 5.4164, 'lon': 100.3327, 'radius': 5000})
+
+        self.assertEqual(upstream.call_count, 1)
+        self.assertEqual(len(response.data), 50)
+
+
+class HedgedOverpassTest(TestCase):
+    """Test cases for hedged requests across Overpass mirrors."""
+
+    def setUp(self):
+        mirror_health.reset()
+        self.payload = synthetic_overpass_payload(20, *KL, radius_km=5)
+
+    def test_slow_primary_is_hedged(self):
+        """A mirror that does not answer within the hedge delay is raced by the next one."""
+        with StandInOverpass(self.payload, delay=3.0) as slow, StandInOverpass(self.payload) as fast:
+            with override_settings(OVERPASS_SERVERS=[slow.url, fast.url], OVERPASS_HEDGE_DELAY=0.1):
+                start = time.perf_counter()
+                elements = query_overpass(*KL, 5000)
+                seconds = time.perf_counter() - start
+
+        self.assertEqual(len(elements), 20)
+        self.assertLess(seconds, 1.5)
+        self.assertEqual((slow.requests, fast.requests), (1, 1))
+
+    def test_failing_mirror_is_skipped_and_demoted(self):
+        """An error launches the next mirror at once, and the failing mirror is tried last next time."""
+        with StandInOverpass({}, status_code=429) as limited, StandInOverpass(self.payload, delay=0.05) as healthy:
+            with override_settings(OVERPASS_SERVERS=[limited.url, healthy.url], OVERPASS_HEDGE_DELAY=5):
+                start = time.perf_counter()
+                elements = query_overpass(*KL, 5000)
+                seconds = time.perf_counter() - start
+                ranked = mirror_health.ranked([limited.url, healthy.url])
+
+                query_overpass(*KL, 5000)
+
+        self.assertEqual(len(elements), 20)
+        self.assertLess(seconds, 1.5)
+        self.assertEqual(ranked, [healthy.url, limited.url])
+        # The second query went straight to the healthy mirror
+        self.assertEqual((limited.requests, healthy.requests), (1, 2))
+
+    def test_sequential_mode_and_total_failure(self):
+        """With hedging off mirrors are tried one at a time; None when all fail."""
+        with StandInOverpass({}, status_code=504) as first, StandInOverpass({}, status_code=500) as second:
+            with override_settings(OVERPASS_SERVERS=[first.url, second.url], OVERPASS_HEDGE_DELAY=0):
+                self.assertIsNone(query_overpass(*KL, 5000))
+
+        self.assertEqual((first.requests, second.requests), (1, 1))
+        self.assertEqual(mirror_health.snapshot()[first.url]['errors'], 1)
+
+
+class MarketCacheSingleFlightTest(TestCase):
+    """Test cases for single-flight fetches and stale-while-revalidate."""
+
+    def setUp(self):
+        cache.clear()
+        self.elements = synthetic_overpass_payload(100, *KL, radius_km=10)['elements']
+
+    def _concurrent_searches(self, count, radius_km=10):
+        results = [None] * count
+
+        def search(slot):
+            results[slot] = search_places(*KL, radius_km)
+
+        threads = [threading.Thread(target=search, args=(slot,)) for slot in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_misses_query_upstream_once(self):
+        """Requests missing the same area wait for one Overpass query."""
+        def slow_query(*args):
+            time.sleep(0.3)
+            return self.elements
+
+        with mock.patch('market_linkage.area_cache.query_overpass', side_effect=slow_query) as upstream:
+            results = self._concurrent_searches(8)
+
+        self.assertEqual(upstream.call_count, 1)
+        self.assertEqual([len(index) for index in results], [100] * 8)
+
+    def test_failed_fetch_is_not_repeated_by_waiters(self):
+        """When the single fetch fails, waiting requests get an empty result instead of retrying."""
+        def failing_query(*args):
+            time.sleep(0.3)
+            return None
+
+        with mock.patch('market_linkage.area_cache.query_overpass', side_effect=failing_query) as upstream:
+            results = self._concurrent_searches(5)
+
+        self.assertEqual(upstream.call_count, 1)
+        self.assertEqual([len(index) for index in results], [0] * 5)
+
+    @override_settings(MARKET_CACHE_SOFT_TIMEOUT=0)
+    def test_stale_area_is_served_and_refreshed_once(self):
+        """A stale circle is returned at once while a single background refresh runs."""
+        with mock.patch('market_linkage.area_cache.query_overpass', return_value=self.elements) as upstream, \
+                mock.patch('market_linkage.area_cache.submit') as submit:
+            first = search_places(*KL, 10)
+            stale_at = find_covering_area(*KL, 10)['fetched_at']
+
+            second = search_places(*KL, 10)
+            third = search_places(*KL, 5)
+            self.assertEqual((len(first), len(second), len(third)), (100, 100, 100))
+            self.assertEqual(upstream.call_count, 1)
+            self.assertEqual(submit.call_count, 1)
+
+            refresh, *args = submit.call_args.args
+            refresh(*args)
+
+        self.assertEqual(upstream.call_count, 2)
+        self.assertEqual(upstream.call_args.args, (3.14, 101.69, 10800))
+        self.assertGreater(find_covering_area(*KL, 10)['fetched_at'], stale_at)
+        # The refresh released the lock, so the next stale hit refreshes again
+        with mock.patch('market_linkage.area_cache.submit') as submit:
+            search_places(*KL, 10)
+        self.assertEqual(submit.call_count, 1)
+
+    @override_settings(MARKET_CACHE_SOFT_TIMEOUT=0)
+    def test_failed_refresh_backs_off(self):
+        """A failed refresh keeps serving the stale circle without re-querying upstream on every request."""
+        with mock.patch('market_linkage.area_cache.query_overpass', return_value=self.elements) as upstream, \
+                mock.patch('market_linkage.area_cache.submit') as submit:
+            search_places(*KL, 10)
+            search_places(*KL, 10)
+            refresh, *args = submit.call_args.args
+
+            upstream.return_value = None
+            refresh(*args)
+            self.assertEqual(upstream.call_count, 2)
+
+            for _ in range(5):
+                self.assertEqual(len(search_places(*KL, 10)), 100)
+            self.assertEqual(submit.call_count, 1)
+
+            # Once the backoff expires the next stale hit refreshes again
+            cache.delete(refresh_backoff_key(3.14, 101.69))
+            search_places(*KL, 10)
+            self.assertEqual(submit.call_count, 2)
+
+    def test_lookup_loads_only_the_chosen_index(self):
+        """Covering circles are chosen from their metadata; only the smallest one's index is read."""
+        small = PlaceIndex(parse_elements(self.elements[:10]))
+        store_area(3.14, 101.69, 12, small)
+        store_area(3.15, 101.69, 30, PlaceIndex(parse_elements(self.elements)))
+        self.assertFalse(store_area(3.15, 101.69, 20, small))
+
+        with mock.patch.object(cache, 'get', wraps=cache.get) as get, \
+                mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            area = find_covering_area(*KL, 10)
+
+        self.assertEqual((area['radius_km'], len(area['index'])), (12, 10))
+        self.assertEqual(get_many.call_count, 1)
+        self.assertFalse(any(key.endswith(':index') for key in get_many.call_args.args[0]))
+        index_reads = [call.args[0] for call in get.call_args_list if call.args[0].endswith(':index')]
+        self.assertEqual(index_reads, ['market:area:3.14:101.69:index'])
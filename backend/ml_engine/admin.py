@@ -6,8 +6,19 @@ from .models import ModelRegistry
 class ModelRegistryAdmin(admin.ModelAdmin):
     """Admin configuration for ModelRegistry model."""
     
-    list_display = ('id', 'model_name', 'version', 'accuracy', 'created_at')
-    list_filter = ('model_name', 'created_at')
+    list_display = ('id', 'model_name', 'version', 'accuracy', 'is_active', 'activated_at', 'created_at')
+    list_filter = ('model_name', 'is_active', 'created_at')
     search_fields = ('model_name', 'version')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'activated_at')
     ordering = ('-created_at',)
+    actions = ['activate_version']
+    
+    @admin.action(description='Activate selected model version (hot reload)')
+    def activate_version(self, request, queryset):
+        versions = set(queryset.values_list('version', flat=True))
+        if len(versions) != 1:
+            self.message_user(request, 'Select rows from exactly one version.', level='error')
+            return
+        version = versions.pop()
+        ModelRegistry.activate_version(version)
+        self.message_user(request, f'Model version {version} activated. Workers will switch on their next check.')
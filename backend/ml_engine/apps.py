@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class MlEngineConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ml_engine'
+    
+    def ready(self):
+        """Warm the model bundle so the first request does not pay the load cost (server only, see ML_PRELOAD_MODELS)."""
+        if not settings.ML_PRELOAD_MODELS:
+            return
+        
+        from .services import get_model_bundle
+        
+        try:
+            bundle = get_model_bundle()
+        except Exception as e:
+            print(f"[ML Engine] Model preload failed: {e}")
+            return
+        
+        if bundle.is_loaded:
+            print(f"[ML Engine] Model bundle loaded in {bundle.load_seconds:.2f}s")
@@ -0,0 +1,242 @@
+"""
+Flat-array Random Forest engine, shared across worker processes.
+
+sklearn's Tree objects copy their node arrays into private buffers when
+they are unpickled, so loading a pickled RandomForest with
+joblib.load(mmap_mode='r') still gives every gunicorn worker its own copy
+of the forest. This module exports the fitted trees into a few contiguous
+NumPy arrays instead. Saved uncompressed with joblib, they are mapped
+read-only at load time and all workers share one physical copy through
+the page cache.
+
+This module provides:
+1. Export of a fitted RandomForestClassifier into flat node arrays
+2. Saving/mapping those arrays with joblib (mmap_mode='r')
+3. FlatForest, a predict_proba-compatible evaluator over the arrays,
+   with Saabas-style per-feature contributions from the same traversal
+
+The same engine is used for fast single-row inference; see
+ML_FOREST_ENGINE in settings.
+"""
+
+import numpy as np
+import joblib
+
+
+# File written next to the other artifacts by train_model.save_models()
+FOREST_ARRAYS_FILENAME = 'rf_forest_arrays.joblib'
+
+# Bumped whenever the exported array layout changes
+FOREST_ARRAYS_FORMAT = 2
+
+# sklearn marks leaves with -1 in children_left/children_right
+TREE_LEAF = -1
+
+
+def export_forest_arrays(model):
+    """
+    Convert a fitted RandomForestClassifier into contiguous node arrays.
+
+    All trees are concatenated and node indices are global; `roots` holds
+    the index of each tree's root node. Children are packed as
+    children[2 * node + go_right], and leaves point back to themselves so
+    every tree can be walked for a fixed `max_depth` steps without checking
+    which rows have already reached a leaf. Leaf values are stored as
+    normalized class probabilities, exactly as
+    DecisionTreeClassifier.predict_proba computes them.
+
+    Args:
+        model: Fitted RandomForestClassifier
+
+    Returns:
+        dict: format, feature, threshold, children, value, roots,
+              max_depth, classes, n_features
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+
+    features = []
+    children = []
+    values = []
+    for tree, offset in zip(trees, offsets):
+        nodes = np.arange(tree.node_count) + offset
+        is_leaf = tree.children_left == TREE_LEAF
+
+        # Leaves loop back to themselves; their feature is never used to branch
+        features.append(np.where(is_leaf, 0, tree.feature))
+        children.append(np.column_stack([
+            np.where(is_leaf, nodes, tree.children_left + offset),
+            np.where(is_leaf, nodes, tree.children_right + offset),
+        ]))
+
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        proba = tree.value[:, 0, :model.n_classes_]
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(proba / normalizer)
+
+    return {
+        'format': FOREST_ARRAYS_FORMAT,
+        'feature': np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+        'threshold': np.ascontiguousarray(np.concatenate([tree.threshold for tree in trees]), dtype=np.float64),
+        'children': np.ascontiguousarray(np.concatenate(children).ravel(), dtype=np.intp),
+        'value': np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        'roots': np.asarray(offsets, dtype=np.intp),
+        'max_depth': max(int(tree.max_depth) for tree in trees),
+        'classes': np.asarray(model.classes_),
+        'n_features': int(model.n_features_in_),
+    }
+
+
+def save_forest_arrays(model, path):
+    """
+    Export a forest and write it uncompressed so it can be memory-mapped.
+
+    Args:
+        model: Fitted RandomForestClassifier
+        path: Destination file (usually MODELS_DIR / FOREST_ARRAYS_FILENAME)
+    """
+    joblib.dump(export_forest_arrays(model), path)
+
+
+def load_forest_arrays(path):
+    """
+    Map a saved forest read-only.
+
+    Args:
+        path: File written by save_forest_arrays()
+
+    Returns:
+        FlatForest backed by read-only np.memmap arrays
+
+    Raises:
+        ValueError: If the file was written with a different array layout
+    """
+    arrays = joblib.load(path, mmap_mode='r')
+    if arrays.get('format') != FOREST_ARRAYS_FORMAT:
+        raise ValueError(
+            f"forest arrays format {arrays.get('format')} != {FOREST_ARRAYS_FORMAT}; "
+            f"re-run train_model.py to export them again"
+        )
+    return FlatForest(arrays)
+
+
+class FlatForest:
+    """
+    Evaluate a Random Forest from flat node arrays.
+
+    Exposes the subset of the sklearn classifier API used for inference
+    (classes_, n_classes_, n_features_in_, predict_proba, predict), so it
+    can stand in for the RandomForestClassifier in the prediction services.
+    All trees and rows are walked together with NumPy, which avoids the
+    per-call validation, joblib dispatch and per-tree Python loop of
+    RandomForestClassifier.predict_proba on small inputs.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        self.classes_ = np.asarray(arrays['classes'])
+        self.n_classes_ = len(self.classes_)
+        self.n_features_in_ = int(arrays['n_features'])
+        self.n_estimators = len(self.roots)
+
+    @classmethod
+    def from_model(cls, model):
+        """Build an in-memory FlatForest from a fitted RandomForestClassifier."""
+        return cls(export_forest_arrays(model))
+
+    def _walk(self, X):
+        """
+        Yield the node reached in every tree after each traversal step.
+
+        Starts at the roots and advances max_depth times; rows that reached
+        a leaf stay on it.
+        """
+        # sklearn evaluates trees on float32 input
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, expected (n_rows, {self.n_features_in_})"
+            )
+
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators))
+        yield nodes
+
+        for _ in range(self.max_depth):
+            go_right = ~(flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self.children[2 * nodes + go_right]
+            yield nodes
+
+    def apply(self, X):
+        """
+        Return the leaf node index reached in every tree.
+
+        Args:
+            X: Array of shape (n_rows, n_features)
+
+        Returns:
+            numpy.ndarray: Global node indices of shape (n_rows, n_trees)
+        """
+        for nodes in self._walk(X):
+            pass
+        return nodes
+
+    def predict_proba(self, X):
+        """Average the leaf class probabilities of all trees."""
+        leaves = self.apply(X)
+        return self.value[leaves].sum(axis=1) / self.n_estimators
+
+    def predict_proba_with_contributions(self, X, class_indices=None):
+        """
+        Predict and decompose each row's probability into feature contributions.
+
+        Saabas-style decomposition computed during the same traversal as
+        the prediction: every split moves the class probability from the
+        parent node's value to the child's, and that change is credited to
+        the split feature. For each row,
+        bias + contributions.sum() == probabilities[class_index].
+
+        Args:
+            X: Array of shape (n_rows, n_features)
+            class_indices: Class index to decompose per row (defaults to the
+                           predicted class)
+
+        Returns:
+            tuple: (probabilities, contributions, bias)
+                - probabilities: Shape (n_rows, n_classes), as predict_proba()
+                - contributions: Shape (n_rows, n_features)
+                - bias: Shape (n_rows,), mean root value of the class
+        """
+        path = list(self._walk(X))
+        n_rows = path[0].shape[0]
+        probabilities = self.value[path[-1]].sum(axis=1) / self.n_estimators
+
+        if class_indices is None:
+            class_indices = np.argmax(probabilities, axis=1)
+        classes = np.asarray(class_indices, dtype=np.intp).reshape(n_rows, 1)
+
+        # Only the explained class column of the node values is read
+        row_offsets = (np.arange(n_rows) * self.n_features_in_)[:, np.newaxis]
+        contributions = np.zeros(n_rows * self.n_features_in_)
+        for parent, child in zip(path[:-1], path[1:]):
+            delta = self.value[child, classes] - self.value[parent, classes]
+            contributions += np.bincount(
+                (row_offsets + self.feature[parent]).ravel(),
+                weights=delta.ravel(),
+                minlength=contributions.size
+            )
+
+        bias = self.value[path[0], classes].sum(axis=1) / self.n_estimators
+        contributions = contributions.reshape(n_rows, self.n_features_in_) / self.n_estimators
+        return probabilities, contributions, bias
+
+    def predict(self, X):
+        """Return the class with the highest averaged probability."""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,117 @@
+"""
+Benchmark per-request crop prediction latency.
+
+Compares the original two-pass dual prediction (predict + predict_proba
+on each model) with the current single-pass predict_crop_dual(), and
+reports the per-row cost of predict_crop_batch().
+
+Usage:
+    python manage.py benchmark_inference --requests 200 --batch-size 1000
+"""
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from soil.models import SoilInput
+from ml_engine.services import (
+    load_model,
+    load_nb_model,
+    load_scaler,
+    load_label_encoder,
+    predict_crop_dual,
+    predict_crop_batch,
+)
+
+
+def two_pass_predict_crop_dual(soil_input):
+    """Reference implementation of the original dual prediction (two passes per model)."""
+    rf_model = load_model()
+    nb_model = load_nb_model()
+    scaler = load_scaler()
+    label_encoder = load_label_encoder()
+    
+    features_scaled = scaler.transform(np.array(soil_input.to_feature_array()).reshape(1, -1))
+    
+    rf_pred_encoded = rf_model.predict(features_scaled)[0]
+    rf_crop = label_encoder.inverse_transform([rf_pred_encoded])[0]
+    rf_proba = float(np.max(rf_model.predict_proba(features_scaled)[0]))
+    
+    nb_pred_encoded = nb_model.predict(features_scaled)[0]
+    nb_crop = label_encoder.inverse_transform([nb_pred_encoded])[0]
+    nb_proba = float(np.max(nb_model.predict_proba(features_scaled)[0]))
+    
+    return rf_crop, rf_proba, nb_crop, nb_proba
+
+
+def random_soil_inputs(count, seed=42):
+    """Generate unsaved SoilInput instances with realistic parameter ranges."""
+    rng = np.random.default_rng(seed)
+    return [
+        SoilInput(
+            N_level=rng.uniform(0, 140),
+            P_level=rng.uniform(5, 145),
+            K_level=rng.uniform(5, 205),
+            ph=rng.uniform(3.5, 9.9),
+            moisture=rng.uniform(14, 99),
+            temperature=rng.uniform(9, 43),
+        )
+        for _ in range(count)
+    ]
+
+
+def time_per_call(func, items):
+    """Run func over items and return per-call latencies in milliseconds."""
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark single-request and batch crop prediction latency'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Number of single requests to time')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows in the batch benchmark')
+    
+    def handle(self, *args, **options):
+        soil_inputs = random_soil_inputs(options['requests'])
+        
+        # Warm model caches so load time is not counted
+        predict_crop_dual(soil_inputs[0])
+        
+        # Both implementations must agree on every label
+        for soil_input in soil_inputs:
+            rf_crop, _, nb_crop, _ = two_pass_predict_crop_dual(soil_input)
+            result = predict_crop_dual(soil_input)
+            if (rf_crop, nb_crop) != (result['rf_prediction'], result['nb_prediction']):
+                self.stderr.write(self.style.ERROR(f"Prediction mismatch for {soil_input.to_feature_array()}"))
+                return
+        
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"Per-request latency over {len(soil_inputs)} requests (ms)")
+        self.stdout.write("=" * 60)
+        
+        results = {
+            'two-pass (before)': time_per_call(two_pass_predict_crop_dual, soil_inputs),
+            'single-pass (after)': time_per_call(predict_crop_dual, soil_inputs),
+        }
+        for name, timings in results.items():
+            self.stdout.write(
+                f"{name:<22} mean={timings.mean():7.2f}  "
+                f"p50={np.percentile(timings, 50):7.2f}  p95={np.percentile(timings, 95):7.2f}"
+            )
+        
+        speedup = results['two-pass (before)'].mean() / results['single-pass (after)'].mean()
+        self.stdout.write(self.style.SUCCESS(f"Single-pass speedup: {speedup:.2f}x"))
+        
+        # Batch path
+        batch = random_soil_inputs(options['batch_size'], seed=7)
+        start = time.perf_counter()
+        predict_crop_batch(batch)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"predict_crop_batch: {len(batch)} rows in {elapsed_ms:.1f} ms "
+            f"({elapsed_ms / len(batch):.3f} ms/row)"
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-16 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_engine', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelregistry',
+            name='is_active',
+            field=models.BooleanField(default=False, help_text='Version currently served by inference workers'),
+        ),
+        migrations.AddField(
+            model_name='modelregistry',
+            name='activated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,8 @@
 """
 Model registry for tracking ML model versions and performance.
 """
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class ModelRegistry(models.Model):
@@ -13,6 +14,8 @@ class ModelRegistry(models.Model):
     - version: Version identifier
     - accuracy: Model accuracy score
     - file_path: Path to saved model file
+    - is_active: Whether this version is served by the inference workers
+    - activated_at: When this version was last activated
     - created_at: When the model was trained
     """
     
@@ -20,6 +23,8 @@ class ModelRegistry(models.Model):
     version = models.CharField(max_length=50, help_text='Model version')
     accuracy = models.FloatField(help_text='Model accuracy score')
     file_path = models.CharField(max_length=500, help_text='Path to saved model file')
+    is_active = models.BooleanField(default=False, help_text='Version currently served by inference workers')
+    activated_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -30,3 +35,19 @@ class ModelRegistry(models.Model):
     
     def __str__(self):
         return f"{self.model_name} v{self.version} - Accuracy: {self.accuracy:.4f}"
+    
+    @classmethod
+    def activate_version(cls, version):
+        """
+        Mark every row of the given version as active and all others inactive.
+        
+        Running workers notice the change on their next version check and
+        hot-swap to the new artifacts without a restart.
+        
+        Returns:
+            int: Number of rows activated
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            cls.objects.exclude(version=version).filter(is_active=True).update(is_active=False)
+            return cls.objects.filter(version=version).update(is_active=True, activated_at=now)
@@ -0,0 +1,119 @@
+"""
+Prediction result cache keyed by the soil integrity hash.
+
+cyber_layer.services.compute_integrity_hash() gives a canonical SHA-256 of
+the six rounded soil values, so repeated submissions of the same reading
+share one cache entry and skip both classifiers and SHAP. Entries live in
+Django's cache backend (LRU-evicted LocMemCache by default, see CACHES in
+settings) and expire after PREDICTION_CACHE_TIMEOUT seconds.
+
+Keys include the model version and a cache generation that is bumped on
+every model swap, so results from a replaced model are never served.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+PREDICTION_CACHE_PREFIX = 'ml_prediction'
+GENERATION_KEY = f'{PREDICTION_CACHE_PREFIX}:generation'
+HITS_KEY = f'{PREDICTION_CACHE_PREFIX}:hits'
+MISSES_KEY = f'{PREDICTION_CACHE_PREFIX}:misses'
+
+
+def _increment(key):
+    """Increment a shared counter, creating it if missing or evicted."""
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_cache_generation():
+    """Current cache generation (bumped by invalidate_prediction_cache)."""
+    cache.add(GENERATION_KEY, 0, timeout=None)
+    return cache.get(GENERATION_KEY, 0)
+
+
+def prediction_cache_key(integrity_hash, model_version):
+    """
+    Build the cache key for one soil reading and model version.
+
+    Args:
+        integrity_hash: SHA-256 from compute_integrity_hash()
+        model_version: ModelRegistry version, or None for the default models
+
+    Returns:
+        str: Cache key
+    """
+    return (
+        f"{PREDICTION_CACHE_PREFIX}:{get_cache_generation()}:"
+        f"{model_version or 'default'}:{integrity_hash}"
+    )
+
+
+def get_cached_prediction(integrity_hash, model_version):
+    """
+    Look up a cached prediction and count the hit or miss.
+
+    Args:
+        integrity_hash: SHA-256 from compute_integrity_hash()
+        model_version: ModelRegistry version, or None for the default models
+
+    Returns:
+        dict: Cached result, or None on a miss or when caching is disabled
+    """
+    if not settings.PREDICTION_CACHE_ENABLED or not integrity_hash:
+        return None
+
+    result = cache.get(prediction_cache_key(integrity_hash, model_version))
+    _increment(HITS_KEY if result is not None else MISSES_KEY)
+    return result
+
+
+def cache_prediction(integrity_hash, model_version, result):
+    """
+    Store a prediction result.
+
+    Args:
+        integrity_hash: SHA-256 from compute_integrity_hash()
+        model_version: ModelRegistry version, or None for the default models
+        result: dict with crop_name, probability and explanation
+    """
+    if not settings.PREDICTION_CACHE_ENABLED or not integrity_hash:
+        return
+
+    cache.set(
+        prediction_cache_key(integrity_hash, model_version),
+        result,
+        timeout=settings.PREDICTION_CACHE_TIMEOUT
+    )
+
+
+def invalidate_prediction_cache():
+    """Drop all cached predictions and anomaly verdicts by moving to a new cache generation."""
+    get_cache_generation()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+def get_prediction_cache_stats():
+    """
+    Report prediction cache hit/miss counters.
+
+    Returns:
+        dict: hits, misses, hit_rate and the current generation
+    """
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'enabled': settings.PREDICTION_CACHE_ENABLED,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else None,
+        'generation': cache.get(GENERATION_KEY, 0),
+    }
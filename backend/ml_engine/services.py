@@ -2,24 +2,26 @@
 ML model inference services for crop prediction.
 
 This module provides:
-1. Model loading with caching (both RF and NB models)
+1. Thread-safe model bundle loading (RF, NB, scaler, label encoder)
+   with hot reload of ModelRegistry versions
 2. Dual-model crop prediction from soil input
 3. Probability/confidence scoring
 4. Model agreement detection
+5. Vectorized batch prediction for bulk sensor uploads
 """
 
 import os
+import time
+import threading
+from contextlib import contextmanager
 import numpy as np
 import joblib
 from pathlib import Path
+from django.conf import settings
+from .forest import FOREST_ARRAYS_FILENAME, FlatForest, load_forest_arrays
+from .prediction_cache import invalidate_prediction_cache
 
 
-# Cache for loaded models and components
-_rf_model_cache = None
-_nb_model_cache = None
-_scaler_cache = None
-_label_encoder_cache = None
-
 # Base directories
 BASE_DIR = Path(__file__).resolve().parent
 MODELS_DIR = BASE_DIR / 'models'
@@ -27,129 +29,526 @@ MODELS_DIR = BASE_DIR / 'models'
 # Feature names (must match training)
 FEATURE_NAMES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph']
 
+# Soil fields behind each model input column: SoilInput.to_feature_array()
+# order, which is what the models receive at inference time
+INPUT_FEATURE_NAMES = ['N', 'P', 'K', 'ph', 'moisture', 'temperature']
 
-def load_model():
+# Number of alternative crops returned alongside the primary recommendation
+TOP_K_ALTERNATIVES = 3
+
+# Artifact file and display name reported when a bundle component is missing
+ARTIFACT_FILES = {
+    'rf_estimator': ('best_model.joblib', 'Trained model'),
+    'rf_model': ('best_model.joblib', 'Trained model'),
+    'nb_model': ('nb_pipeline.joblib', 'Naive Bayes model'),
+    'scaler': ('scaler.joblib', 'Scaler'),
+    'label_encoder': ('label_encoder.joblib', 'Label encoder'),
+}
+
+# Attempts (and the pause between them) to pin the active bundle during a swap
+MODEL_ACQUIRE_ATTEMPTS = 20
+MODEL_ACQUIRE_RETRY_DELAY = 0.01
+
+# Active model slot. Swapped atomically under the lock when a new version is warm.
+_model_bundle = None
+_model_bundle_lock = threading.Lock()
+
+# Version currently being loaded in the background (None when idle)
+_pending_version = None
+
+# Monotonic time of the last ModelRegistry active-version check
+_last_version_check = 0.0
+
+
+class ModelVersionMismatch(Exception):
+    """A prediction from one model version was used with a different active bundle."""
+
+
+class ModelBundle:
+    """
+    All inference artifacts (RF, NB, scaler, label encoder) for one model version.
+    
+    Each artifact file is deserialized at most once per load, so the
+    rf_pipeline.joblib fallbacks for the scaler and label encoder reuse the
+    same object instead of reading the pipeline again.
+    
+    When rf_forest_arrays.joblib is present the Random Forest is served from
+    flat arrays mapped read-only (see ml_engine.forest), so all workers share
+    one physical copy; the pickled sklearn forest is then only read on first
+    access of rf_model, i.e. for exact SHAP explanations (EXPLANATION_MODE
+    'exact' or 'auto') or large batches with ML_FOREST_ENGINE 'auto', and
+    that copy is private to each worker. Without that file the
+    flat forest is compiled in memory from the sklearn model, unless
+    ML_FOREST_ENGINE is 'sklearn'.
+    
+    Requests pin a bundle with use_model_bundle(); a replaced bundle is
+    retired only after its pinned (in-flight) requests have finished.
+    
+    Attributes:
+        version: ModelRegistry version, or None for the default models directory
+        rf_forest: FlatForest, memory-mapped when exported (or None)
+        rf_model: sklearn Random Forest classifier (or None if missing)
+        nb_model: Gaussian Naive Bayes classifier (or None if missing)
+        scaler: Fitted StandardScaler (or None if missing)
+        label_encoder: Fitted LabelEncoder (or None if missing)
+        load_seconds: Wall-clock time spent loading all artifacts
     """
-    Load the primary ML model (Random Forest) from disk with caching.
     
-    Returns:
-        Trained scikit-learn RandomForest model
+    def __init__(self, models_dir=None, version=None):
+        self.models_dir = Path(models_dir) if models_dir else MODELS_DIR
+        self.version = version
+        self.rf_forest = None
+        self._rf_model = None
+        self._rf_model_lock = threading.Lock()
+        self.nb_model = None
+        self.scaler = None
+        self.label_encoder = None
+        self.load_seconds = None
+        self.loaded_at = None
+        self._in_flight = 0
+        self._retired = False
+        self._drained = threading.Condition()
+    
+    def load(self):
+        """Load every available artifact from models_dir and record the load time."""
+        start = time.perf_counter()
+        artifacts = {}
+        
+        def artifact(filename):
+            if filename not in artifacts:
+                path = self.models_dir / filename
+                artifacts[filename] = joblib.load(path) if path.exists() else None
+            return artifacts[filename]
+        
+        # Random Forest: mapped flat arrays when exported at training time
+        use_flat_engine = settings.ML_FOREST_ENGINE != 'sklearn'
+        forest_path = self.models_dir / FOREST_ARRAYS_FILENAME
+        if use_flat_engine and forest_path.exists():
+            try:
+                self.rf_forest = load_forest_arrays(forest_path)
+            except ValueError as e:
+                print(f"[ML Engine] Ignoring {forest_path.name}: {e}")
+        
+        nb_pipeline = artifact('nb_pipeline.joblib')
+        if nb_pipeline is not None:
+            self.nb_model = nb_pipeline['model']
+        
+        # Scaler and encoder: standalone files first, then the RF pipeline
+        self.scaler = artifact('scaler.joblib')
+        self.label_encoder = artifact('label_encoder.joblib')
+        
+        if self.rf_forest is None or self.scaler is None or self.label_encoder is None:
+            rf_pipeline = artifact('rf_pipeline.joblib')
+            
+            # Random Forest: pipeline first, then best_model.joblib
+            if rf_pipeline is not None:
+                self._rf_model = rf_pipeline['model']
+            else:
+                self._rf_model = artifact('best_model.joblib')
+            
+            if self.scaler is None and rf_pipeline is not None:
+                self.scaler = rf_pipeline['scaler']
+            
+            if self.label_encoder is None and rf_pipeline is not None:
+                self.label_encoder = rf_pipeline['label_encoder']
+        
+        # No usable exported arrays: compile the flat forest in memory
+        if use_flat_engine and self.rf_forest is None and self._rf_model is not None:
+            self.rf_forest = FlatForest.from_model(self._rf_model)
+        
+        self.load_seconds = time.perf_counter() - start
+        self.loaded_at = time.time()
+        return self
+    
+    @property
+    def rf_model(self):
+        """The sklearn Random Forest, read from disk on first use if only the mapped forest was loaded."""
+        if self._rf_model is None and self.rf_forest is not None and not self._retired:
+            with self._rf_model_lock:
+                if self._rf_model is None:
+                    rf_pipeline_path = self.models_dir / 'rf_pipeline.joblib'
+                    best_model_path = self.models_dir / 'best_model.joblib'
+                    if rf_pipeline_path.exists():
+                        self._rf_model = joblib.load(rf_pipeline_path)['model']
+                    elif best_model_path.exists():
+                        self._rf_model = joblib.load(best_model_path)
+        return self._rf_model
+    
+    @rf_model.setter
+    def rf_model(self, model):
+        self._rf_model = model
+    
+    @property
+    def rf_estimator(self):
+        """Random Forest used for predictions: the flat forest if present, else sklearn."""
+        if self.rf_forest is not None:
+            return self.rf_forest
+        return self._rf_model
+    
+    def rf_estimator_for(self, n_rows):
+        """
+        Pick the Random Forest engine for a prediction over n_rows.
+        
+        The flat engine avoids sklearn's fixed per-call overhead, which
+        dominates small inputs. With ML_FOREST_ENGINE = 'auto', inputs larger
+        than ML_FOREST_FLAT_MAX_ROWS go to sklearn's compiled per-tree
+        traversal instead, which is faster on large batches but loads the
+        pickled forest into each worker (the default 'flat' never does).
+        
+        Args:
+            n_rows: Number of rows in the feature matrix
+            
+        Returns:
+            FlatForest or RandomForestClassifier
+        """
+        if (
+            settings.ML_FOREST_ENGINE == 'auto'
+            and self.rf_forest is not None
+            and n_rows > settings.ML_FOREST_FLAT_MAX_ROWS
+            and self.rf_model is not None
+        ):
+            return self.rf_model
+        return self.require('rf_estimator')
+    
+    def warm(self):
+        """Run one prediction through each model so first requests hit warm code paths."""
+        if self.scaler is None:
+            return self
+        
+        sample = self.scaler.transform(np.zeros((1, self.scaler.n_features_in_)))
+        for model in (self.rf_estimator, self.nb_model):
+            if model is not None:
+                model.predict_proba(sample)
+        return self
+    
+    @property
+    def is_loaded(self):
+        """True if at least the primary model was found."""
+        return self.rf_forest is not None or self._rf_model is not None
+    
+    def require(self, name):
+        """
+        Return a loaded component or raise FileNotFoundError naming its file.
+        
+        Args:
+            name: One of 'rf_model', 'nb_model', 'scaler', 'label_encoder'
+        """
+        component = getattr(self, name)
+        
+        if component is None:
+            filename, label = ARTIFACT_FILES[name]
+            raise FileNotFoundError(
+                f"{label} not found at {self.models_dir / filename}. "
+                "Please run 'python ml_engine/train_model.py' first."
+            )
+        
+        return component
+    
+    def acquire(self):
+        """Pin the bundle for a request. Returns False if it has been retired."""
+        with self._drained:
+            if self._retired:
+                return False
+            self._in_flight += 1
+            return True
+    
+    def release(self):
+        """Unpin the bundle after a request."""
+        with self._drained:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._drained.notify_all()
+    
+    def retire(self, timeout=None):
+        """
+        Stop accepting new requests, wait for in-flight ones, then drop the models.
+        
+        If requests are still running at the timeout the models are left in
+        place for them; they are freed with the bundle once it is unreferenced.
+        
+        Args:
+            timeout: Maximum seconds to wait for in-flight requests
+            
+        Returns:
+            bool: True if all in-flight requests drained before the timeout
+        """
+        with self._drained:
+            self._retired = True
+            drained = self._drained.wait_for(lambda: self._in_flight == 0, timeout)
+            in_flight = self._in_flight
+        
+        if not drained:
+            print(
+                f"[ML Engine] Model version {self.version or 'default'} still has {in_flight} "
+                f"in-flight requests after {timeout}s; keeping it loaded for them"
+            )
+            return False
+        
+        self.rf_forest = None
+        self._rf_model = None
+        self.nb_model = None
+        self.scaler = None
+        self.label_encoder = None
+        return True
+
+
+def get_model_bundle():
     """
-    global _rf_model_cache
+    Return the active ModelBundle, loading the default one on first use.
     
-    if _rf_model_cache is not None:
-        return _rf_model_cache
+    Loading happens once under a lock so concurrent first requests do not
+    deserialize the models several times. MlEngineConfig.ready() calls this
+    at startup so gunicorn workers forked from a preloaded master share the
+    loaded pages copy-on-write.
     
-    # Try loading the RF pipeline first
-    rf_pipeline_path = MODELS_DIR / 'rf_pipeline.joblib'
+    A bundle loaded before any model was trained is only kept for
+    ML_MODEL_MISSING_RETRY_SECONDS; the next call after that loads again,
+    so newly trained artifacts are picked up without a restart.
     
-    if rf_pipeline_path.exists():
-        pipeline = joblib.load(rf_pipeline_path)
-        _rf_model_cache = pipeline['model']
-        return _rf_model_cache
+    Returns:
+        ModelBundle
+    """
+    global _model_bundle
     
-    # Fallback to best_model.joblib
-    model_path = MODELS_DIR / 'best_model.joblib'
+    bundle = _model_bundle
+    if bundle is not None and not _should_retry_load(bundle):
+        return bundle
     
-    if not model_path.exists():
-        raise FileNotFoundError(
-            f"Trained model not found at {model_path}. "
-            "Please run 'python ml_engine/train_model.py' first."
-        )
+    with _model_bundle_lock:
+        if _model_bundle is None or _should_retry_load(_model_bundle):
+            _model_bundle = ModelBundle().load()
     
-    _rf_model_cache = joblib.load(model_path)
-    return _rf_model_cache
+    return _model_bundle
 
 
-def load_nb_model():
+def _should_retry_load(bundle):
+    """True for an empty default bundle whose load is older than ML_MODEL_MISSING_RETRY_SECONDS."""
+    return (
+        not bundle.is_loaded
+        and bundle.version is None
+        and bundle.loaded_at is not None
+        and time.time() - bundle.loaded_at >= settings.ML_MODEL_MISSING_RETRY_SECONDS
+    )
+
+
+@contextmanager
+def use_model_bundle():
     """
-    Load the Naive Bayes model from disk with caching.
+    Pin the active model bundle for the duration of a request.
     
-    Returns:
-        Trained scikit-learn GaussianNB model
+    Also checks (at most every ML_MODEL_VERSION_CHECK_SECONDS) whether a
+    different ModelRegistry version has been activated and, if so, starts
+    loading it in the background.
+    
+    Yields:
+        ModelBundle
+        
+    Raises:
+        RuntimeError: If the active bundle stays retired (no replacement swapped in)
     """
-    global _nb_model_cache
+    check_active_model_version()
+    
+    # A bundle is retired only after it has been replaced, so a failed pin
+    # means a swap is in progress: retry on the new slot a few times
+    for _ in range(MODEL_ACQUIRE_ATTEMPTS):
+        bundle = get_model_bundle()
+        if bundle.acquire():
+            break
+        time.sleep(MODEL_ACQUIRE_RETRY_DELAY)
+    else:
+        raise RuntimeError("Could not pin the active model bundle: it was retired without a replacement")
     
-    if _nb_model_cache is not None:
-        return _nb_model_cache
+    try:
+        yield bundle
+    finally:
+        bundle.release()
+
+
+def get_model_bundle_status():
+    """
+    Describe the current model bundle without triggering a load.
     
-    nb_pipeline_path = MODELS_DIR / 'nb_pipeline.joblib'
+    Returns:
+        dict: {'loaded': bool, 'version': str or None, 'load_seconds': float or None,
+               'pending_version': str or None}
+    """
+    bundle = _model_bundle
     
-    if not nb_pipeline_path.exists():
-        raise FileNotFoundError(
-            f"Naive Bayes model not found at {nb_pipeline_path}. "
-            "Please run 'python ml_engine/train_model.py' first."
-        )
+    if bundle is None:
+        return {'loaded': False, 'version': None, 'load_seconds': None, 'pending_version': _pending_version}
     
-    pipeline = joblib.load(nb_pipeline_path)
-    _nb_model_cache = pipeline['model']
-    return _nb_model_cache
+    return {
+        'loaded': bundle.is_loaded,
+        'version': bundle.version,
+        'load_seconds': round(bundle.load_seconds, 3),
+        'pending_version': _pending_version
+    }
 
 
-def load_scaler():
+def resolve_models_dir(file_path):
     """
-    Load the feature scaler from disk with caching.
+    Return the artifact directory for a ModelRegistry file_path.
     
-    Returns:
-        Fitted StandardScaler
+    file_path may point at the directory itself or at any artifact inside
+    it (e.g. models/v3/rf_pipeline.joblib); relative paths are resolved
+    against the ml_engine directory.
     """
-    global _scaler_cache
-    
-    if _scaler_cache is not None:
-        return _scaler_cache
+    path = Path(file_path)
+    if not path.is_absolute():
+        path = BASE_DIR / path
+    return path if path.is_dir() else path.parent
+
+
+def swap_model_bundle(new_bundle, drain_timeout=None):
+    """
+    Atomically make new_bundle the active slot and retire the previous one.
     
-    # Try loading from scaler.joblib
-    scaler_path = MODELS_DIR / 'scaler.joblib'
+    The previous bundle is retired in a background thread once its in-flight
+    requests have drained, so the caller never blocks on them.
     
-    if scaler_path.exists():
-        _scaler_cache = joblib.load(scaler_path)
-        return _scaler_cache
+    Args:
+        new_bundle: Loaded (and ideally warmed) ModelBundle
+        drain_timeout: Maximum seconds to wait for in-flight requests on the old bundle
+    """
+    global _model_bundle
     
-    # Fallback: load from RF pipeline
-    rf_pipeline_path = MODELS_DIR / 'rf_pipeline.joblib'
+    with _model_bundle_lock:
+        old_bundle = _model_bundle
+        _model_bundle = new_bundle
     
-    if rf_pipeline_path.exists():
-        pipeline = joblib.load(rf_pipeline_path)
-        _scaler_cache = pipeline['scaler']
-        return _scaler_cache
+    # Cached predictions belong to the previous model
+    if old_bundle is not None and old_bundle is not new_bundle:
+        invalidate_prediction_cache()
     
-    raise FileNotFoundError(
-        f"Scaler not found at {scaler_path}. "
-        "Please run 'python ml_engine/train_model.py' first."
+    print(
+        f"[ML Engine] Activated model version {new_bundle.version or 'default'} "
+        f"(loaded in {new_bundle.load_seconds:.2f}s)"
     )
+    
+    if old_bundle is not None and old_bundle is not new_bundle:
+        threading.Thread(
+            target=old_bundle.retire,
+            kwargs={'timeout': drain_timeout},
+            name=f"retire-model-{old_bundle.version or 'default'}",
+            daemon=True
+        ).start()
 
 
-def load_label_encoder():
+def activate_model_version(version, models_dir, background=True):
     """
-    Load the label encoder from disk with caching.
+    Load a model version, warm it and switch to it without a worker restart.
     
+    Args:
+        version: ModelRegistry version identifier
+        models_dir: Directory containing that version's artifacts
+        background: Load in a daemon thread (True) or in the calling thread
+        
     Returns:
-        Fitted LabelEncoder
+        threading.Thread or None: The loader thread when background=True
+    """
+    global _pending_version
+    
+    with _model_bundle_lock:
+        if _pending_version == version:
+            return None
+        _pending_version = version
+    
+    def load_and_swap():
+        global _pending_version
+        try:
+            bundle = ModelBundle(models_dir, version=version).load().warm()
+            if not bundle.is_loaded:
+                raise FileNotFoundError(f"No model artifacts found in {models_dir}")
+            swap_model_bundle(bundle, drain_timeout=settings.ML_MODEL_DRAIN_TIMEOUT)
+        except Exception as e:
+            print(f"[ML Engine] Failed to activate model version {version}: {e}")
+        finally:
+            with _model_bundle_lock:
+                if _pending_version == version:
+                    _pending_version = None
+    
+    if not background:
+        load_and_swap()
+        return None
+    
+    thread = threading.Thread(target=load_and_swap, name=f"load-model-{version}", daemon=True)
+    thread.start()
+    return thread
+
+
+def check_active_model_version(force=False):
     """
-    global _label_encoder_cache
+    Start loading the ModelRegistry's active version if it is not the one in use.
     
-    if _label_encoder_cache is not None:
-        return _label_encoder_cache
+    The registry is queried at most every ML_MODEL_VERSION_CHECK_SECONDS per
+    process; a value of 0 disables the check.
     
-    # Try loading from label_encoder.joblib
-    encoder_path = MODELS_DIR / 'label_encoder.joblib'
+    Args:
+        force: Query the registry regardless of the check interval
+    """
+    global _last_version_check
     
-    if encoder_path.exists():
-        _label_encoder_cache = joblib.load(encoder_path)
-        return _label_encoder_cache
+    interval = settings.ML_MODEL_VERSION_CHECK_SECONDS
+    now = time.monotonic()
+    if not force and (interval <= 0 or now - _last_version_check < interval):
+        return
+    _last_version_check = now
     
-    # Fallback: load from RF pipeline
-    rf_pipeline_path = MODELS_DIR / 'rf_pipeline.joblib'
+    try:
+        from .models import ModelRegistry
+        active = ModelRegistry.objects.filter(is_active=True).order_by('-activated_at').first()
+    except Exception as e:
+        print(f"[ML Engine] Model version check failed: {e}")
+        return
     
-    if rf_pipeline_path.exists():
-        pipeline = joblib.load(rf_pipeline_path)
-        _label_encoder_cache = pipeline['label_encoder']
-        return _label_encoder_cache
+    if active is None:
+        return
     
-    raise FileNotFoundError(
-        f"Label encoder not found at {encoder_path}. "
-        "Please run 'python ml_engine/train_model.py' first."
-    )
+    current = _model_bundle
+    if current is not None and current.version == active.version:
+        return
+    
+    activate_model_version(active.version, resolve_models_dir(active.file_path))
+
+
+def load_model():
+    """
+    Return the primary ML model (Random Forest) from the active model bundle.
+    
+    Returns:
+        Trained scikit-learn RandomForest model
+    """
+    return get_model_bundle().require('rf_model')
+
+
+def load_nb_model():
+    """
+    Return the Naive Bayes model from the active model bundle.
+    
+    Returns:
+        Trained scikit-learn GaussianNB model
+    """
+    return get_model_bundle().require('nb_model')
+
+
+def load_scaler():
+    """
+    Return the feature scaler from the active model bundle.
+    
+    Returns:
+        Fitted StandardScaler
+    """
+    return get_model_bundle().require('scaler')
+
+
+def load_label_encoder():
+    """
+    Return the label encoder from the active model bundle.
+    
+    Returns:
+        Fitted LabelEncoder
+    """
+    return get_model_bundle().require('label_encoder')
 
 
 def get_feature_names():
@@ -157,10 +556,27 @@ def get_feature_names():
     return FEATURE_NAMES
 
 
+def get_input_feature_names():
+    """Return the soil field of each model input column (SoilInput.to_feature_array() order)."""
+    return INPUT_FEATURE_NAMES
+
+
+def _rank_classes(proba, top_k):
+    """
+    Return class column indices ordered by probability, highest first.
+    
+    Ties keep the lowest index first, matching the argmax used by predict().
+    """
+    return np.argsort(-proba, kind='stable')[..., :top_k]
+
+
 def predict_crop(soil_input, model=None):
     """
     Predict crop recommendation from soil input using Random Forest.
     
+    The model is evaluated once: the label is the argmax of predict_proba
+    and the same probability vector supplies the confidence.
+    
     Args:
         soil_input: SoilInput model instance with to_feature_array() method
         model: Optional pre-loaded model (if None, will load from cache)
@@ -170,32 +586,56 @@ def predict_crop(soil_input, model=None):
             - crop_name: Predicted crop as string
             - probability: Confidence score (0-1)
     """
-    # Load model and scaler if not provided
-    if model is None:
-        model = load_model()
-    
-    scaler = load_scaler()
-    label_encoder = load_label_encoder()
-    
-    # Extract features from soil input
-    features = soil_input.to_feature_array()
-    features_array = np.array(features).reshape(1, -1)
-    
-    # Standardize features
-    features_scaled = scaler.transform(features_array)
-    
-    # Predict
-    prediction_encoded = model.predict(features_scaled)[0]
-    crop_name = label_encoder.inverse_transform([prediction_encoded])[0]
+    crop_name, probability, _, _ = predict_crop_detailed(soil_input, model)
+    return crop_name, probability
+
+
+def predict_crop_detailed(soil_input, model=None):
+    """
+    Predict a crop and also return the scaled features and class index.
     
-    # Get probability
-    if hasattr(model, 'predict_proba'):
-        proba = model.predict_proba(features_scaled)[0]
-        probability = float(np.max(proba))
-    else:
-        probability = 0.85  # Default for models without predict_proba
+    Lets callers such as explainable_ai.services.generate_explanation()
+    reuse the prediction instead of scaling and evaluating the forest again.
     
-    return crop_name, probability
+    Args:
+        soil_input: SoilInput model instance with to_feature_array() method
+        model: Optional pre-loaded model (if None, will load from cache)
+        
+    Returns:
+        tuple: (crop_name, probability, features_scaled, class_index)
+            - features_scaled: Scaled feature matrix of shape (1, n_features)
+            - class_index: Index of the predicted class in model.classes_
+    """
+    # Pin one model version for the whole request
+    with use_model_bundle() as bundle:
+        # Load model and scaler if not provided
+        if model is None:
+            model = bundle.require('rf_estimator')
+        
+        scaler = bundle.require('scaler')
+        label_encoder = bundle.require('label_encoder')
+        
+        # Extract features from soil input
+        features = soil_input.to_feature_array()
+        features_array = np.array(features).reshape(1, -1)
+        
+        # Standardize features
+        features_scaled = scaler.transform(features_array)
+        
+        # Predict (single pass when probabilities are available)
+        if hasattr(model, 'predict_proba'):
+            proba = model.predict_proba(features_scaled)[0]
+            class_index = int(np.argmax(proba))
+            prediction_encoded = model.classes_[class_index]
+            probability = float(proba[class_index])
+        else:
+            prediction_encoded = model.predict(features_scaled)[0]
+            class_index = int(np.flatnonzero(model.classes_ == prediction_encoded)[0])
+            probability = 0.85  # Default for models without predict_proba
+        
+        crop_name = label_encoder.inverse_transform([prediction_encoded])[0]
+        
+        return crop_name, probability, features_scaled, class_index
 
 
 def predict_crop_dual(soil_input):
@@ -206,6 +646,9 @@ def predict_crop_dual(soil_input):
     - Higher confidence when models agree
     - Alternative suggestions when models disagree
     
+    Each model is evaluated once with predict_proba; labels, confidence,
+    agreement and alternatives are all derived from those two vectors.
+    
     Args:
         soil_input: SoilInput model instance
         
@@ -217,52 +660,165 @@ def predict_crop_dual(soil_input):
             'nb_probability': float,
             'models_agree': bool,
             'primary_recommendation': str,
-            'confidence': float
+            'confidence': float,
+            'alternatives': [{'crop': str, 'probability': float}, ...]
         }
     """
-    # Load all components
-    rf_model = load_model()
-    nb_model = load_nb_model()
-    scaler = load_scaler()
-    label_encoder = load_label_encoder()
-    
-    # Extract and scale features
-    features = soil_input.to_feature_array()
-    features_array = np.array(features).reshape(1, -1)
-    features_scaled = scaler.transform(features_array)
-    
-    # Random Forest prediction
-    rf_pred_encoded = rf_model.predict(features_scaled)[0]
-    rf_crop = label_encoder.inverse_transform([rf_pred_encoded])[0]
-    rf_proba = float(np.max(rf_model.predict_proba(features_scaled)[0]))
-    
-    # Naive Bayes prediction
-    nb_pred_encoded = nb_model.predict(features_scaled)[0]
-    nb_crop = label_encoder.inverse_transform([nb_pred_encoded])[0]
-    nb_proba = float(np.max(nb_model.predict_proba(features_scaled)[0]))
-    
-    # Determine if models agree
-    models_agree = rf_crop == nb_crop
-    
-    # Primary recommendation (use RF if agree, or the one with higher confidence)
-    if models_agree:
-        primary = rf_crop
-        confidence = max(rf_proba, nb_proba)
-    else:
-        # Use the model with higher probability
-        if rf_proba >= nb_proba:
+    # Pin one model version for the whole request
+    with use_model_bundle() as bundle:
+        rf_model = bundle.require('rf_estimator')
+        nb_model = bundle.require('nb_model')
+        scaler = bundle.require('scaler')
+        label_encoder = bundle.require('label_encoder')
+        
+        # Extract and scale features
+        features = soil_input.to_feature_array()
+        features_array = np.array(features).reshape(1, -1)
+        features_scaled = scaler.transform(features_array)
+        
+        # One probability pass per model
+        rf_proba_vector = rf_model.predict_proba(features_scaled)[0]
+        nb_proba_vector = nb_model.predict_proba(features_scaled)[0]
+        
+        # Rank classes; the first entry is the predicted label
+        rf_ranked = _rank_classes(rf_proba_vector, TOP_K_ALTERNATIVES + 1)
+        nb_ranked = _rank_classes(nb_proba_vector, TOP_K_ALTERNATIVES + 1)
+        
+        # Decode every ranked label in one call
+        crops = label_encoder.inverse_transform(
+            np.concatenate([rf_model.classes_[rf_ranked], nb_model.classes_[nb_ranked]])
+        )
+        rf_crops = crops[:len(rf_ranked)]
+        nb_crops = crops[len(rf_ranked):]
+        
+        # Random Forest prediction
+        rf_crop = rf_crops[0]
+        rf_proba = float(rf_proba_vector[rf_ranked[0]])
+        
+        # Naive Bayes prediction
+        nb_crop = nb_crops[0]
+        nb_proba = float(nb_proba_vector[nb_ranked[0]])
+        
+        # Determine if models agree
+        models_agree = rf_crop == nb_crop
+        
+        # Primary recommendation (use RF if agree, or the one with higher confidence)
+        if models_agree:
             primary = rf_crop
-            confidence = rf_proba
+            confidence = max(rf_proba, nb_proba)
         else:
-            primary = nb_crop
-            confidence = nb_proba
-    
-    return {
-        'rf_prediction': rf_crop,
-        'rf_probability': rf_proba,
-        'nb_prediction': nb_crop,
-        'nb_probability': nb_proba,
-        'models_agree': models_agree,
-        'primary_recommendation': primary,
-        'confidence': confidence
-    }
+            # Use the model with higher probability
+            if rf_proba >= nb_proba:
+                primary = rf_crop
+                confidence = rf_proba
+            else:
+                primary = nb_crop
+                confidence = nb_proba
+        
+        # Alternatives come from the model that produced the primary recommendation
+        if primary == rf_crop:
+            ranked_crops, ranked_idx, proba_vector = rf_crops, rf_ranked, rf_proba_vector
+        else:
+            ranked_crops, ranked_idx, proba_vector = nb_crops, nb_ranked, nb_proba_vector
+        
+        alternatives = [
+            {'crop': crop, 'probability': float(proba_vector[idx])}
+            for crop, idx in zip(ranked_crops[1:], ranked_idx[1:])
+        ]
+        
+        return {
+            'rf_prediction': rf_crop,
+            'rf_probability': rf_proba,
+            'nb_prediction': nb_crop,
+            'nb_probability': nb_proba,
+            'models_agree': models_agree,
+            'primary_recommendation': primary,
+            'confidence': confidence,
+            'alternatives': alternatives
+        }
+
+
+def predict_crop_batch(rows):
+    """
+    Predict crop recommendations for many soil readings in one vectorized pass.
+
+    The whole feature matrix is scaled once, each model runs a single
+    predict_proba over it, labels are taken from the argmax of the
+    probabilities and all labels are decoded in one inverse_transform call.
+
+    Args:
+        rows: Sequence of SoilInput instances or feature rows in
+              to_feature_array() order (N, P, K, ph, moisture, temperature)
+
+    Returns:
+        list: One dict per row with the same keys as predict_crop_dual()
+    """
+    if len(rows) == 0:
+        return []
+
+    # Pin one model version for the whole batch
+    with use_model_bundle() as bundle:
+        rf_model = bundle.rf_estimator_for(len(rows))
+        nb_model = bundle.require('nb_model')
+        scaler = bundle.require('scaler')
+        label_encoder = bundle.require('label_encoder')
+
+        # Build and scale the full feature matrix
+        features_array = np.array([
+            row.to_feature_array() if hasattr(row, 'to_feature_array') else row
+            for row in rows
+        ], dtype=float).reshape(len(rows), -1)
+        features_scaled = scaler.transform(features_array)
+
+        # One probability pass per model
+        rf_proba = rf_model.predict_proba(features_scaled)
+        nb_proba = nb_model.predict_proba(features_scaled)
+
+        # Rank classes per row; column 0 is the argmax label
+        n_rows = len(rows)
+        row_index = np.arange(n_rows)
+        rf_ranked = _rank_classes(rf_proba, TOP_K_ALTERNATIVES + 1)
+        nb_ranked = _rank_classes(nb_proba, TOP_K_ALTERNATIVES + 1)
+        rf_ranked_proba = np.take_along_axis(rf_proba, rf_ranked, axis=1)
+        nb_ranked_proba = np.take_along_axis(nb_proba, nb_ranked, axis=1)
+        rf_conf = rf_ranked_proba[:, 0]
+        nb_conf = nb_ranked_proba[:, 0]
+
+        # Decode every ranked RF and NB label in one call
+        crops = label_encoder.inverse_transform(np.concatenate([
+            rf_model.classes_[rf_ranked].ravel(),
+            nb_model.classes_[nb_ranked].ravel()
+        ]))
+        rf_crops = crops[:rf_ranked.size].reshape(rf_ranked.shape)
+        nb_crops = crops[rf_ranked.size:].reshape(nb_ranked.shape)
+
+        # Same agreement rules as predict_crop_dual()
+        models_agree = rf_crops[:, 0] == nb_crops[:, 0]
+        use_rf = models_agree | (rf_conf >= nb_conf)
+        primary = np.where(use_rf, rf_crops[:, 0], nb_crops[:, 0])
+        confidence = np.where(
+            models_agree,
+            np.maximum(rf_conf, nb_conf),
+            np.where(use_rf, rf_conf, nb_conf)
+        )
+
+        # Alternatives come from the model that produced the primary recommendation
+        alt_crops = np.where(use_rf[:, None], rf_crops, nb_crops)[:, 1:]
+        alt_proba = np.where(use_rf[:, None], rf_ranked_proba, nb_ranked_proba)[:, 1:]
+
+        return [
+            {
+                'rf_prediction': str(rf_crops[i, 0]),
+                'rf_probability': float(rf_conf[i]),
+                'nb_prediction': str(nb_crops[i, 0]),
+                'nb_probability': float(nb_conf[i]),
+                'models_agree': bool(models_agree[i]),
+                'primary_recommendation': str(primary[i]),
+                'confidence': float(confidence[i]),
+                'alternatives': [
+                    {'crop': str(crop), 'probability': float(probability)}
+                    for crop, probability in zip(alt_crops[i], alt_proba[i])
+                ]
+            }
+            for i in row_index
+        ]
@@ -1,3 +1,246 @@
-from django.test import TestCase
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+import joblib
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from sklearn.ensemble import RandomForestClassifier
+from ml_engine import services
+from ml_engine import prediction_cache
+from ml_engine.forest import FlatForest, export_forest_arrays, load_forest_arrays, save_forest_arrays
+from ml_engine.services import ModelBundle, swap_model_bundle
 
-# Create your tests here.
+
+class ModelBundleSwapTest(SimpleTestCase):
+    """Test cases for hot-swapping model bundles."""
+    
+    def setUp(self):
+        self.original_bundle = services._model_bundle
+    
+    def tearDown(self):
+        services._model_bundle = self.original_bundle
+    
+    def make_bundle(self, version):
+        bundle = ModelBundle(version=version)
+        bundle.rf_model = object()
+        bundle.load_seconds = 0.0
+        return bundle
+    
+    def test_swap_waits_for_in_flight_requests(self):
+        """The old bundle keeps its models until pinned requests release it."""
+        old_bundle = self.make_bundle('v1')
+        new_bundle = self.make_bundle('v2')
+        services._model_bundle = old_bundle
+        
+        self.assertTrue(old_bundle.acquire())
+        swap_model_bundle(new_bundle, drain_timeout=5)
+        
+        self.assertIs(services.get_model_bundle(), new_bundle)
+        self.assertIsNotNone(old_bundle.rf_model)
+        self.assertFalse(old_bundle.acquire())
+        
+        old_bundle.release()
+        for thread in threading.enumerate():
+            if thread.name == 'retire-model-v1':
+                thread.join(timeout=5)
+        self.assertIsNone(old_bundle.rf_model)
+    
+    def test_drain_timeout_keeps_models_for_in_flight_requests(self):
+        """A request still pinned when the drain times out keeps a usable bundle."""
+        bundle = self.make_bundle('v1')
+        model = bundle.rf_model
+        self.assertTrue(bundle.acquire())
+        
+        self.assertFalse(bundle.retire(timeout=0))
+        self.assertIs(bundle.rf_model, model)
+        self.assertFalse(bundle.acquire())
+        bundle.release()
+    
+    @override_settings(ML_MODEL_VERSION_CHECK_SECONDS=0)
+    def test_pin_gives_up_on_retired_active_bundle(self):
+        """use_model_bundle() retries a bounded number of times instead of spinning."""
+        bundle = self.make_bundle('v1')
+        bundle.retire(timeout=0)
+        services._model_bundle = bundle
+        
+        with mock.patch.object(services.time, 'sleep') as sleep, self.assertRaises(RuntimeError):
+            with services.use_model_bundle():
+                pass
+        self.assertEqual(sleep.call_count, services.MODEL_ACQUIRE_ATTEMPTS)
+    
+    def test_missing_artifacts_are_retried(self):
+        """A bundle loaded before training is replaced once the retry interval has passed."""
+        df = pd.read_csv(services.BASE_DIR / 'data' / 'Crop_recommendation.csv')
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(df.drop(columns=['label']), df['label'])
+        
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(services, 'MODELS_DIR', Path(tmp_dir)):
+            services._model_bundle = None
+            empty = services.get_model_bundle()
+            self.assertFalse(empty.is_loaded)
+            
+            joblib.dump(model, Path(tmp_dir) / 'best_model.joblib')
+            with override_settings(ML_MODEL_MISSING_RETRY_SECONDS=3600):
+                self.assertIs(services.get_model_bundle(), empty)
+            with override_settings(ML_MODEL_MISSING_RETRY_SECONDS=0):
+                reloaded = services.get_model_bundle()
+                self.assertTrue(reloaded.is_loaded)
+                self.assertIs(services.get_model_bundle(), reloaded)
+    
+    def test_missing_component_raises(self):
+        """require() reports the missing artifact file."""
+        bundle = ModelBundle(version='v1')
+        with self.assertRaises(FileNotFoundError):
+            bundle.require('scaler')
+
+
+class FlatForestParityTest(SimpleTestCase):
+    """Test cases for the flat-array Random Forest engine against sklearn."""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        df = pd.read_csv(services.BASE_DIR / 'data' / 'Crop_recommendation.csv')
+        cls.X = df.drop(columns=['label']).to_numpy(dtype=float)
+        cls.model = RandomForestClassifier(n_estimators=25, random_state=0).fit(cls.X, df['label'])
+        cls.forest = FlatForest.from_model(cls.model)
+        
+        # Training rows plus unseen rows spread over (and beyond) the data range
+        rng = np.random.default_rng(0)
+        low, high = cls.X.min(axis=0), cls.X.max(axis=0)
+        cls.X_eval = np.vstack([cls.X, rng.uniform(low - 10, high + 10, size=(500, cls.X.shape[1]))])
+    
+    def test_predict_proba_matches_sklearn(self):
+        """Probabilities match RandomForestClassifier.predict_proba."""
+        np.testing.assert_allclose(
+            self.forest.predict_proba(self.X_eval),
+            self.model.predict_proba(self.X_eval),
+            rtol=1e-12, atol=1e-12
+        )
+    
+    def test_single_row_matches_sklearn(self):
+        """Single-row calls (the request path) match sklearn row by row."""
+        for row in self.X_eval[::97]:
+            np.testing.assert_allclose(
+                self.forest.predict_proba(row.reshape(1, -1)),
+                self.model.predict_proba(row.reshape(1, -1)),
+                rtol=1e-12, atol=1e-12
+            )
+    
+    def test_predict_and_classes_match_sklearn(self):
+        """Predicted labels and class order match sklearn."""
+        np.testing.assert_array_equal(self.forest.classes_, self.model.classes_)
+        np.testing.assert_array_equal(self.forest.predict(self.X_eval), self.model.predict(self.X_eval))
+    
+    def test_apply_matches_sklearn_leaves(self):
+        """Every tree ends in the same leaf as sklearn's own traversal."""
+        leaves = self.forest.apply(self.X_eval) - self.forest.roots
+        np.testing.assert_array_equal(leaves, self.model.apply(self.X_eval))
+    
+    def test_contributions_sum_to_probability(self):
+        """Saabas contributions plus the bias reproduce each row's class probability."""
+        probabilities, contributions, bias = self.forest.predict_proba_with_contributions(self.X_eval)
+        predicted = np.argmax(probabilities, axis=1)
+        
+        np.testing.assert_allclose(probabilities, self.model.predict_proba(self.X_eval), rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(
+            bias + contributions.sum(axis=1),
+            probabilities[np.arange(len(predicted)), predicted],
+            atol=1e-9
+        )
+    
+    def test_mapped_arrays_round_trip(self):
+        """Saved arrays load memory-mapped and give the same probabilities."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'forest.joblib'
+            save_forest_arrays(self.model, path)
+            mapped = load_forest_arrays(path)
+            
+            self.assertIsInstance(mapped.value, np.memmap)
+            np.testing.assert_array_equal(
+                mapped.predict_proba(self.X_eval),
+                self.forest.predict_proba(self.X_eval)
+            )
+            del mapped
+    
+    def test_outdated_arrays_format_rejected(self):
+        """Arrays exported with another layout are refused."""
+        arrays = export_forest_arrays(self.model)
+        arrays['format'] = 1
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'forest.joblib'
+            joblib.dump(arrays, path)
+            with self.assertRaises(ValueError):
+                load_forest_arrays(path)
+    
+    def test_wrong_feature_count_rejected(self):
+        """Inputs with the wrong number of features raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.forest.predict_proba(self.X_eval[:, :3])
+    
+    def test_bundle_engine_setting(self):
+        """ML_FOREST_ENGINE selects the engine used by ModelBundle."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            joblib.dump(self.model, Path(tmp_dir) / 'best_model.joblib')
+            
+            with override_settings(ML_FOREST_ENGINE='sklearn'):
+                bundle = ModelBundle(tmp_dir).load()
+                self.assertIs(bundle.rf_estimator_for(1), bundle.rf_model)
+            
+            with override_settings(ML_FOREST_ENGINE='flat'):
+                bundle = ModelBundle(tmp_dir).load()
+                self.assertIsInstance(bundle.rf_estimator_for(1), FlatForest)
+                self.assertIsInstance(bundle.rf_estimator_for(10000), FlatForest)
+            
+            with override_settings(ML_FOREST_ENGINE='auto', ML_FOREST_FLAT_MAX_ROWS=64):
+                bundle = ModelBundle(tmp_dir).load()
+                self.assertIsInstance(bundle.rf_estimator_for(64), FlatForest)
+                self.assertIs(bundle.rf_estimator_for(65), bundle.rf_model)
+
+
+class PredictionCacheTest(SimpleTestCase):
+    """Test cases for the integrity-hash prediction cache."""
+    
+    RESULT = {'crop_name': 'rice', 'probability': 0.91, 'explanation': 'Because.'}
+    
+    def setUp(self):
+        cache.clear()
+        self.original_bundle = services._model_bundle
+    
+    def tearDown(self):
+        services._model_bundle = self.original_bundle
+        cache.clear()
+    
+    def test_hit_after_store(self):
+        """A stored result is returned for the same hash and version."""
+        self.assertIsNone(prediction_cache.get_cached_prediction('abc', 'v1'))
+        prediction_cache.cache_prediction('abc', 'v1', self.RESULT)
+        self.assertEqual(prediction_cache.get_cached_prediction('abc', 'v1'), self.RESULT)
+        
+        stats = prediction_cache.get_prediction_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+    
+    def test_keyed_by_model_version(self):
+        """Results from another model version are not served."""
+        prediction_cache.cache_prediction('abc', 'v1', self.RESULT)
+        self.assertIsNone(prediction_cache.get_cached_prediction('abc', 'v2'))
+    
+    def test_model_swap_invalidates(self):
+        """Swapping the model bundle drops cached predictions, even for the same version."""
+        services._model_bundle = ModelBundle(version='v1')
+        prediction_cache.cache_prediction('abc', 'v1', self.RESULT)
+        
+        reloaded = ModelBundle(version='v1')
+        reloaded.load_seconds = 0.0
+        swap_model_bundle(reloaded, drain_timeout=0)
+        self.assertIsNone(prediction_cache.get_cached_prediction('abc', 'v1'))
+    
+    @override_settings(PREDICTION_CACHE_ENABLED=False)
+    def test_disabled(self):
+        """Nothing is stored or counted when the cache is disabled."""
+        prediction_cache.cache_prediction('abc', 'v1', self.RESULT)
+        self.assertIsNone(prediction_cache.get_cached_prediction('abc', 'v1'))
+        self.assertEqual(prediction_cache.get_prediction_cache_stats()['misses'], 0)
@@ -35,6 +35,13 @@ except ImportError:
     HAS_XGBOOST = False
     print("Warning: XGBoost not installed, skipping XGBClassifier")
 
+# Flat forest export for memory-mapped loading in the web workers
+try:
+    from ml_engine.forest import save_forest_arrays, FOREST_ARRAYS_FILENAME
+except ImportError:
+    # Running as a script from inside ml_engine/
+    from forest import save_forest_arrays, FOREST_ARRAYS_FILENAME
+
 warnings.filterwarnings('ignore')
 
 # Define paths
@@ -324,6 +331,11 @@ def save_models(rf_model, nb_model, scaler, label_encoder):
     joblib.dump(rf_model, best_model_path)
     print(f"✅ Saved Best Model: {best_model_path}")
     
+    # Save the forest as flat arrays (uncompressed) so workers can mmap one shared copy
+    forest_path = MODELS_DIR / FOREST_ARRAYS_FILENAME
+    save_forest_arrays(rf_model, forest_path)
+    print(f"✅ Saved Forest Arrays (mmap): {forest_path}")
+    
     # Save scaler separately
     scaler_path = MODELS_DIR / 'scaler.joblib'
     joblib.dump(scaler, scaler_path)
@@ -4,11 +4,14 @@ from .models import WeatherAlertNotification, EmailLog
 
 @admin.register(WeatherAlertNotification)
 class WeatherAlertNotificationAdmin(admin.ModelAdmin):
-    list_display = ['title', 'alert_type', 'severity', 'created_by', 'emails_sent_count', 'created_at', 'is_active']
-    list_filter = ['alert_type', 'severity', 'is_active', 'created_at']
+    list_display = ['title', 'alert_type', 'severity', 'status', 'created_by', 'emails_sent_count', 'created_at', 'is_active']
+    list_filter = ['status', 'alert_type', 'severity', 'is_active', 'created_at']
     search_fields = ['title', 'message', 'created_by__username']
     date_hierarchy = 'created_at'
-    readonly_fields = ['emails_sent_count', 'created_at']
+    readonly_fields = [
+        'emails_sent_count', 'created_at', 'status', 'total_recipients', 'emails_failed_count',
+        'cursor', 'error_message', 'started_at', 'finished_at', 'heartbeat_at'
+    ]
     
     fieldsets = (
         ('Alert Content', {
@@ -20,6 +23,12 @@ class WeatherAlertNotificationAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('is_active', 'expires_at', 'emails_sent_count', 'created_at', 'created_by')
         }),
+        ('Campaign Job', {
+            'fields': (
+                'status', 'total_recipients', 'emails_failed_count', 'cursor',
+                'error_message', 'started_at', 'finished_at', 'heartbeat_at'
+            )
+        }),
     )
     filter_horizontal = ('target_users',)
 
@@ -0,0 +1,115 @@
+"""
+Benchmark weather alert email delivery against a local SMTP stand-in.
+
+Compares the original one-connection-per-email send
+(send_automated_weather_alert) with batched delivery over one SMTP
+connection per worker (deliver_alert_emails). The stand-in simulates the
+provider's connection setup cost (TCP + TLS + AUTH) with --connect-delay.
+
+Temporary users and the alert are deleted afterwards.
+
+Usage:
+    python manage.py benchmark_email_campaign --emails 200 --connect-delay 150 --concurrency 8
+"""
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from accounts.models import User
+from notifications.models import WeatherAlertNotification
+from notifications.services import (
+    deliver_alert_emails,
+    get_weather_alerts_for_location,
+    send_automated_weather_alert,
+)
+from notifications.smtp_sink import LocalSMTPServer
+
+
+SAMPLE_WEATHER = {
+    'temperature': 33.5,
+    'feels_like': 38.2,
+    'humidity': 78,
+    'pressure': 1008,
+    'wind_speed': 12.6,
+    'description': 'Scattered Clouds',
+    'icon': '03d',
+    'city': 'Kuala Lumpur',
+    'country': 'MY',
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-email SMTP connections against batched delivery on a local SMTP stand-in'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=200, help='Emails per benchmark run')
+        parser.add_argument('--concurrency', type=int, default=settings.ALERT_CAMPAIGN_CONCURRENCY, help='Worker threads for batched delivery')
+        parser.add_argument('--batch-size', type=int, default=settings.ALERT_CAMPAIGN_BATCH_SIZE, help='Emails per send_messages() call')
+        parser.add_argument('--connect-delay', type=float, default=150, help='Simulated SMTP connection setup in ms')
+        parser.add_argument('--message-delay', type=float, default=5, help='Simulated per-message server time in ms')
+
+    def handle(self, *args, **options):
+        count = options['emails']
+        run_id = uuid.uuid4().hex[:8]
+        cluster_weather = (SAMPLE_WEATHER, get_weather_alerts_for_location(SAMPLE_WEATHER))
+
+        User.objects.bulk_create([
+            User(
+                email=f'bench-{run_id}-{index}@example.invalid',
+                username=f'bench-{run_id}-{index}',
+                location_lat=3.1390,
+                location_lon=101.6869,
+            )
+            for index in range(count)
+        ])
+        users = list(User.objects.filter(username__startswith=f'bench-{run_id}-'))
+        alert = WeatherAlertNotification.objects.create(
+            title='Benchmark Weather Alert',
+            message=f'benchmark_email_campaign run {run_id}',
+            target_all_users=False
+        )
+        deliveries = [(user, cluster_weather) for user in users]
+
+        runs = [
+            ('one connection per email (serial)', lambda: sum(
+                1 for user in users
+                if getattr(send_automated_weather_alert(user, alert, cluster_weather=cluster_weather), 'status', None) == 'sent'
+            )),
+            ('batched, 1 worker', lambda: deliver_alert_emails(
+                alert, deliveries, concurrency=1, batch_size=options['batch_size']
+            )),
+            (f"batched, {options['concurrency']} workers", lambda: deliver_alert_emails(
+                alert, deliveries, concurrency=options['concurrency'], batch_size=options['batch_size']
+            )),
+        ]
+
+        try:
+            self.stdout.write(
+                f"{len(users)} emails, SMTP stand-in with {options['connect_delay']:.0f} ms connect "
+                f"and {options['message_delay']:.0f} ms per message\n"
+            )
+            for name, run in runs:
+                with LocalSMTPServer(
+                    connect_delay=options['connect_delay'] / 1000,
+                    message_delay=options['message_delay'] / 1000
+                ) as server, override_settings(
+                    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                    EMAIL_HOST='127.0.0.1',
+                    EMAIL_PORT=server.port,
+                    EMAIL_USE_TLS=False,
+                    EMAIL_USE_SSL=False,
+                    EMAIL_HOST_USER='',
+                    EMAIL_HOST_PASSWORD=''
+                ):
+                    start = time.perf_counter()
+                    sent = run()
+                    seconds = time.perf_counter() - start
+
+                self.stdout.write(
+                    f"{name:<36} {sent:>5} sent in {seconds:7.2f}s  "
+                    f"{sent / seconds:8.1f} emails/s  {server.connections:>5} SMTP connections"
+                )
+        finally:
+            alert.delete()
+            User.objects.filter(username__startswith=f'bench-{run_id}-').delete()
@@ -0,0 +1,58 @@
+"""
+Resume weather alert campaign jobs that did not finish.
+
+Picks up pending jobs that were never started and running jobs whose
+heartbeat is older than ALERT_CAMPAIGN_STALE_SECONDS (the worker running
+them died). Each job continues from its last checkpoint; recipients that
+already have an EmailLog for the alert are not emailed again.
+
+Run after a deploy or restart, or from cron.
+
+Usage:
+    python manage.py resume_alert_campaigns
+    python manage.py resume_alert_campaigns --failed
+    python manage.py resume_alert_campaigns --job 42
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from notifications.models import WeatherAlertNotification
+from notifications.services import get_campaign_progress, run_alert_campaign_job
+
+
+class Command(BaseCommand):
+    help = 'Resume pending, stalled (and optionally failed) weather alert campaign jobs from their last checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, action='append', help='Resume only this alert id (repeatable)')
+        parser.add_argument('--failed', action='store_true', help='Also retry failed jobs')
+
+    def handle(self, *args, **options):
+        stale_before = timezone.now() - timedelta(seconds=settings.ALERT_CAMPAIGN_STALE_SECONDS)
+        unfinished = Q(status='pending') | Q(status='running', heartbeat_at__lt=stale_before)
+        if options['failed'] or options['job']:
+            unfinished |= Q(status='failed')
+
+        jobs = WeatherAlertNotification.objects.filter(unfinished)
+        if options['job']:
+            jobs = jobs.filter(id__in=options['job'])
+
+        job_ids = list(jobs.order_by('created_at').values_list('id', flat=True))
+        if not job_ids:
+            self.stdout.write('No campaign jobs to resume')
+            return
+
+        for job_id in job_ids:
+            alert = run_alert_campaign_job(job_id, resume=True)
+            if alert is None:
+                self.stdout.write(f'Campaign {job_id}: claimed by another worker, skipped')
+                continue
+
+            progress = get_campaign_progress(alert)
+            self.stdout.write(
+                f"Campaign {job_id}: {progress['status']}, {progress['sent']} sent, "
+                f"{progress['failed']} failed of {progress['total']}"
+                + (f" ({progress['error']})" if progress['error'] else '')
+            )
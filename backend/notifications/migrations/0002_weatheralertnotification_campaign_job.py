@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='completed', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='total_recipients',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='emails_failed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='cursor',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weatheralertnotification',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
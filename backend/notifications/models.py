@@ -27,6 +27,14 @@ class WeatherAlertNotification(models.Model):
         ('general', 'General Weather'),
     ]
     
+    # Campaign job lifecycle; alerts sent before campaigns became jobs are 'completed'
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
     # Alert content
     title = models.CharField(max_length=200)
     message = models.TextField()
@@ -57,6 +65,16 @@ class WeatherAlertNotification(models.Model):
     is_active = models.BooleanField(default=True)
     emails_sent_count = models.IntegerField(default=0)
     
+    # Campaign job progress (recipients are processed in user id order)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='completed')
+    total_recipients = models.IntegerField(default=0)
+    emails_failed_count = models.IntegerField(default=0)
+    cursor = models.IntegerField(default=0)  # Last recipient id checkpointed
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Weather Alert Notification'
@@ -2,26 +2,33 @@
 Automated Weather Alert Service
 Fetches real-time weather data for each user's location and sends personalized alerts.
 """
-import requests
-import os
-from django.core.mail import EmailMultiAlternatives
+import smtplib
+import socket
+import threading
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
-from dotenv import load_dotenv
+from django.db import connection as db_connection, connections, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
 from accounts.models import User
+from securecrop.background import submit, submit_on_commit
+from weather.client import get_current_weather, get_tile_hash, lookup_many, refresh_tiles
 from .models import WeatherAlertNotification, EmailLog
 
-# Load environment variables
-load_dotenv()
-
-OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '')
-
 
 def get_weather_for_location(lat, lon):
     """
     Fetch current weather data from OpenWeatherMap for a specific location.
     
+    Served from the shared weather cache (weather.client) when another
+    request or user nearby already fetched it.
+    
     Args:
         lat: Latitude
         lon: Longitude
@@ -30,34 +37,75 @@ def get_weather_for_location(lat, lon):
         dict: Weather data or None if failed
     """
     try:
-        url = f"https://api.openweathermap.org/data/2.5/weather"
-        params = {
-            'lat': lat,
-            'lon': lon,
-            'appid': OPENWEATHER_API_KEY,
-            'units': 'metric'
-        }
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                'temperature': round(data['main']['temp'], 1),
-                'feels_like': round(data['main']['feels_like'], 1),
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'wind_speed': round(data['wind']['speed'] * 3.6, 1),  # Convert m/s to km/h
-                'description': data['weather'][0]['description'].title(),
-                'icon': data['weather'][0]['icon'],
-                'city': data.get('name', 'Your Location'),
-                'country': data.get('sys', {}).get('country', ''),
-            }
+        return format_current_weather(get_current_weather(lat, lon))
     except Exception as e:
         print(f"Error fetching weather for {lat}, {lon}: {e}")
     
     return None
 
 
+def format_current_weather(data):
+    """
+    Extract the fields used in alert emails from an OpenWeatherMap
+    current-conditions payload.
+    
+    Args:
+        data: /data/2.5/weather JSON payload
+        
+    Returns:
+        dict: Weather data
+    """
+    return {
+        'temperature': round(data['main']['temp'], 1),
+        'feels_like': round(data['main']['feels_like'], 1),
+        'humidity': data['main']['humidity'],
+        'pressure': data['main']['pressure'],
+        'wind_speed': round(data['wind']['speed'] * 3.6, 1),  # Convert m/s to km/h
+        'description': data['weather'][0]['description'].title(),
+        'icon': data['weather'][0]['icon'],
+        'city': data.get('name', 'Your Location'),
+        'country': data.get('sys', {}).get('country', ''),
+    }
+
+
+def get_cached_weather_previews(users):
+    """
+    Current weather for each user, served from the shared weather cache only.
+    
+    Never waits on OpenWeatherMap: tiles without a fresh payload get no
+    preview, and are refreshed on the background pool so a later request
+    finds them cached. A tile is queued at most once per
+    WEATHER_PREVIEW_FILL_TIMEOUT seconds.
+    
+    Args:
+        users: Users with location_lat / location_lon set
+        
+    Returns:
+        tuple: (previews, pending) - dict user id -> weather data or None,
+               and the number of tiles queued or still being filled
+    """
+    user_tiles = {user.id: get_tile_hash(user.location_lat, user.location_lon) for user in users}
+    payloads = lookup_many('weather', set(user_tiles.values()))
+    
+    missing = set(user_tiles.values()) - set(payloads)
+    queued = [
+        tile_hash for tile_hash in missing
+        if cache.add(f'weather:preview-fill:{tile_hash}', True, timeout=settings.WEATHER_PREVIEW_FILL_TIMEOUT)
+    ]
+    if queued:
+        submit(refresh_tiles, 'weather', queued)
+    
+    previews = {}
+    for user_id, tile_hash in user_tiles.items():
+        try:
+            previews[user_id] = format_current_weather(payloads[tile_hash]) if tile_hash in payloads else None
+        except (KeyError, IndexError, TypeError) as e:
+            print(f"Error reading cached weather for tile {tile_hash}: {e}")
+            previews[user_id] = None
+    
+    return previews, len(missing)
+
+
 def get_weather_alerts_for_location(weather_data):
     """
     Generate weather alerts based on current conditions.
@@ -248,13 +296,60 @@ def generate_weather_email_html(user, weather_data, alerts):
     return html
 
 
-def send_automated_weather_alert(user, alert_notification=None):
+def get_cluster_weather(lat, lon):
+    """
+    Fetch weather and evaluate alerts once for a cluster of nearby users.
+    
+    Args:
+        lat: Latitude of any user in the cluster
+        lon: Longitude of any user in the cluster
+        
+    Returns:
+        tuple: (weather_data or None, list of alerts)
+    """
+    weather_data = get_weather_for_location(lat, lon)
+    return weather_data, get_weather_alerts_for_location(weather_data)
+
+
+def build_weather_alert_email(user, weather_data, alerts, connection=None):
+    """
+    Build the personalized weather alert email for a user.
+    
+    Args:
+        user: Recipient User instance
+        weather_data: Weather dict from get_weather_for_location() or None
+        alerts: Alerts from get_weather_alerts_for_location()
+        connection: Optional mail backend connection to send it with
+        
+    Returns:
+        EmailMultiAlternatives with HTML and plain-text bodies
+    """
+    html_content = generate_weather_email_html(user, weather_data, alerts)
+    text_content = strip_tags(html_content)
+    
+    city = weather_data.get('city', 'Your Location') if weather_data else 'Your Location'
+    subject = f"🌾 Weather Alert for {city} - SecureCrop"
+    
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=text_content,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+        connection=connection
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+
+def send_automated_weather_alert(user, alert_notification=None, cluster_weather=None):
     """
     Send personalized weather alert email to a user based on their location.
     
     Args:
         user: User instance with location_lat and location_lon
         alert_notification: Optional WeatherAlertNotification for logging
+        cluster_weather: Optional (weather_data, alerts) already computed
+                         for the user's cluster by get_cluster_weather()
         
     Returns:
         EmailLog instance
@@ -263,15 +358,10 @@ def send_automated_weather_alert(user, alert_notification=None):
     if not user.location_lat or not user.location_lon:
         return None
     
-    # Fetch weather for user's location
-    weather_data = get_weather_for_location(user.location_lat, user.location_lon)
-    
-    # Generate weather-based alerts
-    alerts = get_weather_alerts_for_location(weather_data)
-    
-    # Generate email content
-    html_content = generate_weather_email_html(user, weather_data, alerts)
-    text_content = strip_tags(html_content)
+    # Fetch weather and generate alerts for user's location
+    if cluster_weather is None:
+        cluster_weather = get_cluster_weather(user.location_lat, user.location_lon)
+    weather_data, alerts = cluster_weather
     
     # Create email log if alert notification provided
     email_log = None
@@ -285,16 +375,7 @@ def send_automated_weather_alert(user, alert_notification=None):
     
     try:
         # Create and send email
-        city = weather_data.get('city', 'Your Location') if weather_data else 'Your Location'
-        subject = f"🌾 Weather Alert for {city} - SecureCrop"
-        
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email]
-        )
-        email.attach_alternative(html_content, "text/html")
+        email = build_weather_alert_email(user, weather_data, alerts)
         email.send(fail_silently=False)
         
         if email_log:
@@ -312,25 +393,522 @@ def send_automated_weather_alert(user, alert_notification=None):
         return email_log
 
 
-def send_weather_alerts_to_all_users(admin_user):
+def _is_connection_error(error):
+    """True if an SMTP failure means the connection itself was lost."""
+    return isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout))
+
+
+def _reconnect(connection):
+    """Close a mail connection after a failure and open a fresh one."""
+    try:
+        connection.close()
+    except Exception:
+        pass
+    try:
+        connection.open()
+    except Exception as e:
+        print(f"[Notifications] SMTP reconnect failed: {e}")
+
+
+def send_email_batch(connection, messages, heartbeat=None):
     """
-    Send automated weather alerts to all users with email alerts enabled and location set.
+    Send messages over one open mail connection with send_messages().
+    
+    send_messages() stops at the first failing message, so the messages are
+    fed through a generator that records how far it got: everything before
+    the failing message was sent, and the rest of the batch continues. If
+    the connection dropped it is re-opened first, and the message that hit
+    the dropped connection is retried once.
     
     Args:
-        admin_user: Admin user who triggered the send
+        connection: Open mail backend connection (fail_silently=False)
+        messages: List of EmailMessage instances
+        heartbeat: Optional callable invoked before each message and after
+                   each reconnect, so a slow batch still reports progress
         
     Returns:
-        dict: Summary of sent emails
+        list: None for each sent message, else the error message string
     """
-    # Get users with email alerts enabled and location set
-    users = User.objects.filter(
+    errors = [None] * len(messages)
+    retried = set()
+    start = 0
+    
+    while start < len(messages):
+        attempted = []
+        
+        def tracked(first=start):
+            for index in range(first, len(messages)):
+                if heartbeat is not None:
+                    heartbeat()
+                attempted.append(index)
+                yield messages[index]
+        
+        try:
+            connection.send_messages(tracked())
+            break
+        except Exception as e:
+            failed_index = attempted[-1] if attempted else start
+            if _is_connection_error(e):
+                _reconnect(connection)
+                if heartbeat is not None:
+                    heartbeat()
+                if failed_index not in retried:
+                    retried.add(failed_index)
+                    start = failed_index
+                    continue
+            errors[failed_index] = str(e) or e.__class__.__name__
+            start = failed_index + 1
+    
+    return errors
+
+
+def _map_concurrently(func, items, concurrency):
+    """
+    Apply func to every item on a pool of worker threads.
+    
+    Each worker takes the next item from a shared iterator and stores its
+    result by index, so no counters are shared between threads. Workers
+    close their database connections on exit. With a concurrency of 1
+    everything runs on the calling thread.
+    
+    Returns:
+        list: func(item) for each item, in item order
+    """
+    results = [None] * len(items)
+    pending = iter(range(len(items)))
+    pending_lock = threading.Lock()
+    
+    def next_index():
+        with pending_lock:
+            return next(pending, None)
+    
+    def run_all():
+        while True:
+            index = next_index()
+            if index is None:
+                return
+            results[index] = func(items[index])
+    
+    def worker():
+        try:
+            run_all()
+        finally:
+            connections.close_all()
+    
+    concurrency = max(1, min(concurrency, len(items)))
+    if concurrency == 1:
+        run_all()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='alert-campaign') as pool:
+            futures = [pool.submit(worker) for _ in range(concurrency)]
+        for future in futures:
+            future.result()
+    return results
+
+
+def group_users_by_location(users):
+    """
+    Cluster users by weather tile (geohash cell of WEATHER_TILE_PRECISION).
+    
+    Returns:
+        dict: tile geohash -> list of users in that tile
+    """
+    clusters = {}
+    for user in users:
+        clusters.setdefault(get_tile_hash(user.location_lat, user.location_lon), []).append(user)
+    return clusters
+
+
+def create_pending_email_logs(alert, users):
+    """
+    Insert pending EmailLog rows for a batch of recipients in one query.
+    
+    Args:
+        alert: WeatherAlertNotification the rows belong to
+        users: Recipient User instances
+        
+    Returns:
+        list: EmailLog instances with primary keys, in user order
+    """
+    email_logs = [
+        EmailLog(alert=alert, recipient=user, recipient_email=user.email, status='pending')
+        for user in users
+    ]
+    if db_connection.features.can_return_rows_from_bulk_insert:
+        return EmailLog.objects.bulk_create(email_logs)
+    
+    # Backends that cannot return the new primary keys (MySQL)
+    for email_log in email_logs:
+        email_log.save()
+    return email_logs
+
+
+def alert_heartbeat(alert, interval=None):
+    """
+    Build a callable that refreshes the alert's heartbeat_at.
+    
+    Calls are cheap: the row is updated at most once per `interval`
+    seconds, whichever worker thread makes the call.
+    
+    Args:
+        alert: WeatherAlertNotification to keep alive
+        interval: Min seconds between updates (default ALERT_CAMPAIGN_HEARTBEAT_SECONDS)
+        
+    Returns:
+        callable: Takes no arguments
+    """
+    if interval is None:
+        interval = settings.ALERT_CAMPAIGN_HEARTBEAT_SECONDS
+    
+    last_beat = [time.monotonic()]
+    beat_lock = threading.Lock()
+    
+    def beat():
+        now = time.monotonic()
+        with beat_lock:
+            if now - last_beat[0] < interval:
+                return
+            last_beat[0] = now
+        WeatherAlertNotification.objects.filter(pk=alert.pk).update(heartbeat_at=timezone.now())
+    
+    return beat
+
+
+def deliver_alert_emails(alert, deliveries, concurrency=None, batch_size=None, heartbeat=None):
+    """
+    Send alert emails in batches, one mail connection per worker thread.
+    
+    Deliveries are split into batches of `batch_size`. Each worker opens a
+    single connection (get_connection()) on its first batch and reuses it
+    for every batch it takes, sending with send_email_batch(). Per batch,
+    the pending EmailLog rows are inserted with one bulk_create, the
+    outcomes written with one bulk_update, and the alert's
+    emails_sent_count / emails_failed_count incremented with one F()
+    update, each in a short transaction. Both transactions also refresh
+    the alert's heartbeat_at, and `heartbeat` keeps it fresh while a batch
+    is sending.
+    
+    Args:
+        alert: WeatherAlertNotification the EmailLog rows belong to
+        deliveries: List of (user, (weather_data, alerts)) pairs
+        concurrency: Worker threads (default ALERT_CAMPAIGN_CONCURRENCY)
+        batch_size: Messages per send_messages() call (default ALERT_CAMPAIGN_BATCH_SIZE)
+        heartbeat: Callable passed to send_email_batch (default alert_heartbeat(alert))
+        
+    Returns:
+        int: Number of emails sent
+    """
+    if concurrency is None:
+        concurrency = settings.ALERT_CAMPAIGN_CONCURRENCY
+    if batch_size is None:
+        batch_size = settings.ALERT_CAMPAIGN_BATCH_SIZE
+    if heartbeat is None:
+        heartbeat = alert_heartbeat(alert)
+    
+    worker_state = threading.local()
+    opened = []
+    opened_lock = threading.Lock()
+    
+    def worker_connection():
+        connection = getattr(worker_state, 'connection', None)
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+            try:
+                connection.open()
+            except Exception as e:
+                # send_email_batch reconnects and records the failure per message
+                print(f"[Notifications] SMTP connect failed: {e}")
+            worker_state.connection = connection
+            with opened_lock:
+                opened.append(connection)
+        return connection
+    
+    def deliver(batch):
+        connection = worker_connection()
+        
+        # One INSERT for the batch's pending rows; the heartbeat shows a running
+        # job is alive even when a chunk takes longer than ALERT_CAMPAIGN_STALE_SECONDS
+        with transaction.atomic():
+            email_logs = create_pending_email_logs(alert, [user for user, _ in batch])
+            WeatherAlertNotification.objects.filter(pk=alert.pk).update(heartbeat_at=timezone.now())
+        
+        sending_logs = []
+        messages = []
+        for email_log, (user, (weather_data, alerts)) in zip(email_logs, batch):
+            try:
+                messages.append(build_weather_alert_email(user, weather_data, alerts, connection))
+                sending_logs.append(email_log)
+            except Exception as e:
+                email_log.status = 'failed'
+                email_log.error_message = str(e)
+        
+        errors = send_email_batch(connection, messages, heartbeat)
+        
+        sent_at = timezone.now()
+        for email_log, error in zip(sending_logs, errors):
+            if error is None:
+                email_log.status = 'sent'
+                email_log.sent_at = sent_at
+            else:
+                email_log.status = 'failed'
+                email_log.error_message = error
+        
+        # One UPDATE for the outcomes and one for the alert's running total
+        sent = errors.count(None)
+        with transaction.atomic():
+            EmailLog.objects.bulk_update(email_logs, ['status', 'sent_at', 'error_message'])
+            WeatherAlertNotification.objects.filter(pk=alert.pk).update(
+                emails_sent_count=F('emails_sent_count') + sent,
+                emails_failed_count=F('emails_failed_count') + len(email_logs) - sent,
+                heartbeat_at=timezone.now()
+            )
+        return sent
+    
+    # Small campaigns still spread over every worker
+    batch_size = max(1, min(batch_size, -(-len(deliveries) // max(concurrency, 1))))
+    batches = [deliveries[i:i + batch_size] for i in range(0, len(deliveries), batch_size)]
+    try:
+        return sum(_map_concurrently(deliver, batches, concurrency))
+    finally:
+        for connection in opened:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def run_alert_campaign(alert, users, concurrency=None):
+    """
+    Send automated weather alerts to many users concurrently.
+    
+    Users are first grouped by weather tile. Weather is fetched and alerts
+    are evaluated once per cluster, then the emails are rendered per user
+    and sent in batches over one mail connection per worker; both stages
+    run on `concurrency` worker threads and refresh the alert's heartbeat
+    as they make progress.
+    
+    Args:
+        alert: WeatherAlertNotification the EmailLog rows belong to
+        users: Iterable of User instances with a location set
+        concurrency: Worker threads (default ALERT_CAMPAIGN_CONCURRENCY)
+        
+    Returns:
+        dict: total, clusters, sent, failed, seconds and sends_per_second
+    """
+    users = list(users)
+    if concurrency is None:
+        concurrency = settings.ALERT_CAMPAIGN_CONCURRENCY
+    
+    start = time.perf_counter()
+    heartbeat = alert_heartbeat(alert)
+    
+    # Stage 1: one weather fetch and alert evaluation per cluster
+    clusters = group_users_by_location(users)
+    cluster_keys = list(clusters)
+    
+    def fetch_cluster_weather(key):
+        weather = get_cluster_weather(clusters[key][0].location_lat, clusters[key][0].location_lon)
+        heartbeat()
+        return weather
+    
+    cluster_weather = dict(zip(cluster_keys, _map_concurrently(fetch_cluster_weather, cluster_keys, concurrency)))
+    
+    # Stage 2: fan the cluster's weather out to every member
+    deliveries = [
+        (user, cluster_weather[key])
+        for key, members in clusters.items()
+        for user in members
+    ]
+    sent_count = deliver_alert_emails(alert, deliveries, concurrency, heartbeat=heartbeat)
+    seconds = time.perf_counter() - start
+    
+    failed_count = len(deliveries) - sent_count
+    sends_per_second = round(sent_count / seconds, 2) if seconds > 0 else None
+    print(
+        f"[Notifications] Alert {alert.id}: {sent_count} sent, {failed_count} failed to "
+        f"{len(clusters)} location clusters in {seconds:.2f}s ({sends_per_second} sends/s)"
+    )
+    
+    return {
+        'total': len(users),
+        'clusters': len(clusters),
+        'sent': sent_count,
+        'failed': failed_count,
+        'seconds': round(seconds, 3),
+        'sends_per_second': sends_per_second
+    }
+
+
+def get_eligible_users():
+    """Active users with email alerts enabled, an email address and a location set."""
+    return User.objects.filter(
         is_active=True,
         receive_email_alerts=True,
         location_lat__isnull=False,
         location_lon__isnull=False
     ).exclude(email='')
+
+
+def get_campaign_recipients(alert):
+    """
+    Users a campaign job still has to consider, in processing (id) order.
+    
+    Args:
+        alert: WeatherAlertNotification campaign job
+        
+    Returns:
+        QuerySet of eligible users (target_users only for targeted alerts)
+    """
+    users = get_eligible_users()
+    if not alert.target_all_users:
+        users = users.filter(received_alerts=alert)
+    return users.order_by('id')
+
+
+def get_campaign_progress(alert):
+    """
+    Summarize a campaign job's progress.
+    
+    Args:
+        alert: WeatherAlertNotification campaign job
+        
+    Returns:
+        dict: status, counts, percent complete, timestamps and throughput
+    """
+    processed = alert.emails_sent_count + alert.emails_failed_count
+    seconds = None
+    if alert.started_at:
+        seconds = ((alert.finished_at or timezone.now()) - alert.started_at).total_seconds()
+    
+    return {
+        'alert_id': alert.id,
+        'status': alert.status,
+        'total': alert.total_recipients,
+        'sent': alert.emails_sent_count,
+        'failed': alert.emails_failed_count,
+        'processed': processed,
+        'percent': round(100 * processed / alert.total_recipients, 1) if alert.total_recipients else 100.0,
+        'started_at': alert.started_at.isoformat() if alert.started_at else None,
+        'finished_at': alert.finished_at.isoformat() if alert.finished_at else None,
+        'heartbeat_at': alert.heartbeat_at.isoformat() if alert.heartbeat_at else None,
+        'seconds': round(seconds, 3) if seconds is not None else None,
+        'sends_per_second': round(alert.emails_sent_count / seconds, 2) if seconds else None,
+        'error': alert.error_message or None
+    }
+
+
+def run_alert_campaign_job(alert_id, resume=False):
+    """
+    Execute a campaign job in checkpointed chunks.
+    
+    The job is claimed atomically, so only one worker runs it. Recipients
+    are processed in id order, ALERT_CAMPAIGN_CHUNK_SIZE at a time; after
+    each chunk the cursor is saved, and the heartbeat is refreshed while
+    cluster weather is fetched and by every delivery batch. Users that already have
+    an EmailLog for the alert are skipped, so a resumed job never emails
+    anyone twice (a chunk interrupted mid-send is at-most-once).
+    
+    Args:
+        alert_id: WeatherAlertNotification id
+        resume: Also claim failed jobs and running jobs whose heartbeat is
+                older than ALERT_CAMPAIGN_STALE_SECONDS (crashed workers)
+        
+    Returns:
+        WeatherAlertNotification, or None if the job could not be claimed
+    """
+    now = timezone.now()
+    claimable = Q(status='pending')
+    if resume:
+        stale_before = now - timedelta(seconds=settings.ALERT_CAMPAIGN_STALE_SECONDS)
+        claimable |= Q(status='failed') | Q(status='running', heartbeat_at__lt=stale_before)
+    
+    claimed = WeatherAlertNotification.objects.filter(claimable, pk=alert_id).update(
+        status='running',
+        heartbeat_at=now,
+        started_at=Coalesce('started_at', Value(now)),
+        error_message=''
+    )
+    if not claimed:
+        return None
+    
+    alert = WeatherAlertNotification.objects.get(pk=alert_id)
+    try:
+        while True:
+            chunk = list(
+                get_campaign_recipients(alert)
+                .filter(id__gt=alert.cursor)
+                .exclude(received_email_logs__alert=alert)[:settings.ALERT_CAMPAIGN_CHUNK_SIZE]
+            )
+            if not chunk:
+                break
+            
+            run_alert_campaign(alert, chunk)
+            
+            # Checkpoint
+            alert.cursor = chunk[-1].id
+            WeatherAlertNotification.objects.filter(pk=alert.pk).update(
+                cursor=alert.cursor,
+                heartbeat_at=timezone.now()
+            )
+    except Exception as e:
+        print(f"[Notifications] Campaign {alert.id} failed at cursor {alert.cursor}: {e}")
+        WeatherAlertNotification.objects.filter(pk=alert.pk).update(
+            status='failed',
+            error_message=str(e),
+            heartbeat_at=timezone.now()
+        )
+    else:
+        finished_at = timezone.now()
+        WeatherAlertNotification.objects.filter(pk=alert.pk).update(
+            status='completed',
+            finished_at=finished_at,
+            heartbeat_at=finished_at
+        )
+    
+    alert.refresh_from_db()
+    return alert
+
+
+def start_alert_campaign(alert, background=False):
+    """
+    Run a pending campaign job now, or on the background pool once the
+    current transaction commits.
     
-    if not users.exists():
+    Returns:
+        dict: API response summary
+    """
+    if background:
+        submit_on_commit(run_alert_campaign_job, alert.id)
+        return {
+            'success': True,
+            'message': f'Sending weather alerts to {alert.total_recipients} farmers',
+            **get_campaign_progress(alert)
+        }
+    
+    alert = run_alert_campaign_job(alert.id)
+    return {
+        'success': alert.status == 'completed',
+        'message': f'Weather alerts sent to {alert.emails_sent_count} farmers',
+        **get_campaign_progress(alert)
+    }
+
+
+def send_weather_alerts_to_all_users(admin_user, background=False):
+    """
+    Send automated weather alerts to all users with email alerts enabled and location set.
+    
+    Args:
+        admin_user: Admin user who triggered the send
+        background: Return immediately and run the campaign job on the
+                    background pool
+        
+    Returns:
+        dict: Summary of sent emails (job progress when background)
+    """
+    # Get users with email alerts enabled and location set
+    total = get_eligible_users().count()
+    
+    if not total:
         return {
             'success': False,
             'message': 'No users with email alerts enabled and location set',
@@ -339,60 +917,37 @@ def send_weather_alerts_to_all_users(admin_user):
             'failed': 0
         }
     
-    # Create alert notification record
+    # Create alert notification record as a pending campaign job
     alert = WeatherAlertNotification.objects.create(
         title='Automated Weather Alert',
         message='Personalized weather data sent to farmers based on their location',
         alert_type='general',
         severity='info',
         created_by=admin_user,
-        target_all_users=True
+        target_all_users=True,
+        status='pending',
+        total_recipients=total
     )
     
-    sent_count = 0
-    failed_count = 0
-    
-    for user in users:
-        result = send_automated_weather_alert(user, alert)
-        if result and result.status == 'sent':
-            sent_count += 1
-        else:
-            failed_count += 1
-    
-    # Update alert with counts
-    alert.emails_sent_count = sent_count
-    alert.save()
-    
-    return {
-        'success': True,
-        'message': f'Weather alerts sent to {sent_count} farmers',
-        'alert_id': alert.id,
-        'total': users.count(),
-        'sent': sent_count,
-        'failed': failed_count
-    }
+    return start_alert_campaign(alert, background)
 
 
-def send_weather_alerts_to_specific_users(admin_user, user_ids):
+def send_weather_alerts_to_specific_users(admin_user, user_ids, background=False):
     """
     Send automated weather alerts to specific users.
     
     Args:
         admin_user: Admin user who triggered the send
         user_ids: List of user IDs
+        background: Return immediately and run the campaign job on the
+                    background pool
         
     Returns:
-        dict: Summary of sent emails
+        dict: Summary of sent emails (job progress when background)
     """
-    users = User.objects.filter(
-        id__in=user_ids,
-        is_active=True,
-        receive_email_alerts=True,
-        location_lat__isnull=False,
-        location_lon__isnull=False
-    ).exclude(email='')
+    users = list(get_eligible_users().filter(id__in=user_ids))
     
-    if not users.exists():
+    if not users:
         return {
             'success': False,
             'message': 'No valid users found with the provided IDs',
@@ -401,36 +956,17 @@ def send_weather_alerts_to_specific_users(admin_user, user_ids):
             'failed': 0
         }
     
-    # Create alert notification record
+    # Create alert notification record as a pending campaign job
     alert = WeatherAlertNotification.objects.create(
         title='Targeted Weather Alert',
-        message=f'Personalized weather data sent to {users.count()} selected farmers',
+        message=f'Personalized weather data sent to {len(users)} selected farmers',
         alert_type='general',
         severity='info',
         created_by=admin_user,
-        target_all_users=False
+        target_all_users=False,
+        status='pending',
+        total_recipients=len(users)
     )
-    
-    sent_count = 0
-    failed_count = 0
-    
-    for user in users:
-        result = send_automated_weather_alert(user, alert)
-        if result and result.status == 'sent':
-            sent_count += 1
-        else:
-            failed_count += 1
-    
-    # Update alert
-    alert.emails_sent_count = sent_count
     alert.target_users.set(users)
-    alert.save()
     
-    return {
-        'success': True,
-        'message': f'Weather alerts sent to {sent_count} farmers',
-        'alert_id': alert.id,
-        'total': users.count(),
-        'sent': sent_count,
-        'failed': failed_count
-    }
+    return start_alert_campaign(alert, background)
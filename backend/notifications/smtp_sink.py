@@ -0,0 +1,130 @@
+"""
+Local SMTP stand-in for benchmarks and tests.
+
+A minimal threaded SMTP server that accepts and records every message
+without delivering it. It can simulate the cost of a real provider's
+connection setup (TCP + TLS handshake + AUTH) and per-message processing,
+refuse chosen recipients, and drop connections after a number of messages.
+
+Usage:
+    with LocalSMTPServer(connect_delay=0.1) as server:
+        # EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.port, EMAIL_USE_TLS=False
+        ...
+    print(server.connections, len(server.messages))
+"""
+
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """One SMTP session."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server.sink
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.connect_delay)
+        self.reply('220 localhost SMTP sink ready')
+
+        mail_from = None
+        recipients = []
+        accepted = 0
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                if server.drop_after is not None and accepted >= server.drop_after:
+                    # Simulate the provider closing the connection
+                    return
+                mail_from = command[10:].strip()
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command[8:].strip().strip('<>')
+                if address in server.refuse:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data_line)
+                time.sleep(server.message_delay)
+                with server.lock:
+                    server.messages.append((mail_from, recipients, b''.join(lines)))
+                accepted += 1
+                self.reply('250 OK queued')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPServer:
+    """
+    Threaded SMTP sink listening on 127.0.0.1.
+
+    Args:
+        connect_delay: Seconds to wait before the greeting on each connection
+        message_delay: Seconds to wait before accepting each message
+        refuse: Recipient addresses to reject with 550
+        drop_after: Close each connection at the next MAIL after this many messages
+        port: Port to listen on (0 picks a free port)
+    """
+
+    def __init__(self, connect_delay=0.0, message_delay=0.0, refuse=(), drop_after=None, port=0):
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.refuse = set(refuse)
+        self.drop_after = drop_after
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+
+        self._server = _ThreadingSMTPServer(('127.0.0.1', port), _SMTPHandler)
+        self._server.sink = self
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='smtp-sink', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,376 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.test.utils import CaptureQueriesContext
+from accounts.models import User
+from weather.client import get_tile_hash, store_payload
+from .models import WeatherAlertNotification, EmailLog
+from .services import (
+    _map_concurrently,
+    deliver_alert_emails,
+    get_weather_alerts_for_location,
+    run_alert_campaign,
+    run_alert_campaign_job,
+    send_email_batch,
+    send_weather_alerts_to_all_users,
+)
+from .smtp_sink import LocalSMTPServer
+
+
+WEATHER = {
+    'temperature': 36.0, 'feels_like': 38.0, 'humidity': 50, 'pressure': 1008,
+    'wind_speed': 10.0, 'description': 'Clear Sky', 'icon': '01d',
+    'city': 'Kuala Lumpur', 'country': 'MY',
+}
+
+
+@override_settings(ALERT_CAMPAIGN_CONCURRENCY=1)
+class AlertCampaignTest(TestCase):
+    """Test cases for the concurrent weather alert campaign executor."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            username='admin',
+            password='testpass123',
+            role='ADMIN'
+        )
+        self.users = [
+            User.objects.create(
+                email=f'farmer{index}@example.com',
+                username=f'farmer{index}',
+                location_lat=3.1390,
+                location_lon=101.6869,
+                receive_email_alerts=True
+            )
+            for index in range(12)
+        ]
+        self.alert = WeatherAlertNotification.objects.create(
+            title='Automated Weather Alert',
+            message='Test campaign',
+            created_by=self.admin
+        )
+
+    def test_workers_share_the_items(self):
+        """Every item is processed exactly once, results come back in order."""
+        threads = set()
+        threads_lock = threading.Lock()
+
+        def square(value):
+            with threads_lock:
+                threads.add(threading.current_thread().name)
+            return value * value
+
+        results = _map_concurrently(square, list(range(100)), 4)
+
+        self.assertEqual(results, [value * value for value in range(100)])
+        self.assertLessEqual(len(threads), 4)
+
+    def test_weather_is_fetched_once_per_cluster(self):
+        """Users in the same weather tile share one fetch and alert evaluation."""
+        penang = User.objects.create(
+            email='penang@example.com',
+            username='penang',
+            location_lat=5.4164,
+            location_lon=100.3327,
+            receive_email_alerts=True
+        )
+
+        with mock.patch('notifications.services.get_weather_for_location', return_value=WEATHER) as fetch:
+            result = run_alert_campaign(self.alert, self.users + [penang])
+
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(result['clusters'], 2)
+        self.assertEqual(result['sent'], 13)
+        self.assertEqual(len(mail.outbox), 13)
+        self.assertIn('HEAT WARNING', mail.outbox[0].alternatives[0][0])
+        self.assertEqual(EmailLog.objects.filter(alert=self.alert, status='sent').count(), 13)
+
+    def test_email_logs_are_written_in_bulk(self):
+        """Logging queries per batch do not grow with the number of recipients."""
+        cluster_weather = (WEATHER, get_weather_alerts_for_location(WEATHER))
+        deliveries = [(user, cluster_weather) for user in self.users]
+
+        with CaptureQueriesContext(connection) as queries:
+            sent = deliver_alert_emails(self.alert, deliveries, concurrency=1, batch_size=50)
+
+        self.assertEqual(sent, 12)
+        self.assertLess(len(queries), 12)
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.emails_sent_count, 12)
+        self.assertEqual(EmailLog.objects.filter(alert=self.alert, status='sent', sent_at__isnull=False).count(), 12)
+
+    def test_send_to_all_reports_throughput(self):
+        """Sending to all users records the sent count and reports throughput."""
+        with mock.patch('notifications.services.get_weather_for_location', return_value=WEATHER):
+            result = send_weather_alerts_to_all_users(self.admin)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['sent'], 12)
+        self.assertIn('sends_per_second', result)
+        alert = WeatherAlertNotification.objects.get(id=result['alert_id'])
+        self.assertEqual(alert.emails_sent_count, 12)
+
+
+@override_settings(ALERT_CAMPAIGN_CONCURRENCY=1, ALERT_CAMPAIGN_CHUNK_SIZE=5)
+class CampaignJobTest(TestCase):
+    """Test cases for durable, resumable alert campaign jobs."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            username='admin',
+            password='testpass123',
+            role='ADMIN'
+        )
+        self.users = [
+            User.objects.create(
+                email=f'farmer{index}@example.com',
+                username=f'farmer{index}',
+                location_lat=3.1390,
+                location_lon=101.6869,
+                receive_email_alerts=True
+            )
+            for index in range(12)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def create_job(self, **fields):
+        return WeatherAlertNotification.objects.create(
+            title='Automated Weather Alert',
+            message='Test campaign',
+            created_by=self.admin,
+            status='pending',
+            total_recipients=len(self.users),
+            **fields
+        )
+
+    def test_job_runs_in_checkpointed_chunks(self):
+        """A pending job is claimed, processed chunk by chunk and completed."""
+        alert = self.create_job()
+
+        with mock.patch('notifications.services.get_weather_for_location', return_value=WEATHER):
+            alert = run_alert_campaign_job(alert.id)
+
+        self.assertEqual(alert.status, 'completed')
+        self.assertEqual(alert.emails_sent_count, 12)
+        self.assertEqual(alert.cursor, self.users[-1].id)
+        self.assertIsNotNone(alert.finished_at)
+        self.assertEqual(len(mail.outbox), 12)
+        # Only pending (or, when resuming, stalled/failed) jobs can be claimed
+        self.assertIsNone(run_alert_campaign_job(alert.id, resume=True))
+
+    @override_settings(ALERT_CAMPAIGN_BATCH_SIZE=3)
+    def test_heartbeat_is_refreshed_per_delivery_batch(self):
+        """A long chunk keeps the heartbeat fresh, so the running job is not resumed as stalled."""
+        alert = self.create_job()
+        heartbeats = []
+
+        def send_and_record(connection, messages, heartbeat=None):
+            heartbeats.append(WeatherAlertNotification.objects.get(pk=alert.pk).heartbeat_at)
+            return send_email_batch(connection, messages, heartbeat)
+
+        with mock.patch('notifications.services.get_weather_for_location', return_value=WEATHER), \
+                mock.patch('notifications.services.send_email_batch', side_effect=send_and_record):
+            run_alert_campaign_job(alert.id)
+
+        # A single chunk of 12 recipients: every batch refreshed the heartbeat
+        # set when the job was claimed (started_at) before sending
+        started_at = WeatherAlertNotification.objects.get(pk=alert.pk).started_at
+        self.assertGreaterEqual(len(heartbeats), 4)
+        self.assertTrue(all(heartbeat > started_at for heartbeat in heartbeats))
+
+    @override_settings(ALERT_CAMPAIGN_HEARTBEAT_SECONDS=0)
+    def test_heartbeat_is_refreshed_while_fetching_cluster_weather(self):
+        """Slow weather fetches before the first delivery batch still keep the job alive."""
+        alert = self.create_job(heartbeat_at=timezone.now() - timedelta(hours=1))
+        for index, user in enumerate(self.users):
+            user.location_lat = 3.0 + index
+            user.save(update_fields=['location_lat'])
+        heartbeats = []
+
+        def fetch_and_record(lat, lon):
+            heartbeats.append(WeatherAlertNotification.objects.get(pk=alert.pk).heartbeat_at)
+            return WEATHER, []
+
+        with mock.patch('notifications.services.get_cluster_weather', side_effect=fetch_and_record), \
+                mock.patch('notifications.services.deliver_alert_emails', return_value=0):
+            run_alert_campaign(alert, self.users, concurrency=1)
+
+        # Every fetch after the first sees the heartbeat left by the previous one
+        self.assertEqual(len(heartbeats), 12)
+        self.assertTrue(all(later > heartbeats[0] for later in heartbeats[1:]))
+        self.assertGreater(WeatherAlertNotification.objects.get(pk=alert.pk).heartbeat_at, heartbeats[-1])
+
+    def test_resume_skips_recipients_already_emailed(self):
+        """A job that crashed mid-run resumes without emailing anyone twice."""
+        alert = self.create_job()
+
+        def crash_on_second_chunk(alert, users, concurrency=None):
+            if users[0].id > self.users[4].id:
+                raise RuntimeError('worker died')
+            return run_alert_campaign(alert, users, concurrency)
+
+        with mock.patch('notifications.services.get_weather_for_location', return_value=WEATHER):
+            with mock.patch('notifications.services.run_alert_campaign', side_effect=crash_on_second_chunk):
+                alert = run_alert_campaign_job(alert.id)
+
+            self.assertEqual(alert.status, 'failed')
+            self.assertEqual(alert.cursor, self.users[4].id)
+            self.assertEqual(alert.error_message, 'worker died')
+
+            # Lose the checkpoint too: already-logged recipients are still skipped
+            WeatherAlertNotification.objects.filter(pk=alert.pk).update(cursor=0)
+            self.assertIsNone(run_alert_campaign_job(alert.id))
+            alert = run_alert_campaign_job(alert.id, resume=True)
+
+        self.assertEqual(alert.status, 'completed')
+        self.assertEqual(alert.emails_sent_count, 12)
+        self.assertEqual(len(mail.outbox), 12)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(user.email for user in self.users))
+
+    def test_post_returns_job_and_progress_is_reported(self):
+        """Sending returns 202 with the job id; the progress endpoint tracks it."""
+        with mock.patch('notifications.services.submit_on_commit') as submit:
+            response = self.client.post(reverse('send-alerts'), {'send_to_all': True}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        alert_id = response.data['alert_id']
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response.data['total'], 12)
+        self.assertEqual(response.data['progress_url'], reverse('alert-progress', args=[alert_id]))
+        submit.assert_called_once_with(run_alert_campaign_job, alert_id)
+
+        with mock.patch('notifications.services.get_weather_for_location', return_value=WEATHER):
+            run_alert_campaign_job(alert_id)
+
+        progress = self.client.get(response.data['progress_url']).data
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual(progress['sent'], 12)
+        self.assertEqual(progress['percent'], 100.0)
+
+
+class EligibleUsersViewTest(TestCase):
+    """Test cases for the paginated, cache-only eligible users list."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            username='admin',
+            password='testpass123',
+            role='ADMIN'
+        )
+        # 30 farmers in Kuala Lumpur, 5 in Penang, 2 without a full location
+        for index in range(35):
+            lat, lon = (3.1390, 101.6869) if index < 30 else (5.4164, 100.3327)
+            User.objects.create(
+                email=f'farmer{index:02d}@example.com',
+                username=f'farmer{index:02d}',
+                location_lat=lat,
+                location_lon=lon,
+                receive_email_alerts=True
+            )
+        User.objects.create(email='nolat@example.com', username='nolat', location_lon=101.6869, receive_email_alerts=True)
+        User.objects.create(email='nolon@example.com', username='nolon', location_lat=3.1390, receive_email_alerts=True)
+
+        store_payload('weather', get_tile_hash(3.1390, 101.6869), {
+            'main': {'temp': 31.24, 'feels_like': 35.0, 'humidity': 70, 'pressure': 1009},
+            'wind': {'speed': 2.0},
+            'weather': [{'description': 'light rain', 'icon': '10d'}],
+            'name': 'Kuala Lumpur',
+        })
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_pages_are_served_from_cache_only(self):
+        """Previews never call upstream; uncached tiles are queued for background fill."""
+        with mock.patch('weather.client.request_upstream') as upstream, \
+                mock.patch('notifications.services.submit') as submit:
+            response = self.client.get(reverse('eligible-users'), {'page': 2, 'page_size': 20})
+            self.client.get(reverse('eligible-users'), {'page': 2, 'page_size': 20})
+
+        upstream.assert_not_called()
+        # The Penang tile is queued once, not on every request
+        submit.assert_called_once()
+
+        eligible = response.data['eligible_users']
+        self.assertEqual(eligible['count'], 35)
+        self.assertEqual(eligible['num_pages'], 2)
+        self.assertEqual(eligible['previews_pending'], 1)
+        self.assertEqual(len(eligible['users']), 15)
+        previews = {user['username']: user['weather_preview'] for user in eligible['users']}
+        self.assertEqual(previews['farmer20']['temperature'], 31.2)
+        self.assertIsNone(previews['farmer34'])
+        self.assertEqual(response.data['users_without_location']['count'], 2)
+
+    def test_query_count_does_not_grow_with_users(self):
+        """A page costs the same number of queries at any page size."""
+        cache.clear()
+        with mock.patch('notifications.services.submit'):
+            with CaptureQueriesContext(connection) as small:
+                self.client.get(reverse('eligible-users'), {'page_size': 5})
+            cache.clear()
+            with CaptureQueriesContext(connection) as large:
+                self.client.get(reverse('eligible-users'), {'page_size': 35})
+
+        self.assertEqual(len(small), len(large))
+
+
+class SMTPBatchTest(TestCase):
+    """Test cases for batched sending over one SMTP connection."""
+
+    def smtp_connection(self, server):
+        return get_connection(
+            'django.core.mail.backends.smtp.EmailBackend',
+            host='127.0.0.1',
+            port=server.port,
+            username='',
+            password='',
+            use_tls=False,
+            use_ssl=False,
+            fail_silently=False
+        )
+
+    def messages(self, count):
+        return [
+            EmailMessage('Weather', 'Body', 'noreply@example.com', [f'farmer{index}@example.com'])
+            for index in range(count)
+        ]
+
+    def test_one_connection_for_the_batch(self):
+        """A batch goes over a single SMTP connection."""
+        with LocalSMTPServer() as server:
+            connection = self.smtp_connection(server)
+            connection.open()
+            errors = send_email_batch(connection, self.messages(10))
+            connection.close()
+
+        self.assertEqual(errors, [None] * 10)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(len(server.messages), 10)
+
+    def test_reconnects_and_reports_each_message(self):
+        """Dropped connections are re-opened without re-sending; refusals fail one message."""
+        with LocalSMTPServer(drop_after=3, refuse={'farmer5@example.com'}) as server:
+            connection = self.smtp_connection(server)
+            connection.open()
+            heartbeat = mock.Mock()
+            errors = send_email_batch(connection, self.messages(10), heartbeat)
+            connection.close()
+
+        self.assertEqual([index for index, error in enumerate(errors) if error], [5])
+        # Once per message attempt and once per reconnect
+        self.assertGreaterEqual(heartbeat.call_count, 12)
+        delivered = sorted(recipients[0] for _, recipients, _ in server.messages)
+        self.assertEqual(delivered, sorted(f'farmer{index}@example.com' for index in range(10) if index != 5))
+        self.assertEqual(server.connections, 3)
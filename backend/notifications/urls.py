@@ -7,6 +7,7 @@ from .views import (
     SendWeatherAlertsView,
     AlertHistoryView,
     AlertDetailView,
+    AlertProgressView,
     AlertStatsView
 )
 
@@ -17,4 +18,5 @@ urlpatterns = [
     path('history/', AlertHistoryView.as_view(), name='alert-history'),
     path('stats/', AlertStatsView.as_view(), name='alert-stats'),
     path('<int:alert_id>/', AlertDetailView.as_view(), name='alert-detail'),
+    path('alerts/<int:alert_id>/progress/', AlertProgressView.as_view(), name='alert-progress'),
 ]
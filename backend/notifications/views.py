@@ -2,6 +2,9 @@
 API views for notification management.
 Admin-only endpoints for sending automated weather alerts to farmers.
 """
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -12,64 +15,75 @@ from .models import WeatherAlertNotification, EmailLog
 from .services import (
     send_weather_alerts_to_all_users,
     send_weather_alerts_to_specific_users,
-    get_weather_for_location
+    get_campaign_progress,
+    get_cached_weather_previews,
+    get_eligible_users
 )
 
 
+class EligibleUsersPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 class AlertEligibleUsersView(APIView):
     """
-    GET: List all users eligible for weather alerts.
+    GET: List users eligible for weather alerts, one page at a time.
     (Users with email alerts enabled AND location set)
     Admin only.
+    
+    Weather previews come from the shared weather cache only; tiles that
+    are not cached have a null preview and are filled in the background
+    (previews_pending counts them), so the response time does not depend
+    on OpenWeatherMap or on the number of users.
+    
+    Query params:
+        page: Page number (default 1)
+        page_size: Users per page (default PAGE_SIZE, max 100)
     """
     permission_classes = [IsAdminUser]
     
     def get(self, request):
         # Users with email alerts and location
-        users = User.objects.filter(
-            is_active=True,
-            receive_email_alerts=True,
-            location_lat__isnull=False,
-            location_lon__isnull=False
-        ).exclude(email='').order_by('username')
+        users = get_eligible_users().order_by('username', 'id')
+        
+        paginator = EligibleUsersPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        previews, previews_pending = get_cached_weather_previews(page)
         
-        user_list = []
-        for user in users:
-            # Optionally fetch weather preview
-            weather = get_weather_for_location(user.location_lat, user.location_lon)
-            user_list.append({
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'location_lat': user.location_lat,
-                'location_lon': user.location_lon,
-                'weather_preview': {
-                    'temperature': weather['temperature'] if weather else None,
-                    'description': weather['description'] if weather else None,
-                    'city': weather['city'] if weather else None
-                } if weather else None
-            })
+        user_list = [{
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'location_lat': user.location_lat,
+            'location_lon': user.location_lon,
+            'weather_preview': {
+                'temperature': previews[user.id]['temperature'],
+                'description': previews[user.id]['description'],
+                'city': previews[user.id]['city']
+            } if previews[user.id] else None
+        } for user in page]
         
-        # Also get users with alerts enabled but no location
+        # Also count users with alerts enabled but no location
         users_no_location = User.objects.filter(
+            Q(location_lat__isnull=True) | Q(location_lon__isnull=True),
             is_active=True,
             receive_email_alerts=True
-        ).filter(
-            location_lat__isnull=True
-        ) | User.objects.filter(
-            is_active=True,
-            receive_email_alerts=True
-        ).filter(
-            location_lon__isnull=True
-        )
+        ).count()
         
         return Response({
             'eligible_users': {
-                'count': len(user_list),
+                'count': paginator.page.paginator.count,
+                'page': paginator.page.number,
+                'page_size': paginator.get_page_size(request),
+                'num_pages': paginator.page.paginator.num_pages,
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'previews_pending': previews_pending,
                 'users': user_list
             },
             'users_without_location': {
-                'count': users_no_location.count(),
+                'count': users_no_location,
                 'message': 'These users have alerts enabled but no location set'
             }
         })
@@ -80,6 +94,9 @@ class SendWeatherAlertsView(APIView):
     POST: Send automated weather alerts to all eligible users or specific users.
     Admin only.
     
+    The campaign runs as a background job; the response (202) carries the
+    job's alert_id and progress_url to poll.
+    
     Request body:
     {
         "send_to_all": true  // Sends to all eligible users
@@ -96,17 +113,18 @@ class SendWeatherAlertsView(APIView):
         send_to_all = request.data.get('send_to_all', True)
         
         if send_to_all:
-            result = send_weather_alerts_to_all_users(request.user)
+            result = send_weather_alerts_to_all_users(request.user, background=True)
         else:
             user_ids = request.data.get('user_ids', [])
             if not user_ids:
                 return Response({
                     'error': 'user_ids required when send_to_all is false'
                 }, status=status.HTTP_400_BAD_REQUEST)
-            result = send_weather_alerts_to_specific_users(request.user, user_ids)
+            result = send_weather_alerts_to_specific_users(request.user, user_ids, background=True)
         
         if result['success']:
-            return Response(result, status=status.HTTP_201_CREATED)
+            result['progress_url'] = reverse('alert-progress', args=[result['alert_id']])
+            return Response(result, status=status.HTTP_202_ACCEPTED)
         else:
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
@@ -130,6 +148,9 @@ class AlertHistoryView(APIView):
             'created_by': alert.created_by.username if alert.created_by else 'System',
             'created_at': alert.created_at.isoformat(),
             'emails_sent_count': alert.emails_sent_count,
+            'emails_failed_count': alert.emails_failed_count,
+            'total_recipients': alert.total_recipients,
+            'status': alert.status,
             'target_all_users': alert.target_all_users
         } for alert in alerts]
         
@@ -166,6 +187,9 @@ class AlertDetailView(APIView):
                 'created_by': alert.created_by.username if alert.created_by else 'System',
                 'created_at': alert.created_at.isoformat(),
                 'emails_sent_count': alert.emails_sent_count,
+                'emails_failed_count': alert.emails_failed_count,
+                'total_recipients': alert.total_recipients,
+                'status': alert.status,
                 'target_all_users': alert.target_all_users
             },
             'email_logs': [{
@@ -179,6 +203,24 @@ class AlertDetailView(APIView):
         })
 
 
+class AlertProgressView(APIView):
+    """
+    GET: Get the progress of an alert campaign job.
+    Admin only.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, alert_id):
+        try:
+            alert = WeatherAlertNotification.objects.get(id=alert_id)
+        except WeatherAlertNotification.DoesNotExist:
+            return Response({
+                'error': 'Alert not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(get_campaign_progress(alert))
+
+
 class AlertStatsView(APIView):
     """
     GET: Get statistics for admin dashboard.
@@ -6,8 +6,8 @@ from .models import Recommendation
 class RecommendationAdmin(admin.ModelAdmin):
     """Admin configuration for Recommendation model."""
     
-    list_display = ('id', 'crop_name', 'get_user', 'created_at')
-    list_filter = ('crop_name', 'created_at')
+    list_display = ('id', 'crop_name', 'get_user', 'explanation_status', 'created_at')
+    list_filter = ('crop_name', 'explanation_status', 'created_at')
     search_fields = ('crop_name', 'input__user__username', 'input__user__email')
     readonly_fields = ('created_at',)
     ordering = ('-created_at',)
@@ -0,0 +1,42 @@
+"""
+Finish deferred recommendations whose background task was lost.
+
+Explanations and farming guides for deferred recommendations run on the
+in-process background pool, so a worker restart or deploy leaves them
+PENDING or RUNNING and clients polling the status endpoint forever. This
+command picks up those without progress for RECOMMENDATION_STALE_SECONDS
+and runs the background part again, or with --expire marks them FAILED
+instead.
+
+Run after a deploy or restart, or from cron.
+
+Usage:
+    python manage.py resume_recommendations
+    python manage.py resume_recommendations --expire
+"""
+from django.core.management.base import BaseCommand
+from recommendations.services import get_stale_recommendations, resume_recommendation
+
+
+class Command(BaseCommand):
+    help = 'Resume (or expire) deferred recommendations stuck in PENDING or RUNNING'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expire', action='store_true', help='Mark stale recommendations FAILED instead of resuming them')
+
+    def handle(self, *args, **options):
+        stale = get_stale_recommendations()
+
+        if options['expire']:
+            expired = stale.update(explanation_status='FAILED')
+            self.stdout.write(f'Expired {expired} stale recommendations')
+            return
+
+        recommendation_ids = list(stale.values_list('id', flat=True))
+        if not recommendation_ids:
+            self.stdout.write('No recommendations to resume')
+            return
+
+        for recommendation_id in recommendation_ids:
+            recommendation = resume_recommendation(recommendation_id)
+            self.stdout.write(f'Recommendation {recommendation_id}: {recommendation.explanation_status}')
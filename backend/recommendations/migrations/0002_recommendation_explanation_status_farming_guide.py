@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-16 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendation',
+            name='explanation_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', help_text='Status of the explanation and farming guide generation', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='recommendation',
+            name='farming_guide',
+            field=models.JSONField(blank=True, help_text='AI-generated farming guide', null=True),
+        ),
+        migrations.AlterField(
+            model_name='recommendation',
+            name='explanation',
+            field=models.TextField(blank=True, help_text='XAI explanation for the recommendation'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_recommendation_explanation_status_farming_guide'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendation',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last progress of the background task', null=True),
+        ),
+    ]
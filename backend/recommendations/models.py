@@ -13,16 +13,34 @@ class Recommendation(models.Model):
     - input: Related soil input data
     - crop_name: Recommended crop
     - explanation: XAI-generated explanation
+    - explanation_status: Progress of the deferred explanation/farming guide
+    - farming_guide: AI farming guide (JSON), filled in by the background task
+    - heartbeat_at: Last progress of the background task (set when it starts RUNNING)
     - created_at: Timestamp of recommendation
     """
     
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+    
     input = models.ForeignKey(
         SoilInput,
         on_delete=models.CASCADE,
         related_name='recommendations'
     )
     crop_name = models.CharField(max_length=100, help_text='Recommended crop name')
-    explanation = models.TextField(help_text='XAI explanation for the recommendation')
+    explanation = models.TextField(blank=True, help_text='XAI explanation for the recommendation')
+    explanation_status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='READY',
+        help_text='Status of the explanation and farming guide generation'
+    )
+    farming_guide = models.JSONField(null=True, blank=True, help_text='AI-generated farming guide')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text='Last progress of the background task')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -14,5 +14,17 @@ class RecommendationSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Recommendation
-        fields = ['id', 'input', 'soil_input', 'user_email', 'crop_name', 'explanation', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = [
+            'id', 'input', 'soil_input', 'user_email', 'crop_name', 'explanation',
+            'explanation_status', 'farming_guide', 'created_at'
+        ]
+        read_only_fields = ['id', 'explanation_status', 'farming_guide', 'created_at']
+
+
+class RecommendationStatusSerializer(serializers.ModelSerializer):
+    """Lightweight serializer for polling a deferred recommendation."""
+    
+    class Meta:
+        model = Recommendation
+        fields = ['id', 'crop_name', 'explanation_status', 'explanation', 'farming_guide']
+        read_only_fields = fields
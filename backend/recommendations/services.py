@@ -1,37 +1,79 @@
 """
 Service functions for creating and managing recommendations.
 """
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from .models import Recommendation
-from ml_engine.services import load_model, predict_crop
-from explainable_ai.services import generate_explanation
+from ml_engine.services import ModelVersionMismatch, predict_crop_detailed, get_model_bundle, use_model_bundle
+from ml_engine.prediction_cache import get_cached_prediction, cache_prediction
+from explainable_ai.services import generate_explanation, generate_ai_farming_guide
 from cyber_layer.services import post_ml_checks
+from securecrop.background import submit_on_commit
 
 
-def create_recommendation_for_input(soil_input):
+def create_recommendation_for_input(soil_input, defer=False):
     """
     Create a crop recommendation for the given soil input.
     
     Steps:
-    1. Load ML model
-    2. Predict crop and confidence
-    3. Generate XAI explanation
-    4. Run post-ML security checks
-    5. Save and return recommendation
+    1. Reuse a cached result for the same reading and model version, or:
+       predict crop and confidence, then generate the XAI explanation
+       from the same scaled features and predicted class
+    2. Run post-ML security checks
+    3. Save and return recommendation
+    
+    With defer=True only the prediction runs in the request: the
+    recommendation is saved with explanation_status='PENDING' and
+    complete_recommendation() computes the explanation, post-ML checks and
+    farming guide on the background pool once the transaction commits.
     
     Args:
         soil_input: SoilInput instance
+        defer: Move the slow steps to a background task
         
     Returns:
         Recommendation instance
     """
-    # Load the trained model
-    model = load_model()
+    model_version = get_model_bundle().version
+    cached = get_cached_prediction(soil_input.integrity_hash, model_version)
+    features_scaled = class_index = None
+    
+    if cached is not None:
+        crop_name = cached['crop_name']
+        probability = cached['probability']
+        explanation = cached['explanation']
+    else:
+        # Predict crop (keeps the scaled features and class index for SHAP)
+        crop_name, probability, features_scaled, class_index = predict_crop_detailed(soil_input)
+        explanation = None
     
-    # Predict crop
-    crop_name, probability = predict_crop(soil_input, model)
+    if defer:
+        recommendation = Recommendation.objects.create(
+            input=soil_input,
+            crop_name=crop_name,
+            explanation=explanation or '',
+            explanation_status='PENDING'
+        )
+        submit_on_commit(
+            complete_recommendation,
+            recommendation.id, probability, features_scaled, class_index, model_version
+        )
+        return recommendation
     
-    # Generate XAI explanation
-    explanation = generate_explanation(model, soil_input)
+    if explanation is None:
+        # Generate XAI explanation from the same prediction (exact or fast per EXPLANATION_MODE)
+        explanation, probability, model_version = explain_prediction(
+            soil_input, crop_name, probability, features_scaled, class_index, model_version
+        )
+        
+        cache_prediction(soil_input.integrity_hash, model_version, {
+            'crop_name': crop_name,
+            'probability': float(probability),
+            'explanation': explanation
+        })
     
     # Run post-ML security checks
     post_ml_checks(crop_name, probability, soil_input)
@@ -44,3 +86,169 @@ def create_recommendation_for_input(soil_input):
     )
     
     return recommendation
+
+
+def complete_recommendation(recommendation_id, probability, features_scaled=None,
+                            class_index=None, model_version=None):
+    """
+    Background part of a deferred recommendation.
+    
+    Runs the post-ML security checks, generates the XAI explanation (unless
+    it came from the prediction cache) and the AI farming guide, saving
+    each as soon as it is ready. Progress is tracked in explanation_status,
+    and heartbeat_at is refreshed when the task starts and after each step.
+    
+    Args:
+        recommendation_id: Recommendation saved by create_recommendation_for_input(defer=True)
+        probability: Confidence of the prediction
+        features_scaled: Scaled features from the prediction
+        class_index: Predicted class index from the prediction
+        model_version: Model version used for the prediction (cache key)
+    """
+    recommendation = Recommendation.objects.select_related('input').get(pk=recommendation_id)
+    soil_input = recommendation.input
+    Recommendation.objects.filter(pk=recommendation_id).update(
+        explanation_status='RUNNING',
+        heartbeat_at=timezone.now()
+    )
+    
+    try:
+        post_ml_checks(recommendation.crop_name, probability, soil_input)
+        
+        if not recommendation.explanation:
+            explanation, probability, model_version = explain_prediction(
+                soil_input, recommendation.crop_name, probability, features_scaled, class_index, model_version
+            )
+            Recommendation.objects.filter(pk=recommendation_id).update(
+                explanation=explanation,
+                heartbeat_at=timezone.now()
+            )
+            
+            cache_prediction(soil_input.integrity_hash, model_version, {
+                'crop_name': recommendation.crop_name,
+                'probability': float(probability),
+                'explanation': explanation
+            })
+        
+        farming_guide = generate_ai_farming_guide(recommendation.crop_name, soil_input)
+    except Exception as e:
+        print(f"[Recommendations] Deferred generation failed for recommendation #{recommendation_id}: {e}")
+        Recommendation.objects.filter(pk=recommendation_id).update(explanation_status='FAILED')
+        return
+    
+    Recommendation.objects.filter(pk=recommendation_id).update(
+        farming_guide=farming_guide,
+        explanation_status='READY'
+    )
+
+
+def predict_saved_crop(soil_input, crop_name):
+    """
+    Recompute the prediction details of an already recommended crop with the active model.
+    
+    The class index comes from crop_name via the active bundle's label
+    encoder, and the active model must still predict that crop.
+    
+    Args:
+        soil_input: SoilInput the crop was recommended for
+        crop_name: Saved recommendation
+        
+    Returns:
+        tuple: (probability, features_scaled, class_index, model_version)
+        
+    Raises:
+        ValueError: If the active model does not know crop_name or now predicts another crop
+    """
+    with use_model_bundle() as bundle:
+        model_version = bundle.version
+        model = bundle.require('rf_estimator')
+        label_encoder = bundle.require('label_encoder')
+        
+        if crop_name not in label_encoder.classes_:
+            raise ValueError(f"{crop_name} is not a class of model version {model_version or 'default'}")
+        
+        predicted_crop, probability, features_scaled, _ = predict_crop_detailed(soil_input, model)
+        if predicted_crop != crop_name:
+            raise ValueError(
+                f"model version {model_version or 'default'} now predicts {predicted_crop}, not {crop_name}"
+            )
+        
+        encoded = label_encoder.transform([crop_name])[0]
+        class_index = int(np.flatnonzero(model.classes_ == encoded)[0])
+    
+    return probability, features_scaled, class_index, model_version
+
+
+def explain_prediction(soil_input, crop_name, probability, features_scaled, class_index, model_version):
+    """
+    Explain a prediction, redoing it for the same crop if the model was swapped since.
+    
+    Returns:
+        tuple: (explanation, probability, model_version) of the model that explained it
+        
+    Raises:
+        ValueError: If the new model no longer recommends crop_name
+    """
+    try:
+        explanation = generate_explanation(
+            None, soil_input, features_scaled, class_index, model_version=model_version
+        )
+    except ModelVersionMismatch as e:
+        print(f"[Recommendations] {e}; predicting {crop_name} again")
+        probability, features_scaled, class_index, model_version = predict_saved_crop(soil_input, crop_name)
+        explanation = generate_explanation(
+            None, soil_input, features_scaled, class_index, model_version=model_version
+        )
+    return explanation, probability, model_version
+
+
+def get_stale_recommendations():
+    """
+    Deferred recommendations whose background task was lost.
+    
+    The background pool lives in the worker process, so a restart or deploy
+    drops queued and running tasks. Recommendations still PENDING
+    RECOMMENDATION_STALE_SECONDS after creation, or RUNNING without progress
+    (heartbeat_at) for that long, are treated as lost.
+    
+    Returns:
+        QuerySet of Recommendation, oldest first
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.RECOMMENDATION_STALE_SECONDS)
+    return Recommendation.objects.alias(
+        last_progress_at=Coalesce('heartbeat_at', 'created_at')
+    ).filter(
+        explanation_status__in=['PENDING', 'RUNNING'],
+        last_progress_at__lt=stale_before
+    ).order_by('created_at')
+
+
+def resume_recommendation(recommendation_id):
+    """
+    Run the background part of a deferred recommendation again, in the calling thread.
+    
+    The prediction details passed to the original task are not stored, so
+    they are recomputed with the active model (predict_saved_crop). If the
+    active model does not know the saved crop, or now predicts a different
+    one, the recommendation cannot be explained and is marked FAILED.
+    
+    Args:
+        recommendation_id: PENDING or RUNNING Recommendation
+        
+    Returns:
+        Recommendation: Reloaded after completion (READY or FAILED)
+    """
+    recommendation = Recommendation.objects.select_related('input').get(pk=recommendation_id)
+    
+    try:
+        probability, features_scaled, class_index, model_version = predict_saved_crop(
+            recommendation.input, recommendation.crop_name
+        )
+    except Exception as e:
+        print(f"[Recommendations] Could not resume recommendation #{recommendation_id}: {e}")
+        Recommendation.objects.filter(pk=recommendation_id).update(explanation_status='FAILED')
+    else:
+        complete_recommendation(recommendation_id, probability, features_scaled, class_index, model_version)
+    
+    recommendation.refresh_from_db()
+    return recommendation
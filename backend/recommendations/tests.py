@@ -1,3 +1,198 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+import numpy as np
+from django.core.management import call_command
 from django.test import TestCase
+from sklearn.preprocessing import LabelEncoder
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from ml_engine.services import ModelVersionMismatch
+from soil.models import SoilInput
+from .models import Recommendation
+from .services import create_recommendation_for_input, resume_recommendation
 
-# Create your tests here.
+
+class DeferredRecommendationTest(TestCase):
+    """Test cases for deferred explanation and farming guide generation."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.soil_input = SoilInput.objects.create(
+            user=self.user,
+            N_level=90.0,
+            P_level=42.0,
+            K_level=43.0,
+            ph=6.5,
+            moisture=82.0,
+            temperature=20.9
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        
+        patches = [
+            mock.patch('recommendations.services.get_model_bundle'),
+            mock.patch('recommendations.services.get_cached_prediction', return_value=None),
+            mock.patch('recommendations.services.cache_prediction'),
+            mock.patch(
+                'recommendations.services.predict_crop_detailed',
+                return_value=('rice', 0.9, np.zeros((1, 6)), 0)
+            ),
+            mock.patch('recommendations.services.generate_explanation', return_value='Because.'),
+            mock.patch('recommendations.services.generate_ai_farming_guide', return_value={'source': 'fallback'}),
+            mock.patch('recommendations.services.post_ml_checks'),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        
+        # Active model for resumed recommendations: knows maize and rice
+        label_encoder = LabelEncoder().fit(['maize', 'rice'])
+        forest = mock.Mock(classes_=np.array([0, 1]))
+        self.bundle = mock.Mock(version='v2')
+        self.bundle.require.side_effect = {'label_encoder': label_encoder, 'rf_estimator': forest}.get
+        pin = mock.patch('recommendations.services.use_model_bundle')
+        pin.start().return_value.__enter__.return_value = self.bundle
+        self.addCleanup(pin.stop)
+    
+    def test_deferred_recommendation_completes_in_background(self):
+        """The recommendation is saved as PENDING and completed by the background task."""
+        with mock.patch('recommendations.services.submit_on_commit') as submit_on_commit:
+            recommendation = create_recommendation_for_input(self.soil_input, defer=True)
+        
+        self.assertEqual(recommendation.crop_name, 'rice')
+        self.assertEqual(recommendation.explanation_status, 'PENDING')
+        self.assertEqual(recommendation.explanation, '')
+        
+        response = self.client.get(f'/api/recommendations/{recommendation.id}/status/')
+        self.assertEqual(response.data['explanation_status'], 'PENDING')
+        
+        # Run the task the background pool would have run
+        task, *args = submit_on_commit.call_args.args
+        task(*args)
+        
+        response = self.client.get(f'/api/recommendations/{recommendation.id}/status/')
+        self.assertEqual(response.data['explanation_status'], 'READY')
+        self.assertEqual(response.data['explanation'], 'Because.')
+        self.assertEqual(response.data['farming_guide'], {'source': 'fallback'})
+    
+    def test_failed_generation_is_reported(self):
+        """A failing background task marks the recommendation FAILED."""
+        with mock.patch('recommendations.services.submit_on_commit') as submit_on_commit:
+            recommendation = create_recommendation_for_input(self.soil_input, defer=True)
+        
+        task, *args = submit_on_commit.call_args.args
+        with mock.patch('recommendations.services.generate_explanation', side_effect=RuntimeError):
+            task(*args)
+        
+        recommendation.refresh_from_db()
+        self.assertEqual(recommendation.explanation_status, 'FAILED')
+    
+    def test_immediate_recommendation(self):
+        """Without defer the explanation is generated in the request."""
+        recommendation = create_recommendation_for_input(self.soil_input)
+        
+        self.assertEqual(recommendation.explanation_status, 'READY')
+        self.assertEqual(recommendation.explanation, 'Because.')
+        self.assertEqual(Recommendation.objects.count(), 1)
+    
+    def make_lost_recommendations(self):
+        """A stale PENDING and RUNNING recommendation (task lost) and a fresh PENDING one."""
+        recommendations = []
+        for status, age in (('PENDING', 3600), ('RUNNING', 3600), ('PENDING', 0)):
+            with mock.patch('recommendations.services.submit_on_commit'):
+                recommendation = create_recommendation_for_input(self.soil_input, defer=True)
+            Recommendation.objects.filter(pk=recommendation.pk).update(
+                explanation_status=status,
+                created_at=timezone.now() - timedelta(seconds=age),
+                heartbeat_at=timezone.now() - timedelta(seconds=age) if status == 'RUNNING' else None
+            )
+            recommendations.append(recommendation)
+        return recommendations
+    
+    def test_lost_tasks_are_resumed(self):
+        """resume_recommendations finishes stale deferred recommendations and leaves fresh ones."""
+        stale_pending, stale_running, fresh = self.make_lost_recommendations()
+        
+        call_command('resume_recommendations', stdout=StringIO())
+        
+        statuses = dict(Recommendation.objects.values_list('id', 'explanation_status'))
+        self.assertEqual(statuses[stale_pending.id], 'READY')
+        self.assertEqual(statuses[stale_running.id], 'READY')
+        self.assertEqual(statuses[fresh.id], 'PENDING')
+        self.assertEqual(Recommendation.objects.get(pk=stale_pending.id).explanation, 'Because.')
+    
+    def test_lost_tasks_can_be_expired(self):
+        """With --expire stale recommendations are marked FAILED so clients stop polling."""
+        stale_pending, stale_running, fresh = self.make_lost_recommendations()
+        
+        call_command('resume_recommendations', '--expire', stdout=StringIO())
+        
+        statuses = dict(Recommendation.objects.values_list('id', 'explanation_status'))
+        self.assertEqual([statuses[stale_pending.id], statuses[stale_running.id]], ['FAILED', 'FAILED'])
+        self.assertEqual(statuses[fresh.id], 'PENDING')
+    
+    def test_running_task_with_recent_progress_is_not_stale(self):
+        """A long-queued recommendation that started RUNNING recently is left alone."""
+        stale_pending, stale_running, fresh = self.make_lost_recommendations()
+        Recommendation.objects.filter(pk=stale_running.pk).update(heartbeat_at=timezone.now())
+        
+        call_command('resume_recommendations', '--expire', stdout=StringIO())
+        
+        self.assertEqual(Recommendation.objects.get(pk=stale_running.pk).explanation_status, 'RUNNING')
+    
+    def test_resume_explains_the_saved_crop(self):
+        """The class index of a resumed recommendation comes from its saved crop name."""
+        stale_pending, _, _ = self.make_lost_recommendations()
+        
+        with mock.patch('recommendations.services.complete_recommendation') as complete:
+            resume_recommendation(stale_pending.id)
+        
+        recommendation_id, probability, _, class_index, model_version = complete.call_args.args
+        self.assertEqual((recommendation_id, class_index, model_version), (stale_pending.id, 1, 'v2'))
+    
+    def test_resume_fails_when_the_active_model_disagrees(self):
+        """A recommendation the active model would no longer make is marked FAILED, not explained."""
+        stale_pending, _, _ = self.make_lost_recommendations()
+        
+        with mock.patch(
+            'recommendations.services.predict_crop_detailed',
+            return_value=('maize', 0.8, np.zeros((1, 6)), 0)
+        ), mock.patch('recommendations.services.generate_explanation') as explain:
+            recommendation = resume_recommendation(stale_pending.id)
+        
+        self.assertEqual(recommendation.explanation_status, 'FAILED')
+        explain.assert_not_called()
+    
+    def test_resume_fails_for_crops_unknown_to_the_active_model(self):
+        """A crop missing from the active model's classes cannot be resumed."""
+        stale_pending, _, _ = self.make_lost_recommendations()
+        Recommendation.objects.filter(pk=stale_pending.pk).update(crop_name='coffee')
+        
+        recommendation = resume_recommendation(stale_pending.id)
+        
+        self.assertEqual(recommendation.explanation_status, 'FAILED')
+    
+    def test_model_swap_before_deferred_explanation(self):
+        """A deferred explanation after a model swap is redone with the active model for the saved crop."""
+        with mock.patch('recommendations.services.submit_on_commit') as submit_on_commit:
+            recommendation = create_recommendation_for_input(self.soil_input, defer=True)
+        
+        task, *args = submit_on_commit.call_args.args
+        with mock.patch(
+            'recommendations.services.generate_explanation',
+            side_effect=[ModelVersionMismatch('swapped'), 'Because v2.']
+        ) as explain, mock.patch('recommendations.services.cache_prediction') as cache_prediction:
+            task(*args)
+        
+        recommendation.refresh_from_db()
+        self.assertEqual(recommendation.explanation_status, 'READY')
+        self.assertEqual(recommendation.explanation, 'Because v2.')
+        self.assertEqual(explain.call_args.args[3], 1)
+        self.assertEqual(explain.call_args.kwargs['model_version'], 'v2')
+        self.assertEqual(cache_prediction.call_args.args[1], 'v2')
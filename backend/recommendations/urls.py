@@ -2,9 +2,10 @@
 URL configuration for recommendations app.
 """
 from django.urls import path
-from .views import RecommendationListView, RecommendationDetailView
+from .views import RecommendationListView, RecommendationDetailView, RecommendationStatusView
 
 urlpatterns = [
     path('', RecommendationListView.as_view(), name='recommendation-list'),
     path('<int:pk>/', RecommendationDetailView.as_view(), name='recommendation-detail'),
+    path('<int:pk>/status/', RecommendationStatusView.as_view(), name='recommendation-status'),
 ]
@@ -4,7 +4,7 @@ Views for crop recommendations.
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from .models import Recommendation
-from .serializers import RecommendationSerializer
+from .serializers import RecommendationSerializer, RecommendationStatusSerializer
 from accounts.permissions import IsAdminUser
 
 
@@ -40,3 +40,21 @@ class RecommendationDetailView(generics.RetrieveAPIView):
         if user.role == 'ADMIN':
             return Recommendation.objects.all()
         return Recommendation.objects.filter(input__user=user)
+
+
+class RecommendationStatusView(generics.RetrieveAPIView):
+    """
+    API endpoint to poll a deferred recommendation.
+    
+    GET /api/recommendations/<id>/status/
+    - explanation_status: PENDING, RUNNING, READY or FAILED
+    - explanation and farming_guide once generated
+    """
+    serializer_class = RecommendationStatusSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.role == 'ADMIN':
+            return Recommendation.objects.all()
+        return Recommendation.objects.filter(input__user=user)
@@ -0,0 +1,76 @@
+"""
+In-process background task runner.
+
+Work that should not hold up an HTTP response (SHAP explanations, Gemini
+farming guides, notification campaigns) is submitted to one shared thread
+pool per worker process. Tasks run with their own database connections,
+which are closed when the task finishes so threads never leak connections.
+
+Tasks do not survive a worker restart; callers that need durability keep
+their own status in the database and re-submit unfinished work.
+"""
+
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the process-wide background thread pool, creating it on first use.
+
+    Created lazily so it is never started in the gunicorn master before
+    forking (preload_app).
+
+    Returns:
+        ThreadPoolExecutor with settings.BACKGROUND_WORKERS threads
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_WORKERS,
+                    thread_name_prefix='background'
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    """Run one task with fresh DB connections and log any failure."""
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        print(f"[Background] Task {func.__name__} failed:\n{traceback.format_exc()}")
+        raise
+    finally:
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) on the background pool.
+
+    Returns:
+        concurrent.futures.Future
+    """
+    return get_executor().submit(_run, func, args, kwargs)
+
+
+def submit_on_commit(func, *args, **kwargs):
+    """
+    Submit a task once the current transaction commits.
+
+    Rows written by the request are visible to the task, and nothing runs
+    if the transaction rolls back. Outside a transaction the task is
+    submitted immediately.
+    """
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
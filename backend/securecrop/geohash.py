@@ -0,0 +1,164 @@
+"""
+Geohash encoding.
+
+Geohashes name rectangular cells of the earth's surface; every extra
+character narrows the cell. Points in the same cell share a prefix, so a
+geohash of fixed length works as a cache key for "everyone in this area".
+
+Approximate cell size by precision (at the equator):
+    4 -> 39 km x 19.5 km
+    5 -> 4.9 km x 4.9 km
+    6 -> 1.2 km x 0.61 km
+
+Cell ranges can be matched with plain string range comparisons, so an
+indexed geohash column supports "everything within these cells" queries
+(see covering_prefixes).
+"""
+
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE_MAP = {char: index for index, char in enumerate(BASE32)}
+
+
+def encode(lat, lon, precision=5):
+    """
+    Encode a point as a geohash.
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        precision: Number of characters in the geohash
+
+    Returns:
+        str: Geohash of the cell containing the point
+    """
+    lat, lon = float(lat), float(lon)
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Bits alternate longitude, latitude, starting with longitude
+
+    while len(chars) < precision:
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def decode_bounds(geohash):
+    """
+    Decode a geohash to its cell bounds.
+
+    Args:
+        geohash: Geohash string
+
+    Returns:
+        tuple: (min_lat, min_lon, max_lat, max_lon)
+
+    Raises:
+        ValueError: If the geohash contains an invalid character
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash.lower():
+        if char not in _DECODE_MAP:
+            raise ValueError(f"Invalid geohash character: {char!r}")
+        bits = _DECODE_MAP[char]
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even else lat_range
+            mid = (value_range[0] + value_range[1]) / 2
+            if (bits >> shift) & 1:
+                value_range[0] = mid
+            else:
+                value_range[1] = mid
+            even = not even
+
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def decode(geohash):
+    """
+    Decode a geohash to the centre of its cell.
+
+    Args:
+        geohash: Geohash string
+
+    Returns:
+        tuple: (lat, lon) of the cell centre
+    """
+    min_lat, min_lon, max_lat, max_lon = decode_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+
+def cell_size(precision):
+    """
+    Size of a cell at a precision.
+
+    Returns:
+        tuple: (lat_degrees, lon_degrees)
+    """
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def covering_prefixes(lat, lon, radius_km, max_cells=16):
+    """
+    Geohash cells that together cover a circle.
+
+    Picks the finest precision at which the circle's bounding box spans at
+    most max_cells cells, and returns those cells. Every point within
+    radius_km of (lat, lon) has a geohash starting with one of them.
+
+    Args:
+        lat: Centre latitude in degrees
+        lon: Centre longitude in degrees
+        radius_km: Circle radius in km
+        max_cells: Upper bound on the number of prefixes returned
+
+    Returns:
+        list: Geohash prefixes (all the same length)
+    """
+    lat, lon = float(lat), float(lon)
+    lat_delta = radius_km / 111.32
+    lon_delta = radius_km / (111.32 * max(math.cos(math.radians(min(abs(lat) + lat_delta, 89.9))), 1e-6))
+    min_lat, max_lat = max(lat - lat_delta, -90.0), min(lat + lat_delta, 90.0)
+    min_lon, max_lon = max(lon - lon_delta, -180.0), min(lon + lon_delta, 180.0)
+
+    def cell_ranges(precision):
+        lat_size, lon_size = cell_size(precision)
+        rows = range(int((min_lat + 90) // lat_size), int(min(max_lat + 90, 179.999999) // lat_size) + 1)
+        cols = range(int((min_lon + 180) // lon_size), int(min(max_lon + 180, 359.999999) // lon_size) + 1)
+        return lat_size, lon_size, rows, cols
+
+    precision = 1
+    while precision < 12:
+        _, _, rows, cols = cell_ranges(precision + 1)
+        if len(rows) * len(cols) > max_cells:
+            break
+        precision += 1
+
+    lat_size, lon_size, rows, cols = cell_ranges(precision)
+    return sorted({
+        encode(-90 + (row + 0.5) * lat_size, -180 + (col + 0.5) * lon_size, precision)
+        for row in rows
+        for col in cols
+    })
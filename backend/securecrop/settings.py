@@ -147,6 +147,16 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # WhiteNoise configuration for static files
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Cache backend (per-process LRU LocMemCache unless CACHE_BACKEND points at Redis/Memcached)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'securecrop'),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000))}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -206,6 +216,19 @@ CORS_ALLOW_HEADERS = [
 
 # OpenWeatherMap API Key
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '')
+# Shared OpenWeatherMap client (weather.client): request timeout and pooled connections
+OPENWEATHER_TIMEOUT = int(os.getenv('OPENWEATHER_TIMEOUT', 10))
+OPENWEATHER_POOL_SIZE = int(os.getenv('OPENWEATHER_POOL_SIZE', 20))
+# Weather is cached per geohash tile of this many characters (5 = ~4.9 km x 4.9 km, 6 = ~1.2 km x 0.6 km)
+WEATHER_TILE_PRECISION = int(os.getenv('WEATHER_TILE_PRECISION', 5))
+WEATHER_CACHE_TIMEOUT = int(os.getenv('WEATHER_CACHE_TIMEOUT', 600))
+# prefetch_weather: refresh occupied tiles this many seconds before expiry (raised to
+# at least one interval plus the last run's duration), with bounded concurrency and
+# a per-run upstream request budget; the interval must be below WEATHER_CACHE_TIMEOUT
+WEATHER_PREFETCH_LEAD = int(os.getenv('WEATHER_PREFETCH_LEAD', 120))
+WEATHER_PREFETCH_CONCURRENCY = int(os.getenv('WEATHER_PREFETCH_CONCURRENCY', 4))
+WEATHER_PREFETCH_BUDGET = int(os.getenv('WEATHER_PREFETCH_BUDGET', 500))
+WEATHER_PREFETCH_INTERVAL = int(os.getenv('WEATHER_PREFETCH_INTERVAL', 300))
 
 # Email Configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
@@ -214,10 +237,84 @@ EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+# Seconds before a blocking SMTP call gives up (bounds each campaign delivery batch)
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 30))
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@securecrop.com')
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@securecrop.com')
+# Worker threads per weather alert campaign (concurrent weather fetch + SMTP send)
+ALERT_CAMPAIGN_CONCURRENCY = int(os.getenv('ALERT_CAMPAIGN_CONCURRENCY', 8))
+# Emails per send_messages() call; each campaign worker reuses one SMTP connection
+ALERT_CAMPAIGN_BATCH_SIZE = int(os.getenv('ALERT_CAMPAIGN_BATCH_SIZE', 50))
+# Campaign jobs checkpoint after every chunk of recipients and refresh their heartbeat
+# per delivery batch, and at most every ALERT_CAMPAIGN_HEARTBEAT_SECONDS while weather
+# is fetched and messages are sent; a running job whose heartbeat is older than
+# ALERT_CAMPAIGN_STALE_SECONDS is resumed by resume_alert_campaigns
+ALERT_CAMPAIGN_CHUNK_SIZE = int(os.getenv('ALERT_CAMPAIGN_CHUNK_SIZE', 500))
+ALERT_CAMPAIGN_HEARTBEAT_SECONDS = int(os.getenv('ALERT_CAMPAIGN_HEARTBEAT_SECONDS', 30))
+ALERT_CAMPAIGN_STALE_SECONDS = int(os.getenv('ALERT_CAMPAIGN_STALE_SECONDS', 300))
+# Admin weather previews are served from cache only; missing tiles are filled in the
+# background, at most once per WEATHER_PREVIEW_FILL_TIMEOUT seconds per tile
+WEATHER_PREVIEW_FILL_TIMEOUT = int(os.getenv('WEATHER_PREVIEW_FILL_TIMEOUT', 60))
+
+# Market search returns the `limit` nearest places (default / max)
+MARKET_SEARCH_DEFAULT_LIMIT = int(os.getenv('MARKET_SEARCH_DEFAULT_LIMIT', 200))
+MARKET_SEARCH_MAX_LIMIT = int(os.getenv('MARKET_SEARCH_MAX_LIMIT', 1000))
+# Where market search looks: 'local' (PointOfInterest table only), 'overpass' (Overpass only)
+# or 'auto' (local table, Overpass when the table has nothing in the search radius)
+MARKET_SEARCH_SOURCE = os.getenv('MARKET_SEARCH_SOURCE', 'auto')
+# Overpass results are cached per ~1 km cell for the largest radius fetched there.
+# After MARKET_CACHE_SOFT_TIMEOUT seconds they are served stale while being refreshed in
+# the background, and dropped after MARKET_CACHE_TIMEOUT
+MARKET_CACHE_SOFT_TIMEOUT = int(os.getenv('MARKET_CACHE_SOFT_TIMEOUT', 600))
+MARKET_CACHE_TIMEOUT = int(os.getenv('MARKET_CACHE_TIMEOUT', 3600))
+# One Overpass fetch per cell at a time; others wait up to MARKET_CACHE_LOCK_TIMEOUT seconds
+MARKET_CACHE_LOCK_TIMEOUT = int(os.getenv('MARKET_CACHE_LOCK_TIMEOUT', 45))
+# After a failed background refresh a cell keeps serving stale results this long before retrying
+MARKET_CACHE_REFRESH_BACKOFF = int(os.getenv('MARKET_CACHE_REFRESH_BACKOFF', 120))
+# Overpass mirrors (comma-separated), tried healthiest first; after OVERPASS_HEDGE_DELAY
+# seconds without an answer the next mirror is queried too (0 = strictly sequential)
+OVERPASS_SERVERS = [url.strip() for url in os.getenv(
+    'OVERPASS_SERVERS',
+    'https://overpass-api.de/api/interpreter,'
+    'https://overpass.kumi.systems/api/interpreter,'
+    'https://maps.mail.ru/osm/tools/overpass/api/interpreter'
+).split(',') if url.strip()]
+OVERPASS_HEDGE_DELAY = float(os.getenv('OVERPASS_HEDGE_DELAY', 1.5))
+OVERPASS_MAX_CONCURRENCY = int(os.getenv('OVERPASS_MAX_CONCURRENCY', 16))
 
 # Infobip WhatsApp Configuration
 INFOBIP_API_KEY = os.getenv('INFOBIP_API_KEY', '')
 INFOBIP_BASE_URL = os.getenv('INFOBIP_BASE_URL', '')
 INFOBIP_SENDER = os.getenv('INFOBIP_SENDER', '')
+
+# Background tasks (securecrop.background): threads per worker process
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 4))
+
+# ML Engine Configuration
+# Maximum number of readings accepted by POST /api/soil-inputs/batch/
+SOIL_BATCH_MAX_ROWS = int(os.getenv('SOIL_BATCH_MAX_ROWS', 5000))
+# Load the model bundle in MlEngineConfig.ready() (shared copy-on-write with gunicorn preload_app).
+# Off by default so management commands skip it; gunicorn.conf.py turns it on for the server
+ML_PRELOAD_MODELS = os.getenv('ML_PRELOAD_MODELS', 'False') == 'True'
+# Seconds before a worker that found no trained model artifacts looks for them again
+ML_MODEL_MISSING_RETRY_SECONDS = int(os.getenv('ML_MODEL_MISSING_RETRY_SECONDS', 30))
+# How often each worker checks ModelRegistry for a newly activated model version (0 disables)
+ML_MODEL_VERSION_CHECK_SECONDS = int(os.getenv('ML_MODEL_VERSION_CHECK_SECONDS', 30))
+# Maximum seconds a replaced model version waits for in-flight requests before it is released
+ML_MODEL_DRAIN_TIMEOUT = int(os.getenv('ML_MODEL_DRAIN_TIMEOUT', 60))
+# Random Forest engine: 'flat' (ml_engine.forest), 'sklearn', or 'auto' (flat up to ML_FOREST_FLAT_MAX_ROWS rows).
+# 'sklearn' and 'auto' load the pickled forest, a private copy in every worker; 'flat' only maps the shared arrays
+ML_FOREST_ENGINE = os.getenv('ML_FOREST_ENGINE', 'flat')
+ML_FOREST_FLAT_MAX_ROWS = int(os.getenv('ML_FOREST_FLAT_MAX_ROWS', 64))
+# Cache crop/probability/explanation per soil integrity hash and model version
+PREDICTION_CACHE_ENABLED = os.getenv('PREDICTION_CACHE_ENABLED', 'True') == 'True'
+PREDICTION_CACHE_TIMEOUT = int(os.getenv('PREDICTION_CACHE_TIMEOUT', 24 * 60 * 60))
+# Explanations: 'exact' (TreeSHAP), 'fast' (Saabas on the flat forest) or 'auto' (fast under load).
+# TreeSHAP needs the sklearn forest, so 'exact' and 'auto' load a private copy of it in every worker
+EXPLANATION_MODE = os.getenv('EXPLANATION_MODE', 'fast')
+# Concurrent exact SHAP computations at which 'auto' switches to fast explanations
+EXPLANATION_FAST_CONCURRENCY = int(os.getenv('EXPLANATION_FAST_CONCURRENCY', 2))
+# Return soil submissions right after prediction; explanation and farming guide follow in the background
+RECOMMENDATION_DEFER_DETAILS = os.getenv('RECOMMENDATION_DEFER_DETAILS', 'True') == 'True'
+# Deferred recommendations PENDING or RUNNING without progress for this many seconds are picked up by resume_recommendations
+RECOMMENDATION_STALE_SECONDS = int(os.getenv('RECOMMENDATION_STALE_SECONDS', 600))
@@ -3,6 +3,10 @@ from django.views.decorators.http import require_GET
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from ml_engine.services import get_model_bundle_status
+from ml_engine.prediction_cache import get_prediction_cache_stats
+from market_linkage.overpass import get_mirror_stats
+from weather.client import get_weather_cache_stats
 
 
 @api_view(['GET'])
@@ -44,5 +48,9 @@ def health_check(request):
     return JsonResponse({
         "status": "healthy",
         "service": "SecureCrop API",
-        "timestamp": "2025-12-30"
+        "timestamp": "2025-12-30",
+        "ml_models": get_model_bundle_status(),
+        "prediction_cache": get_prediction_cache_stats(),
+        "weather_cache": get_weather_cache_stats(),
+        "overpass_mirrors": get_mirror_stats()
     })
\ No newline at end of file
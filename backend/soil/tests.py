@@ -1,8 +1,38 @@
-from django.test import TestCase
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.preprocessing import LabelEncoder, StandardScaler
 from accounts.models import User
+from logs.models import CyberLog
+from ml_engine import services as ml_services
+from ml_engine.forest import FlatForest
+from ml_engine.services import BASE_DIR, ModelBundle, predict_crop_batch, predict_crop_detailed, predict_crop_dual
+from recommendations.models import Recommendation
 from .models import SoilInput
 
 
+def make_test_bundle():
+    """Small RF + NB bundle trained on the bundled crop dataset."""
+    df = pd.read_csv(BASE_DIR / 'data' / 'Crop_recommendation.csv')
+    X = df[['N', 'P', 'K', 'temperature', 'humidity', 'ph']].to_numpy(dtype=float)
+    
+    bundle = ModelBundle(version='test')
+    bundle.scaler = StandardScaler().fit(X)
+    bundle.label_encoder = LabelEncoder().fit(df['label'])
+    X_scaled = bundle.scaler.transform(X)
+    y = bundle.label_encoder.transform(df['label'])
+    bundle.rf_model = RandomForestClassifier(n_estimators=10, max_depth=8, random_state=0).fit(X_scaled, y)
+    bundle.rf_forest = FlatForest.from_model(bundle.rf_model)
+    bundle.nb_model = GaussianNB().fit(X_scaled, y)
+    bundle.load_seconds = 0.0
+    return bundle
+
+
 class SoilInputModelTest(TestCase):
     """Test cases for SoilInput model."""
     
@@ -41,3 +71,78 @@ class SoilInputModelTest(TestCase):
         features = soil_input.to_feature_array()
         self.assertEqual(len(features), 6)
         self.assertEqual(features[0], 50.0)
+
+
+READINGS = [
+    {'N_level': 90, 'P_level': 42, 'K_level': 43, 'ph': 6.5, 'moisture': 82, 'temperature': 20.9},
+    {'N_level': 20, 'P_level': 67, 'K_level': 20, 'ph': 5.7, 'moisture': 40, 'temperature': 26.0},
+    {'N_level': 110, 'P_level': 30, 'K_level': 45, 'ph': 7.2, 'moisture': 60, 'temperature': 31.5},
+]
+
+
+@override_settings(ML_MODEL_VERSION_CHECK_SECONDS=0)
+class SoilInputBatchTest(TestCase):
+    """Test cases for batch prediction and the bulk upload endpoint."""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bundle = make_test_bundle()
+    
+    def setUp(self):
+        self.original_bundle = ml_services._model_bundle
+        ml_services._model_bundle = self.bundle
+        self.user = User.objects.create_user(email='farmer@example.com', username='farmer', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def tearDown(self):
+        ml_services._model_bundle = self.original_bundle
+    
+    def test_batch_matches_single_predictions(self):
+        """predict_crop_batch() agrees with predict_crop_detailed() and predict_crop_dual() row by row."""
+        soil_inputs = [SoilInput(**reading) for reading in READINGS]
+        
+        results = predict_crop_batch(soil_inputs)
+        
+        self.assertEqual(len(results), len(READINGS))
+        for soil_input, result in zip(soil_inputs, results):
+            crop_name, probability, _, _ = predict_crop_detailed(soil_input)
+            self.assertEqual(result['rf_prediction'], crop_name)
+            self.assertAlmostEqual(result['rf_probability'], probability)
+            self.assertEqual(result, predict_crop_dual(soil_input))
+        self.assertEqual(predict_crop_batch([]), [])
+    
+    def test_upload_saves_inputs_logs_and_recommendations(self):
+        """Every reading gets a soil input, an integrity log and a recommendation; anomalies are flagged."""
+        with mock.patch('soil.views.detect_anomaly_batch', return_value=np.array([False, True, False])):
+            response = self.client.post(reverse('soil-input-batch'), {'readings': READINGS}, format='json')
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['count'], response.data['anomalies_detected']), (3, 1))
+        results = response.data['results']
+        self.assertEqual([result['anomaly_detected'] for result in results], [False, True, False])
+        
+        logs = CyberLog.objects.filter(input__user=self.user).order_by('input_id')
+        self.assertEqual([log.integrity_status for log in logs], ['OK', 'ANOMALY', 'OK'])
+        self.assertEqual(logs[1].input_id, results[1]['soil_input_id'])
+        
+        recommendations = Recommendation.objects.filter(input__user=self.user).order_by('input_id')
+        self.assertEqual(
+            [(rec.id, rec.crop_name) for rec in recommendations],
+            [(result['recommendation_id'], result['primary_recommendation']) for result in results]
+        )
+    
+    @override_settings(SOIL_BATCH_MAX_ROWS=2)
+    def test_too_many_readings_rejected(self):
+        """Batches above SOIL_BATCH_MAX_ROWS are rejected before anything is saved."""
+        response = self.client.post(reverse('soil-input-batch'), {'readings': READINGS}, format='json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(SoilInput.objects.exists())
+    
+    def test_malformed_body_rejected(self):
+        """A bare list or a missing readings key is a 400, not a server error."""
+        for body in (READINGS, {}, {'readings': []}):
+            response = self.client.post(reverse('soil-input-batch'), body, format='json')
+            self.assertEqual(response.status_code, 400)
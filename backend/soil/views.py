@@ -1,13 +1,19 @@
 """
 Views for soil input management and crop recommendation processing.
 """
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import SoilInput
 from .serializers import SoilInputSerializer
 from accounts.permissions import IsAdminUser
-from cyber_layer.services import pre_ml_checks
+from cyber_layer.services import pre_ml_checks, compute_integrity_hash, detect_anomaly_batch
+from logs.models import CyberLog
+from ml_engine.services import predict_crop_batch
+from recommendations.models import Recommendation
 from recommendations.services import create_recommendation_for_input
 from explainable_ai.services import generate_ai_farming_guide
 
@@ -22,6 +28,10 @@ class SoilInputCreateView(generics.CreateAPIView):
     - Generates crop recommendation with XAI explanation
     - Generates AI-powered farming guide using Gemini
     - Returns: soil input + recommendation + explanation + farming guide
+    
+    With RECOMMENDATION_DEFER_DETAILS the response returns right after the
+    prediction (explanation_status PENDING, farming_guide null); poll
+    recommendation.status_url for the explanation and farming guide.
     """
     serializer_class = SoilInputSerializer
     permission_classes = [IsAuthenticated]
@@ -63,9 +73,10 @@ class SoilInputCreateView(generics.CreateAPIView):
             integrity_hash=cyber_result.get('integrity_hash')
         )
         
-        # Generate crop recommendation
+        # Generate crop recommendation (explanation and farming guide may follow in the background)
+        defer_details = settings.RECOMMENDATION_DEFER_DETAILS
         try:
-            recommendation = create_recommendation_for_input(soil_input)
+            recommendation = create_recommendation_for_input(soil_input, defer=defer_details)
         except Exception as e:
             return Response({
                 'error': 'Failed to generate recommendation',
@@ -73,11 +84,13 @@ class SoilInputCreateView(generics.CreateAPIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
         # Generate AI-powered farming guide
-        try:
-            farming_guide = generate_ai_farming_guide(recommendation.crop_name, soil_input)
-        except Exception as e:
-            print(f"AI farming guide error: {e}")
-            farming_guide = None
+        farming_guide = None
+        if not defer_details:
+            try:
+                farming_guide = generate_ai_farming_guide(recommendation.crop_name, soil_input)
+            except Exception as e:
+                print(f"AI farming guide error: {e}")
+                farming_guide = None
         
         # Return complete response
         return Response({
@@ -86,6 +99,8 @@ class SoilInputCreateView(generics.CreateAPIView):
                 'id': recommendation.id,
                 'crop_name': recommendation.crop_name,
                 'explanation': recommendation.explanation,
+                'explanation_status': recommendation.explanation_status,
+                'status_url': reverse('recommendation-status', args=[recommendation.id]),
                 'created_at': recommendation.created_at
             },
             'farming_guide': farming_guide,
@@ -97,6 +112,120 @@ class SoilInputCreateView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class SoilInputBatchCreateView(generics.GenericAPIView):
+    """
+    API endpoint for bulk sensor uploads.
+    
+    POST /api/soil-inputs/batch/
+    Body: {"readings": [{N_level, P_level, K_level, ph, moisture, temperature}, ...]}
+    - Validates every reading with the same rules as single submissions
+    - Runs anomaly detection and crop prediction once over the whole batch
+    - Saves all soil inputs with integrity hashes, one CyberLog per reading
+      (OK or ANOMALY, as single submissions log) and one Recommendation per
+      reading, each in a single insert
+    - Returns: one prediction per reading, in request order
+    
+    Batch recommendations appear in the recommendation history, but only
+    with a short summary of the prediction: the SHAP explanation and the
+    AI farming guide are not generated for batch uploads.
+    """
+    serializer_class = SoilInputSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        readings = request.data.get('readings') if isinstance(request.data, dict) else None
+        if not isinstance(readings, list) or not readings:
+            return Response({
+                'error': 'readings must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(readings) > settings.SOIL_BATCH_MAX_ROWS:
+            return Response({
+                'error': f'A batch may contain at most {settings.SOIL_BATCH_MAX_ROWS} readings'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = self.get_serializer(data=readings, many=True)
+        serializer.is_valid(raise_exception=True)
+        soil_data_list = serializer.validated_data
+        
+        # Batch cybersecurity checks
+        anomalies = detect_anomaly_batch(soil_data_list)
+        
+        # Batch crop prediction
+        try:
+            predictions = predict_crop_batch([
+                [
+                    soil_data['N_level'],
+                    soil_data['P_level'],
+                    soil_data['K_level'],
+                    soil_data['ph'],
+                    soil_data['moisture'],
+                    soil_data['temperature']
+                ]
+                for soil_data in soil_data_list
+            ])
+        except Exception as e:
+            return Response({
+                'error': 'Failed to generate recommendations',
+                'detail': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        # Save all soil inputs, integrity logs and recommendations
+        with transaction.atomic():
+            soil_inputs = SoilInput.objects.bulk_create([
+                SoilInput(
+                    user=request.user,
+                    integrity_hash=compute_integrity_hash(soil_data),
+                    **soil_data
+                )
+                for soil_data in soil_data_list
+            ])
+            CyberLog.objects.bulk_create([
+                CyberLog(
+                    input=soil_input,
+                    anomaly_detected=bool(is_anomalous),
+                    integrity_status='ANOMALY' if is_anomalous else 'OK',
+                    details=(
+                        'Anomaly detected in batch-uploaded soil data. Data appears unusual but within valid ranges.'
+                        if is_anomalous else
+                        'All pre-ML security checks passed for batch-uploaded soil data.'
+                    )
+                )
+                for soil_input, is_anomalous in zip(soil_inputs, anomalies)
+            ])
+            recommendations = Recommendation.objects.bulk_create([
+                Recommendation(
+                    input=soil_input,
+                    crop_name=prediction['primary_recommendation'],
+                    explanation=(
+                        f"The recommended crop is **{prediction['primary_recommendation']}** "
+                        f"({prediction['confidence']:.0%} confidence) from a batch sensor upload. "
+                        f"Submit this reading on its own for a detailed explanation."
+                    )
+                )
+                for soil_input, prediction in zip(soil_inputs, predictions)
+            ])
+        
+        results = [
+            {
+                'soil_input_id': soil_input.id,
+                'recommendation_id': recommendation.id,
+                'integrity_hash': soil_input.integrity_hash,
+                'anomaly_detected': bool(is_anomalous),
+                **prediction
+            }
+            for soil_input, recommendation, is_anomalous, prediction
+            in zip(soil_inputs, recommendations, anomalies, predictions)
+        ]
+        
+        return Response({
+            'count': len(results),
+            'anomalies_detected': int(anomalies.sum()),
+            'results': results,
+            'message': 'Batch crop recommendations generated successfully'
+        }, status=status.HTTP_201_CREATED)
+
+
 class SoilInputListView(generics.ListAPIView):
     """
     API endpoint to list soil inputs.
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WeatherLog, WeatherAlert, ForecastLog
+from .models import WeatherLog, WeatherAlert, ForecastLog, WeatherTile
 
 
 @admin.register(WeatherLog)
@@ -24,3 +24,10 @@ class ForecastLogAdmin(admin.ModelAdmin):
     list_filter = ['city', 'forecast_date']
     search_fields = ['user__email', 'city']
     date_hierarchy = 'recorded_at'
+
+
+@admin.register(WeatherTile)
+class WeatherTileAdmin(admin.ModelAdmin):
+    list_display = ['geohash', 'center_lat', 'center_lon', 'current_fetched_at', 'forecast_fetched_at']
+    search_fields = ['geohash']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,391 @@
+"""
+Shared OpenWeatherMap client.
+
+All weather lookups (weather views, notification emails) go through this
+module so they share:
+1. One pooled requests.Session per process (keep-alive connections)
+2. A request timeout (OPENWEATHER_TIMEOUT)
+3. A response cache per geohash tile (WEATHER_TILE_PRECISION characters):
+   Django's cache in front of the persistent WeatherTile table, both
+   fresh for WEATHER_CACHE_TIMEOUT seconds. Upstream is called once per
+   tile, for the tile centre, and the result serves everyone in the tile.
+4. Hit/miss and upstream call counters for monitoring
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from dotenv import load_dotenv
+from securecrop import geohash
+from .models import WeatherTile
+
+# Reload .env to ensure latest values
+load_dotenv()
+
+# OpenWeatherMap API Key - use environment variable with fallback
+OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '90d15b7fdfc7a271fe97287339babf47')
+OPENWEATHER_BASE_URL = 'https://api.openweathermap.org/data/2.5'
+
+WEATHER_CACHE_PREFIX = 'weather'
+# OpenWeatherMap endpoint -> WeatherTile payload field
+TILE_FIELDS = {
+    'weather': 'current',
+    'forecast': 'forecast',
+}
+STATS_KEYS = {
+    'hits': f'{WEATHER_CACHE_PREFIX}:stats:hits',
+    'misses': f'{WEATHER_CACHE_PREFIX}:stats:misses',
+    'tile_hits': f'{WEATHER_CACHE_PREFIX}:stats:tile_hits',
+    'upstream_calls': f'{WEATHER_CACHE_PREFIX}:stats:upstream_calls',
+    'upstream_errors': f'{WEATHER_CACHE_PREFIX}:stats:upstream_errors',
+}
+
+
+class WeatherAPIError(Exception):
+    """Raised when OpenWeatherMap returns a non-200 response."""
+
+    def __init__(self, message, status_code=502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide pooled session for OpenWeatherMap.
+
+    Returns:
+        requests.Session with a connection pool of OPENWEATHER_POOL_SIZE
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.OPENWEATHER_POOL_SIZE
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def _increment(key, delta=1):
+    """Increment a shared counter, creating it if missing or evicted."""
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, timeout=None)
+
+
+def get_tile_hash(lat, lon):
+    """
+    Snap coordinates to their weather tile.
+
+    Args:
+        lat: Latitude (number or numeric string)
+        lon: Longitude (number or numeric string)
+
+    Returns:
+        str: Geohash of WEATHER_TILE_PRECISION characters
+    """
+    return geohash.encode(lat, lon, settings.WEATHER_TILE_PRECISION)
+
+
+def _tile_cache_key(endpoint, tile_hash):
+    return f'{WEATHER_CACHE_PREFIX}:{endpoint}:{tile_hash}'
+
+
+def _lookup(endpoint, tile_hash):
+    """
+    Find a fresh payload for a tile without calling upstream.
+
+    Looks in Django's cache, then the WeatherTile table (another worker
+    process may have refreshed the tile already).
+
+    Returns:
+        dict or None: Payload younger than WEATHER_CACHE_TIMEOUT, if any
+    """
+    cache_key = _tile_cache_key(endpoint, tile_hash)
+
+    data = cache.get(cache_key)
+    if data is not None:
+        _increment(STATS_KEYS['hits'])
+        return data
+    _increment(STATS_KEYS['misses'])
+
+    field = TILE_FIELDS[endpoint]
+    tile = WeatherTile.objects.filter(geohash=tile_hash).values(field, f'{field}_fetched_at').first()
+    if tile and tile[field] is not None:
+        age = (timezone.now() - tile[f'{field}_fetched_at']).total_seconds()
+        remaining = settings.WEATHER_CACHE_TIMEOUT - age
+        if remaining > 0:
+            _increment(STATS_KEYS['tile_hits'])
+            cache.set(cache_key, tile[field], timeout=int(remaining) or 1)
+            return tile[field]
+
+    return None
+
+
+def lookup_many(endpoint, tile_hashes):
+    """
+    Find fresh payloads for many tiles without calling upstream.
+
+    Batched version of the cache/WeatherTile lookup: one cache.get_many()
+    and at most one WeatherTile query, whatever the number of tiles.
+
+    Args:
+        endpoint: 'weather' or 'forecast'
+        tile_hashes: Iterable of geohashes
+
+    Returns:
+        dict: tile_hash -> payload, for tiles with a fresh payload only
+    """
+    keys = {_tile_cache_key(endpoint, tile_hash): tile_hash for tile_hash in tile_hashes}
+    if not keys:
+        return {}
+
+    payloads = {keys[key]: data for key, data in cache.get_many(list(keys)).items()}
+    missing = [tile_hash for tile_hash in keys.values() if tile_hash not in payloads]
+    if payloads:
+        _increment(STATS_KEYS['hits'], len(payloads))
+    if not missing:
+        return payloads
+    _increment(STATS_KEYS['misses'], len(missing))
+
+    field = TILE_FIELDS[endpoint]
+    now = timezone.now()
+    tiles = WeatherTile.objects.filter(
+        geohash__in=missing,
+        **{
+            f'{field}__isnull': False,
+            f'{field}_fetched_at__gt': now - timedelta(seconds=settings.WEATHER_CACHE_TIMEOUT),
+        }
+    ).values('geohash', field, f'{field}_fetched_at')
+
+    tile_hits = 0
+    for tile in tiles:
+        remaining = settings.WEATHER_CACHE_TIMEOUT - (now - tile[f'{field}_fetched_at']).total_seconds()
+        cache.set(_tile_cache_key(endpoint, tile['geohash']), tile[field], timeout=int(remaining) or 1)
+        payloads[tile['geohash']] = tile[field]
+        tile_hits += 1
+    if tile_hits:
+        _increment(STATS_KEYS['tile_hits'], tile_hits)
+
+    return payloads
+
+
+def request_upstream(endpoint, tile_hash):
+    """
+    Call OpenWeatherMap for a tile centre. Makes no database queries, so it
+    is safe to run on a helper thread.
+
+    Raises:
+        WeatherAPIError: If the upstream response is not 200
+        requests.RequestException: On connection errors or timeouts
+    """
+    center_lat, center_lon = geohash.decode(tile_hash)
+
+    _increment(STATS_KEYS['upstream_calls'])
+    response = get_session().get(
+        f'{OPENWEATHER_BASE_URL}/{endpoint}',
+        params={
+            'lat': round(center_lat, 4),
+            'lon': round(center_lon, 4),
+            'appid': OPENWEATHER_API_KEY,
+            'units': 'metric'
+        },
+        timeout=settings.OPENWEATHER_TIMEOUT
+    )
+
+    if response.status_code != 200:
+        _increment(STATS_KEYS['upstream_errors'])
+        raise WeatherAPIError(
+            f'OpenWeatherMap {endpoint} returned {response.status_code}',
+            status_code=response.status_code
+        )
+
+    return response.json()
+
+
+def store_payload(endpoint, tile_hash, data):
+    """Write a fresh payload to the WeatherTile row and to Django's cache."""
+    field = TILE_FIELDS[endpoint]
+    center_lat, center_lon = geohash.decode(tile_hash)
+
+    WeatherTile.objects.update_or_create(
+        geohash=tile_hash,
+        defaults={
+            'center_lat': center_lat,
+            'center_lon': center_lon,
+            field: data,
+            f'{field}_fetched_at': timezone.now(),
+        }
+    )
+    cache.set(_tile_cache_key(endpoint, tile_hash), data, timeout=settings.WEATHER_CACHE_TIMEOUT)
+
+
+def refresh_tile(endpoint, tile_hash):
+    """
+    Fetch an endpoint from OpenWeatherMap for a tile centre and store it.
+
+    Args:
+        endpoint: 'weather' or 'forecast'
+        tile_hash: Geohash of the tile
+
+    Returns:
+        dict: Parsed JSON payload
+
+    Raises:
+        WeatherAPIError: If the upstream response is not 200
+        requests.RequestException: On connection errors or timeouts
+    """
+    data = request_upstream(endpoint, tile_hash)
+    store_payload(endpoint, tile_hash, data)
+    return data
+
+
+def refresh_tiles(endpoint, tile_hashes, concurrency=None):
+    """
+    Refresh many tiles, calling upstream concurrently.
+
+    Only the upstream HTTP requests run on the thread pool; payloads are
+    stored from the calling thread as they complete.
+
+    Args:
+        endpoint: 'weather' or 'forecast'
+        tile_hashes: Geohashes to refresh
+        concurrency: Max concurrent upstream requests (default OPENWEATHER_POOL_SIZE)
+
+    Returns:
+        tuple: (refreshed, failed) counts
+    """
+    tile_hashes = list(tile_hashes)
+    if not tile_hashes:
+        return 0, 0
+
+    refreshed = 0
+    failed = 0
+    with ThreadPoolExecutor(
+        max_workers=min(concurrency or settings.OPENWEATHER_POOL_SIZE, len(tile_hashes)),
+        thread_name_prefix='weather-refresh'
+    ) as pool:
+        futures = {pool.submit(request_upstream, endpoint, tile_hash): tile_hash for tile_hash in tile_hashes}
+        for future in as_completed(futures):
+            try:
+                data = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[Weather] Refresh of {endpoint} for tile {futures[future]} failed: {e}")
+                continue
+            store_payload(endpoint, futures[future], data)
+            refreshed += 1
+
+    return refreshed, failed
+
+
+def fetch(endpoint, lat, lon):
+    """
+    Fetch an OpenWeatherMap 2.5 endpoint for a location's tile.
+
+    Only calls upstream when neither Django's cache nor the WeatherTile
+    table has a payload younger than WEATHER_CACHE_TIMEOUT.
+
+    Args:
+        endpoint: 'weather' or 'forecast'
+        lat: Latitude
+        lon: Longitude
+
+    Returns:
+        dict: Parsed JSON payload
+
+    Raises:
+        WeatherAPIError: If the upstream response is not 200
+        requests.RequestException: On connection errors or timeouts
+    """
+    tile_hash = get_tile_hash(lat, lon)
+    data = _lookup(endpoint, tile_hash)
+    if data is None:
+        data = refresh_tile(endpoint, tile_hash)
+    return data
+
+
+def fetch_many(endpoints, lat, lon):
+    """
+    Fetch several endpoints for one location, calling upstream concurrently.
+
+    Cache and database lookups and writes happen on the calling thread;
+    only the upstream HTTP requests for missing payloads run in parallel.
+
+    Args:
+        endpoints: Iterable of 'weather' / 'forecast'
+        lat: Latitude
+        lon: Longitude
+
+    Returns:
+        tuple: (payloads, errors) - dicts keyed by endpoint; an endpoint
+               is in errors instead of payloads if its upstream call failed
+    """
+    tile_hash = get_tile_hash(lat, lon)
+    payloads = {}
+    errors = {}
+
+    missing = []
+    for endpoint in endpoints:
+        data = _lookup(endpoint, tile_hash)
+        if data is None:
+            missing.append(endpoint)
+        else:
+            payloads[endpoint] = data
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = {
+                endpoint: pool.submit(request_upstream, endpoint, tile_hash)
+                for endpoint in missing
+            }
+        for endpoint, future in futures.items():
+            try:
+                payloads[endpoint] = future.result()
+            except Exception as e:
+                errors[endpoint] = e
+            else:
+                store_payload(endpoint, tile_hash, payloads[endpoint])
+
+    return payloads, errors
+
+
+def get_current_weather(lat, lon):
+    """Current conditions payload (/data/2.5/weather) for a location."""
+    return fetch('weather', lat, lon)
+
+
+def get_forecast(lat, lon):
+    """Full 5-day / 3-hour forecast payload (/data/2.5/forecast) for a location."""
+    return fetch('forecast', lat, lon)
+
+
+def get_weather_cache_stats():
+    """
+    Report weather cache counters.
+
+    Returns:
+        dict: hits, misses, tile_hits, hit_rate, upstream_calls, upstream_errors
+    """
+    stats = {name: cache.get(key, 0) for name, key in STATS_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+    return stats
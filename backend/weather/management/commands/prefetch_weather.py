@@ -0,0 +1,50 @@
+"""
+Keep weather tiles for every located farmer warm.
+
+Run from cron every few minutes, or as a long-running process with --loop.
+
+Usage:
+    python manage.py prefetch_weather
+    python manage.py prefetch_weather --loop --interval 300 --budget 200 --concurrency 8
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from weather.prefetch import prefetch_weather
+
+
+class Command(BaseCommand):
+    help = 'Refresh cached weather for occupied geohash tiles before it expires (alert-enabled users first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=int, default=settings.WEATHER_PREFETCH_BUDGET, help='Max upstream requests per run')
+        parser.add_argument('--concurrency', type=int, default=settings.WEATHER_PREFETCH_CONCURRENCY, help='Max concurrent upstream requests')
+        parser.add_argument('--lead', type=int, default=settings.WEATHER_PREFETCH_LEAD, help='Refresh payloads expiring within this many seconds')
+        parser.add_argument('--loop', action='store_true', help='Keep running, one pass every --interval seconds')
+        parser.add_argument('--interval', type=int, default=settings.WEATHER_PREFETCH_INTERVAL, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        if options['interval'] >= settings.WEATHER_CACHE_TIMEOUT:
+            raise CommandError(
+                f"--interval ({options['interval']}s) must be shorter than "
+                f"WEATHER_CACHE_TIMEOUT ({settings.WEATHER_CACHE_TIMEOUT}s) or tiles expire between passes"
+            )
+
+        while True:
+            close_old_connections()
+            summary = prefetch_weather(
+                budget=options['budget'],
+                concurrency=options['concurrency'],
+                lead=options['lead'],
+                interval=options['interval']
+            )
+            self.stdout.write(
+                f"[{summary['finished_at']}] {summary['tiles']} occupied tiles, {summary['due']} payloads due: "
+                f"{summary['refreshed']} refreshed, {summary['failed']} failed, "
+                f"{summary['deferred']} over budget ({summary['seconds']:.2f}s)"
+            )
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
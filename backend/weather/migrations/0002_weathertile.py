@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-16 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherTile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geohash', models.CharField(max_length=12, unique=True)),
+                ('center_lat', models.FloatField()),
+                ('center_lon', models.FloatField()),
+                ('current', models.JSONField(blank=True, null=True)),
+                ('current_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('forecast', models.JSONField(blank=True, null=True)),
+                ('forecast_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Weather Tile',
+                'verbose_name_plural': 'Weather Tiles',
+                'ordering': ['geohash'],
+            },
+        ),
+    ]
@@ -128,3 +128,33 @@ class ForecastLog(models.Model):
     
     def __str__(self):
         return f"{self.user.email} - {self.city} - {self.forecast_date}"
+
+
+class WeatherTile(models.Model):
+    """
+    Latest weather for one geohash cell, shared by every farmer in it.
+    
+    Weather lookups are snapped to a cell of WEATHER_TILE_PRECISION
+    characters and fetched once for the cell centre, so upstream calls scale
+    with the number of occupied cells rather than the number of users.
+    """
+    geohash = models.CharField(max_length=12, unique=True)
+    center_lat = models.FloatField()
+    center_lon = models.FloatField()
+    
+    # OpenWeatherMap payloads for the cell centre
+    current = models.JSONField(null=True, blank=True)
+    current_fetched_at = models.DateTimeField(null=True, blank=True)
+    forecast = models.JSONField(null=True, blank=True)
+    forecast_fetched_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['geohash']
+        verbose_name = 'Weather Tile'
+        verbose_name_plural = 'Weather Tiles'
+    
+    def __str__(self):
+        return f"{self.geohash} ({self.center_lat:.3f}, {self.center_lon:.3f})"
@@ -0,0 +1,152 @@
+"""
+Weather tile prefetching.
+
+Keeps the WeatherTile rows (and Django's cache) for every occupied tile
+warm, so weather views and alert emails almost never wait on
+OpenWeatherMap. Run periodically by the prefetch_weather management
+command.
+
+Tiles of users with email or SMS alerts enabled are refreshed first.
+Payloads are refreshed when missing or within WEATHER_PREFETCH_LEAD seconds
+of expiring (never less than one WEATHER_PREFETCH_INTERVAL plus the last
+run's duration, so nothing expires before the next pass), at most WEATHER_PREFETCH_CONCURRENCY upstream requests at a
+time and at most WEATHER_PREFETCH_BUDGET requests per run.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from accounts.models import User
+from .client import TILE_FIELDS, get_tile_hash, request_upstream, store_payload
+from .models import WeatherTile
+
+
+LAST_RUN_CACHE_KEY = 'weather:prefetch:last_run'
+
+
+def get_occupied_tiles():
+    """
+    List the tiles that contain at least one located, active user.
+
+    Returns:
+        list: Distinct geohashes, tiles of alert-enabled users first
+    """
+    locations = User.objects.filter(
+        is_active=True,
+        location_lat__isnull=False,
+        location_lon__isnull=False
+    ).order_by(
+        '-receive_email_alerts', '-receive_sms_alerts'
+    ).values_list('location_lat', 'location_lon')
+
+    tiles = {}
+    for lat, lon in locations.iterator():
+        tiles.setdefault(get_tile_hash(lat, lon), None)
+    return list(tiles)
+
+
+def get_due_refreshes(tile_hashes, lead=None, interval=None):
+    """
+    Find the tile payloads that are missing or about to expire.
+
+    A payload is due if it would expire before the next pass reaches it,
+    so the lead is raised to at least interval plus the last run's duration.
+
+    Args:
+        tile_hashes: Geohashes in priority order
+        lead: Refresh payloads expiring within this many seconds
+              (default WEATHER_PREFETCH_LEAD)
+        interval: Seconds between passes (default WEATHER_PREFETCH_INTERVAL)
+
+    Returns:
+        list: (endpoint, tile_hash) pairs in priority order
+    """
+    if lead is None:
+        lead = settings.WEATHER_PREFETCH_LEAD
+    if interval is None:
+        interval = settings.WEATHER_PREFETCH_INTERVAL
+    last_run = get_last_prefetch_run()
+    lead = max(lead, interval + (last_run['seconds'] if last_run else 0))
+    refresh_before = timezone.now() - timedelta(seconds=max(settings.WEATHER_CACHE_TIMEOUT - lead, 0))
+
+    fetched_at = {
+        row['geohash']: row
+        for row in WeatherTile.objects.values(
+            'geohash', *(f'{field}_fetched_at' for field in TILE_FIELDS.values())
+        )
+    }
+
+    due = []
+    for tile_hash in tile_hashes:
+        row = fetched_at.get(tile_hash, {})
+        for endpoint, field in TILE_FIELDS.items():
+            last_refresh = row.get(f'{field}_fetched_at')
+            if last_refresh is None or last_refresh <= refresh_before:
+                due.append((endpoint, tile_hash))
+    return due
+
+
+def prefetch_weather(budget=None, concurrency=None, lead=None, interval=None):
+    """
+    Refresh every occupied tile that is missing or about to expire.
+
+    Upstream requests run on a thread pool; results are written to the
+    database and cache from the calling thread as they complete.
+
+    Args:
+        budget: Max upstream requests this run (default WEATHER_PREFETCH_BUDGET)
+        concurrency: Max concurrent upstream requests (default WEATHER_PREFETCH_CONCURRENCY)
+        lead: Refresh payloads expiring within this many seconds (default WEATHER_PREFETCH_LEAD)
+        interval: Seconds until the next run (default WEATHER_PREFETCH_INTERVAL)
+
+    Returns:
+        dict: Run summary (tiles, due, refreshed, failed, deferred, seconds, finished_at)
+    """
+    if budget is None:
+        budget = settings.WEATHER_PREFETCH_BUDGET
+    if concurrency is None:
+        concurrency = settings.WEATHER_PREFETCH_CONCURRENCY
+
+    start = time.perf_counter()
+    tile_hashes = get_occupied_tiles()
+    due = get_due_refreshes(tile_hashes, lead, interval)
+    jobs = due[:budget]
+
+    refreshed = 0
+    failed = 0
+    if jobs:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='weather-prefetch') as pool:
+            futures = {
+                pool.submit(request_upstream, endpoint, tile_hash): (endpoint, tile_hash)
+                for endpoint, tile_hash in jobs
+            }
+            for future in as_completed(futures):
+                endpoint, tile_hash = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[Weather] Prefetch of {endpoint} for tile {tile_hash} failed: {e}")
+                    continue
+                store_payload(endpoint, tile_hash, data)
+                refreshed += 1
+
+    summary = {
+        'tiles': len(tile_hashes),
+        'due': len(due),
+        'refreshed': refreshed,
+        'failed': failed,
+        'deferred': len(due) - len(jobs),
+        'seconds': round(time.perf_counter() - start, 3),
+        'finished_at': timezone.now().isoformat(),
+    }
+    cache.set(LAST_RUN_CACHE_KEY, summary, timeout=None)
+    return summary
+
+
+def get_last_prefetch_run():
+    """Summary of the most recent prefetch run, or None."""
+    return cache.get(LAST_RUN_CACHE_KEY)
@@ -0,0 +1,262 @@
+"""
+Weather derivations.
+
+Pure functions that turn OpenWeatherMap payloads (from weather.client) into
+the values the weather endpoints return. The individual endpoints and the
+composite dashboard endpoint share them, so one fetched payload can feed
+every section of the dashboard.
+"""
+
+from datetime import datetime
+
+
+def summarize_current(data):
+    """
+    Build the current conditions summary.
+
+    Args:
+        data: /data/2.5/weather payload
+
+    Returns:
+        dict: Current conditions with rain probability and unit conversions
+    """
+    # Calculate rain probability - use rain % if available, else derive from clouds
+    rain_prob = 0
+    if 'rain' in data:
+        rain_prob = min(100, data['rain'].get('1h', 0) * 10)  # Rain amount to probability
+    elif data['clouds']['all'] > 80:
+        rain_prob = 60  # High clouds = moderate rain chance
+    elif data['clouds']['all'] > 50:
+        rain_prob = 30  # Moderate clouds
+    else:
+        rain_prob = data['clouds']['all'] * 0.3  # Low clouds = low chance
+
+    return {
+        'temperature': data['main']['temp'],
+        'feels_like': data['main']['feels_like'],
+        'humidity': data['main']['humidity'],
+        'pressure': data['main']['pressure'],
+        'wind_speed': round(data['wind']['speed'] * 3.6, 1),  # Convert m/s to km/h
+        'wind_direction': data['wind'].get('deg', 0),
+        'description': data['weather'][0]['description'],
+        'icon': data['weather'][0]['icon'],
+        'main': data['weather'][0]['main'],
+        'visibility': data.get('visibility', 10000) / 1000,  # Convert to km
+        'clouds': data['clouds']['all'],
+        'rain_probability': round(rain_prob),  # Add rain probability
+        'rain_chance': round(rain_prob),  # Alias for dashboard compatibility
+        'sunrise': data['sys']['sunrise'],
+        'sunset': data['sys']['sunset'],
+        'city': data['name'],
+        'country': data['sys']['country'],
+        'timestamp': data['dt']
+    }
+
+
+def summarize_forecast(data, days=3):
+    """
+    Group the 3-hourly forecast into daily summaries.
+
+    Args:
+        data: /data/2.5/forecast payload
+        days: Number of days to return
+
+    Returns:
+        list: One dict per day with min/max temperature and conditions
+    """
+    # Group by day (8 data points per day, every 3 hours)
+    daily_forecasts = {}
+    for item in data['list'][:days * 8]:
+        date = datetime.fromtimestamp(item['dt']).strftime('%Y-%m-%d')
+        if date not in daily_forecasts:
+            daily_forecasts[date] = {
+                'date': date,
+                'temperature_min': item['main']['temp_min'],
+                'temperature_max': item['main']['temp_max'],
+                'humidity': item['main']['humidity'],
+                'condition': item['weather'][0]['description'],
+                'condition_icon': item['weather'][0]['icon'],
+                'wind_speed': item['wind']['speed'],
+                'rain_probability': item.get('pop', 0) * 100  # Probability of precipitation
+            }
+        else:
+            daily_forecasts[date]['temperature_min'] = min(daily_forecasts[date]['temperature_min'], item['main']['temp_min'])
+            daily_forecasts[date]['temperature_max'] = max(daily_forecasts[date]['temperature_max'], item['main']['temp_max'])
+
+    return list(daily_forecasts.values())[:days]
+
+
+def derive_alerts(data):
+    """
+    Generate weather alerts from current conditions.
+
+    Args:
+        data: /data/2.5/weather payload, or None if unavailable
+
+    Returns:
+        list: Alert dicts (empty when data is None)
+    """
+    alerts = []
+    if not data:
+        return alerts
+
+    if data['main']['temp'] > 35:
+        alerts.append({
+            'type': 'heat_warning',
+            'severity': 'high',
+            'title': 'Heat Warning',
+            'description': f"High temperature of {data['main']['temp']}°C. Take precautions for crops and livestock.",
+            'icon': '🌡️'
+        })
+
+    if data['main']['humidity'] > 85:
+        alerts.append({
+            'type': 'humidity_warning',
+            'severity': 'medium',
+            'title': 'High Humidity Alert',
+            'description': f"Humidity at {data['main']['humidity']}%. Risk of fungal diseases.",
+            'icon': '💧'
+        })
+
+    if data['wind']['speed'] > 10:
+        alerts.append({
+            'type': 'wind_warning',
+            'severity': 'medium',
+            'title': 'Strong Wind Alert',
+            'description': f"Wind speeds of {data['wind']['speed']} m/s expected.",
+            'icon': '💨'
+        })
+
+    if 'rain' in data.get('weather', [{}])[0].get('main', '').lower():
+        alerts.append({
+            'type': 'rain_alert',
+            'severity': 'low',
+            'title': 'Rain Expected',
+            'description': 'Rainfall expected. Plan irrigation and harvesting accordingly.',
+            'icon': '🌧️'
+        })
+
+    return alerts
+
+
+def derive_risk_score(data):
+    """
+    Calculate the climate risk score from current conditions.
+
+    Args:
+        data: /data/2.5/weather payload, or None if unavailable
+
+    Returns:
+        dict: score, level, factors and recommendations
+    """
+    if not data:
+        return {'score': 0, 'level': 'unknown', 'factors': []}
+
+    risk_score = 0
+    risk_factors = []
+
+    # Temperature risk
+    temp = data['main']['temp']
+    if temp > 35 or temp < 10:
+        risk_score += 30
+        risk_factors.append('Extreme temperature')
+    elif temp > 32 or temp < 15:
+        risk_score += 15
+        risk_factors.append('Moderate temperature stress')
+
+    # Humidity risk
+    humidity = data['main']['humidity']
+    if humidity > 90 or humidity < 30:
+        risk_score += 25
+        risk_factors.append('Extreme humidity')
+    elif humidity > 80 or humidity < 40:
+        risk_score += 10
+        risk_factors.append('Moderate humidity concern')
+
+    # Wind risk
+    wind = data['wind']['speed']
+    if wind > 15:
+        risk_score += 25
+        risk_factors.append('High wind speed')
+    elif wind > 10:
+        risk_score += 10
+        risk_factors.append('Moderate wind')
+
+    # Determine risk level
+    if risk_score >= 60:
+        level = 'high'
+    elif risk_score >= 30:
+        level = 'medium'
+    else:
+        level = 'low'
+
+    return {
+        'score': min(risk_score, 100),
+        'level': level,
+        'factors': risk_factors,
+        'recommendations': get_risk_recommendations(level, risk_factors)
+    }
+
+
+def get_risk_recommendations(level, factors):
+    """Farming recommendations for the given risk factors."""
+    recommendations = []
+    if 'Extreme temperature' in factors or 'Moderate temperature stress' in factors:
+        recommendations.append('Consider irrigation during cooler hours')
+        recommendations.append('Provide shade for sensitive crops')
+    if 'Extreme humidity' in factors or 'Moderate humidity concern' in factors:
+        recommendations.append('Monitor for fungal diseases')
+        recommendations.append('Ensure proper ventilation')
+    if 'High wind speed' in factors or 'Moderate wind' in factors:
+        recommendations.append('Stake tall plants')
+        recommendations.append('Delay spraying operations')
+    return recommendations
+
+
+def derive_insights(data):
+    """
+    Generate agricultural insights from current conditions.
+
+    Args:
+        data: /data/2.5/weather payload, or None if unavailable
+
+    Returns:
+        list: Insight dicts (empty when data is None)
+    """
+    insights = []
+    if not data:
+        return insights
+
+    temp = data['main']['temp']
+    humidity = data['main']['humidity']
+
+    # General farming insights
+    insights.append({
+        'category': 'irrigation',
+        'title': 'Irrigation Recommendation',
+        'description': f"With current humidity at {humidity}%, {'reduce watering' if humidity > 70 else 'maintain regular watering schedule'}.",
+        'priority': 'low' if humidity > 70 else 'medium'
+    })
+
+    insights.append({
+        'category': 'pest_control',
+        'title': 'Pest & Disease Alert',
+        'description': f"Current conditions {'favor fungal growth. Monitor closely.' if humidity > 80 else 'are moderate for pest activity.'}",
+        'priority': 'high' if humidity > 80 else 'low'
+    })
+
+    insights.append({
+        'category': 'planting',
+        'title': 'Planting Conditions',
+        'description': f"Temperature of {temp}°C is {'optimal' if 20 <= temp <= 30 else 'suboptimal'} for most crops.",
+        'priority': 'medium'
+    })
+
+    insights.append({
+        'category': 'harvest',
+        'title': 'Harvest Timing',
+        'description': "Best to harvest in early morning when moisture levels are optimal.",
+        'priority': 'low'
+    })
+
+    return insights
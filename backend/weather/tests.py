@@ -0,0 +1,170 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from securecrop import geohash
+from . import client
+from .models import WeatherTile
+from .prefetch import prefetch_weather
+
+
+CURRENT_PAYLOAD = {
+    'main': {'temp': 36.0, 'feels_like': 38.0, 'humidity': 88, 'pressure': 1008},
+    'wind': {'speed': 4.0, 'deg': 90},
+    'weather': [{'description': 'light rain', 'icon': '10d', 'main': 'Rain'}],
+    'clouds': {'all': 90},
+    'sys': {'sunrise': 1700000000, 'sunset': 1700040000, 'country': 'MY'},
+    'name': 'Kuala Lumpur',
+    'dt': 1700020000,
+}
+
+FORECAST_PAYLOAD = {
+    'list': [
+        {
+            'dt': 1700000000 + hour * 3600,
+            'main': {'temp_min': 24.0 + hour % 5, 'temp_max': 30.0 + hour % 5, 'humidity': 80},
+            'weather': [{'description': 'cloudy', 'icon': '03d'}],
+            'wind': {'speed': 2.0},
+            'pop': 0.4,
+        }
+        for hour in range(0, 120, 3)
+    ]
+}
+
+
+def _response(payload, status_code=200):
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = payload
+    return response
+
+
+class WeatherDashboardTest(TestCase):
+    """Test cases for the shared weather client and the dashboard endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.session = mock.Mock()
+        self.session.get.side_effect = lambda url, **kwargs: _response(
+            FORECAST_PAYLOAD if url.endswith('/forecast') else CURRENT_PAYLOAD
+        )
+        patcher = mock.patch.object(client, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_dashboard_fetches_each_payload_once(self):
+        """Current conditions and forecast are fetched once and feed every section."""
+        response = self.client.get('/api/weather/dashboard/', {'lat': 3.139, 'lon': 101.6869})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertEqual(response.data['current']['city'], 'Kuala Lumpur')
+        self.assertEqual(len(response.data['forecast']), 3)
+        self.assertIn('heat_warning', [alert['type'] for alert in response.data['alerts']])
+        self.assertEqual(response.data['risk_score']['level'], 'medium')
+        self.assertEqual(len(response.data['insights']), 4)
+
+    def test_nearby_requests_share_the_cache(self):
+        """Coordinates that snap to the same cell reuse one upstream call."""
+        self.client.get('/api/weather/current/', {'lat': 3.1390, 'lon': 101.6869})
+        self.client.get('/api/weather/alerts/', {'lat': 3.1391, 'lon': 101.6868})
+        self.client.get('/api/weather/risk-score/', {'lat': 3.1390, 'lon': 101.6869})
+
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(client.get_weather_cache_stats()['hits'], 2)
+
+    def test_tile_table_serves_other_processes(self):
+        """A fresh WeatherTile row is used when the shared cache is empty."""
+        client.get_current_weather(3.1390, 101.6869)
+        tile = WeatherTile.objects.get()
+        self.assertEqual(tile.geohash, geohash.encode(3.1390, 101.6869, 5))
+        self.assertIsNotNone(tile.current_fetched_at)
+
+        cache.clear()
+        data = client.get_current_weather(3.1500, 101.6600)
+
+        self.assertEqual(data['name'], 'Kuala Lumpur')
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(client.get_weather_cache_stats()['tile_hits'], 1)
+
+    def test_upstream_error_status_is_returned(self):
+        """A failed current conditions fetch returns the upstream status."""
+        self.session.get.side_effect = lambda url, **kwargs: _response({}, status_code=401)
+
+        response = self.client.get('/api/weather/dashboard/')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.session.get.call_count, 2)
+
+
+class WeatherPrefetchTest(TestCase):
+    """Test cases for keeping occupied weather tiles warm."""
+
+    def setUp(self):
+        cache.clear()
+        self.session = mock.Mock()
+        self.session.get.side_effect = lambda url, **kwargs: _response(
+            FORECAST_PAYLOAD if url.endswith('/forecast') else CURRENT_PAYLOAD
+        )
+        patcher = mock.patch.object(client, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Two farmers in one Kuala Lumpur tile, one alert-enabled farmer in Penang
+        for index, (lat, lon, alerts) in enumerate([
+            (3.1390, 101.6869, False),
+            (3.1400, 101.6800, False),
+            (5.4164, 100.3327, True),
+        ]):
+            User.objects.create_user(
+                email=f'farmer{index}@example.com',
+                username=f'farmer{index}',
+                password='testpass123',
+                location_lat=lat,
+                location_lon=lon,
+                receive_email_alerts=alerts
+            )
+
+    def test_prefetch_refreshes_each_occupied_tile_once(self):
+        """Each occupied tile is fetched once per endpoint, then served from cache."""
+        summary = prefetch_weather()
+
+        self.assertEqual(summary['tiles'], 2)
+        self.assertEqual(summary['refreshed'], 4)
+        self.assertEqual(self.session.get.call_count, 4)
+        self.assertEqual(WeatherTile.objects.count(), 2)
+
+        client.get_current_weather(3.1390, 101.6869)
+        client.get_forecast(5.4164, 100.3327)
+        self.assertEqual(self.session.get.call_count, 4)
+
+        # Nothing is due again until the payloads near expiry
+        self.assertEqual(prefetch_weather()['due'], 0)
+
+    def test_budget_serves_alert_enabled_users_first(self):
+        """Requests over the budget are deferred, alert-enabled tiles first."""
+        summary = prefetch_weather(budget=2)
+
+        self.assertEqual(summary['refreshed'], 2)
+        self.assertEqual(summary['deferred'], 2)
+        tile = WeatherTile.objects.get()
+        self.assertEqual(tile.geohash, client.get_tile_hash(5.4164, 100.3327))
+        self.assertIsNotNone(tile.current_fetched_at)
+        self.assertIsNotNone(tile.forecast_fetched_at)
+
+    @override_settings(WEATHER_CACHE_TIMEOUT=600, WEATHER_PREFETCH_LEAD=120, WEATHER_PREFETCH_INTERVAL=300)
+    def test_no_tile_expires_between_loop_passes(self):
+        """A lead shorter than the loop interval still refreshes tiles before they expire."""
+        start = timezone.now()
+        for tick in range(4):
+            now = start + timedelta(seconds=300 * tick)
+            with mock.patch('django.utils.timezone.now', return_value=now):
+                for tile in WeatherTile.objects.all():
+                    self.assertGreater(tile.current_fetched_at, now - timedelta(seconds=600))
+                    self.assertGreater(tile.forecast_fetched_at, now - timedelta(seconds=600))
+                prefetch_weather()
+        self.assertEqual(WeatherTile.objects.count(), 2)
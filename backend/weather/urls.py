@@ -8,14 +8,18 @@ from .views import (
     InsightsView,
     HistoryView,
     LocationView,
+    DashboardView,
+    TileStatusView,
 )
 
 urlpatterns = [
+    path('dashboard/', DashboardView.as_view(), name='weather-dashboard'),
     path('current/', CurrentWeatherView.as_view(), name='current-weather'),
     path('forecast/', ForecastView.as_view(), name='forecast'),
     path('alerts/', AlertsView.as_view(), name='alerts'),
     path('risk-score/', RiskScoreView.as_view(), name='risk-score'),
     path('insights/', InsightsView.as_view(), name='insights'),
+    path('tiles/', TileStatusView.as_view(), name='weather-tiles'),
     path('history/', HistoryView.as_view(), name='history'),
     path('location/', LocationView.as_view(), name='location'),
 ]
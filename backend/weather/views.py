@@ -2,22 +2,32 @@
 Weather API Views
 Provides weather data using OpenWeatherMap API
 """
-import os
-import requests
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
 from django.conf import settings
+from django.utils import timezone
+from accounts.permissions import IsAdminUser
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-
-# Reload .env to ensure latest values
-load_dotenv()
-
-# OpenWeatherMap API Key - use environment variable with fallback
-OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', '90d15b7fdfc7a271fe97287339babf47')
-
+from .client import WeatherAPIError, get_current_weather, get_forecast, fetch_many
+from .models import WeatherTile
+from .prefetch import get_last_prefetch_run
+from .services import (
+    summarize_current,
+    summarize_forecast,
+    derive_alerts,
+    derive_risk_score,
+    derive_insights,
+)
+
+
+def _current_or_none(lat, lon):
+    """Current conditions payload, or None if OpenWeatherMap returned an error."""
+    try:
+        return get_current_weather(lat, lon)
+    except WeatherAPIError:
+        return None
 
 
 class CurrentWeatherView(APIView):
@@ -29,50 +39,10 @@ class CurrentWeatherView(APIView):
         lon = request.query_params.get('lon', 101.6869)
         
         try:
-            url = f"https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric'
-            }
-            response = requests.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                # Calculate rain probability - use rain % if available, else derive from clouds
-                rain_prob = 0
-                if 'rain' in data:
-                    rain_prob = min(100, data['rain'].get('1h', 0) * 10)  # Rain amount to probability
-                elif data['clouds']['all'] > 80:
-                    rain_prob = 60  # High clouds = moderate rain chance
-                elif data['clouds']['all'] > 50:
-                    rain_prob = 30  # Moderate clouds
-                else:
-                    rain_prob = data['clouds']['all'] * 0.3  # Low clouds = low chance
-                
-                return Response({
-                    'temperature': data['main']['temp'],
-                    'feels_like': data['main']['feels_like'],
-                    'humidity': data['main']['humidity'],
-                    'pressure': data['main']['pressure'],
-                    'wind_speed': round(data['wind']['speed'] * 3.6, 1),  # Convert m/s to km/h
-                    'wind_direction': data['wind'].get('deg', 0),
-                    'description': data['weather'][0]['description'],
-                    'icon': data['weather'][0]['icon'],
-                    'main': data['weather'][0]['main'],
-                    'visibility': data.get('visibility', 10000) / 1000,  # Convert to km
-                    'clouds': data['clouds']['all'],
-                    'rain_probability': round(rain_prob),  # Add rain probability
-                    'rain_chance': round(rain_prob),  # Alias for dashboard compatibility
-                    'sunrise': data['sys']['sunrise'],
-                    'sunset': data['sys']['sunset'],
-                    'city': data['name'],
-                    'country': data['sys']['country'],
-                    'timestamp': data['dt']
-                })
-            else:
-                return Response({'error': 'Failed to fetch weather data'}, status=response.status_code)
+            data = get_current_weather(lat, lon)
+            return Response(summarize_current(data))
+        except WeatherAPIError as e:
+            return Response({'error': 'Failed to fetch weather data'}, status=e.status_code)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -87,42 +57,12 @@ class ForecastView(APIView):
         days = int(request.query_params.get('days', 3))
         
         try:
-            url = f"https://api.openweathermap.org/data/2.5/forecast"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric',
-                'cnt': days * 8  # 8 data points per day (every 3 hours)
-            }
-            response = requests.get(url, params=params)
+            data = get_forecast(lat, lon)
             
-            if response.status_code == 200:
-                data = response.json()
-                # Group by day
-                daily_forecasts = {}
-                for item in data['list']:
-                    date = datetime.fromtimestamp(item['dt']).strftime('%Y-%m-%d')
-                    if date not in daily_forecasts:
-                        daily_forecasts[date] = {
-                            'date': date,
-                            'temperature_min': item['main']['temp_min'],
-                            'temperature_max': item['main']['temp_max'],
-                            'humidity': item['main']['humidity'],
-                            'condition': item['weather'][0]['description'],
-                            'condition_icon': item['weather'][0]['icon'],
-                            'wind_speed': item['wind']['speed'],
-                            'rain_probability': item.get('pop', 0) * 100  # Probability of precipitation
-                        }
-                    else:
-                        daily_forecasts[date]['temperature_min'] = min(daily_forecasts[date]['temperature_min'], item['main']['temp_min'])
-                        daily_forecasts[date]['temperature_max'] = max(daily_forecasts[date]['temperature_max'], item['main']['temp_max'])
-                
-                # Return forecasts directly as an array for the frontend
-                return Response(list(daily_forecasts.values())[:days])
-
-            else:
-                return Response({'error': 'Failed to fetch forecast data'}, status=response.status_code)
+            # Return forecasts directly as an array for the frontend
+            return Response(summarize_forecast(data, days))
+        except WeatherAPIError as e:
+            return Response({'error': 'Failed to fetch forecast data'}, status=e.status_code)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -138,57 +78,7 @@ class AlertsView(APIView):
         try:
             # Use One Call API for alerts (requires subscription)
             # For now, generate alerts based on current weather
-            url = f"https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric'
-            }
-            response = requests.get(url, params=params)
-            
-            alerts = []
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Generate alerts based on conditions
-                if data['main']['temp'] > 35:
-                    alerts.append({
-                        'type': 'heat_warning',
-                        'severity': 'high',
-                        'title': 'Heat Warning',
-                        'description': f"High temperature of {data['main']['temp']}°C. Take precautions for crops and livestock.",
-                        'icon': '🌡️'
-                    })
-                
-                if data['main']['humidity'] > 85:
-                    alerts.append({
-                        'type': 'humidity_warning',
-                        'severity': 'medium',
-                        'title': 'High Humidity Alert',
-                        'description': f"Humidity at {data['main']['humidity']}%. Risk of fungal diseases.",
-                        'icon': '💧'
-                    })
-                
-                if data['wind']['speed'] > 10:
-                    alerts.append({
-                        'type': 'wind_warning',
-                        'severity': 'medium',
-                        'title': 'Strong Wind Alert',
-                        'description': f"Wind speeds of {data['wind']['speed']} m/s expected.",
-                        'icon': '💨'
-                    })
-                
-                if 'rain' in data.get('weather', [{}])[0].get('main', '').lower():
-                    alerts.append({
-                        'type': 'rain_alert',
-                        'severity': 'low',
-                        'title': 'Rain Expected',
-                        'description': 'Rainfall expected. Plan irrigation and harvesting accordingly.',
-                        'icon': '🌧️'
-                    })
-            
-            return Response(alerts)
+            return Response(derive_alerts(_current_or_none(lat, lon)))
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -202,80 +92,9 @@ class RiskScoreView(APIView):
         lon = request.query_params.get('lon', 101.6869)
         
         try:
-            url = f"https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric'
-            }
-            response = requests.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Calculate risk score based on weather conditions
-                risk_score = 0
-                risk_factors = []
-                
-                # Temperature risk
-                temp = data['main']['temp']
-                if temp > 35 or temp < 10:
-                    risk_score += 30
-                    risk_factors.append('Extreme temperature')
-                elif temp > 32 or temp < 15:
-                    risk_score += 15
-                    risk_factors.append('Moderate temperature stress')
-                
-                # Humidity risk
-                humidity = data['main']['humidity']
-                if humidity > 90 or humidity < 30:
-                    risk_score += 25
-                    risk_factors.append('Extreme humidity')
-                elif humidity > 80 or humidity < 40:
-                    risk_score += 10
-                    risk_factors.append('Moderate humidity concern')
-                
-                # Wind risk
-                wind = data['wind']['speed']
-                if wind > 15:
-                    risk_score += 25
-                    risk_factors.append('High wind speed')
-                elif wind > 10:
-                    risk_score += 10
-                    risk_factors.append('Moderate wind')
-                
-                # Determine risk level
-                if risk_score >= 60:
-                    level = 'high'
-                elif risk_score >= 30:
-                    level = 'medium'
-                else:
-                    level = 'low'
-                
-                return Response({
-                    'score': min(risk_score, 100),
-                    'level': level,
-                    'factors': risk_factors,
-                    'recommendations': self._get_recommendations(level, risk_factors)
-                })
-            else:
-                return Response({'score': 0, 'level': 'unknown', 'factors': []})
+            return Response(derive_risk_score(_current_or_none(lat, lon)))
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    def _get_recommendations(self, level, factors):
-        recommendations = []
-        if 'Extreme temperature' in factors or 'Moderate temperature stress' in factors:
-            recommendations.append('Consider irrigation during cooler hours')
-            recommendations.append('Provide shade for sensitive crops')
-        if 'Extreme humidity' in factors or 'Moderate humidity concern' in factors:
-            recommendations.append('Monitor for fungal diseases')
-            recommendations.append('Ensure proper ventilation')
-        if 'High wind speed' in factors or 'Moderate wind' in factors:
-            recommendations.append('Stake tall plants')
-            recommendations.append('Delay spraying operations')
-        return recommendations
 
 
 class InsightsView(APIView):
@@ -288,55 +107,91 @@ class InsightsView(APIView):
         lon = request.query_params.get('lon', 101.6869)
         
         try:
-            url = f"https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': OPENWEATHER_API_KEY,
-                'units': 'metric'
-            }
-            response = requests.get(url, params=params)
+            return Response(derive_insights(_current_or_none(lat, lon)))
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DashboardView(APIView):
+    """
+    Everything the weather dashboard shows, from one fetch per payload.
+    
+    Current conditions and the forecast are fetched concurrently (each
+    through the shared weather cache), then alerts, risk score and insights
+    are all derived from the same current conditions payload.
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        lat = request.query_params.get('lat', 3.1390)
+        lon = request.query_params.get('lon', 101.6869)
+        days = int(request.query_params.get('days', 3))
+        
+        try:
+            payloads, errors = fetch_many(['weather', 'forecast'], lat, lon)
+            if 'weather' in errors:
+                raise errors['weather']
+            current = payloads['weather']
             
-            insights = []
-            if response.status_code == 200:
-                data = response.json()
-                temp = data['main']['temp']
-                humidity = data['main']['humidity']
-                
-                # General farming insights
-                insights.append({
-                    'category': 'irrigation',
-                    'title': 'Irrigation Recommendation',
-                    'description': f"With current humidity at {humidity}%, {'reduce watering' if humidity > 70 else 'maintain regular watering schedule'}.",
-                    'priority': 'low' if humidity > 70 else 'medium'
-                })
-                
-                insights.append({
-                    'category': 'pest_control',
-                    'title': 'Pest & Disease Alert',
-                    'description': f"Current conditions {'favor fungal growth. Monitor closely.' if humidity > 80 else 'are moderate for pest activity.'}",
-                    'priority': 'high' if humidity > 80 else 'low'
-                })
-                
-                insights.append({
-                    'category': 'planting',
-                    'title': 'Planting Conditions',
-                    'description': f"Temperature of {temp}°C is {'optimal' if 20 <= temp <= 30 else 'suboptimal'} for most crops.",
-                    'priority': 'medium'
-                })
-                
-                insights.append({
-                    'category': 'harvest',
-                    'title': 'Harvest Timing',
-                    'description': "Best to harvest in early morning when moisture levels are optimal.",
-                    'priority': 'low'
-                })
+            if 'forecast' in errors:
+                # The forecast is optional on the dashboard
+                print(f"[Weather] Forecast unavailable for {lat}, {lon}: {errors['forecast']}")
+                forecast = []
+            else:
+                forecast = summarize_forecast(payloads['forecast'], days)
             
-            return Response(insights)
+            return Response({
+                'current': summarize_current(current),
+                'forecast': forecast,
+                'alerts': derive_alerts(current),
+                'risk_score': derive_risk_score(current),
+                'insights': derive_insights(current),
+            })
+        except WeatherAPIError as e:
+            return Response({'error': 'Failed to fetch weather data'}, status=e.status_code)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class TileStatusView(APIView):
+    """
+    GET: Last refresh time of every weather tile, and the last prefetch run.
+    Admin only.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        now = timezone.now()
+        
+        def age_seconds(fetched_at):
+            return round((now - fetched_at).total_seconds()) if fetched_at else None
+        
+        tiles = []
+        for tile in WeatherTile.objects.all():
+            current_age = age_seconds(tile.current_fetched_at)
+            forecast_age = age_seconds(tile.forecast_fetched_at)
+            tiles.append({
+                'geohash': tile.geohash,
+                'center_lat': tile.center_lat,
+                'center_lon': tile.center_lon,
+                'current_fetched_at': tile.current_fetched_at,
+                'current_age_seconds': current_age,
+                'forecast_fetched_at': tile.forecast_fetched_at,
+                'forecast_age_seconds': forecast_age,
+                'fresh': (
+                    current_age is not None and current_age < settings.WEATHER_CACHE_TIMEOUT
+                    and forecast_age is not None and forecast_age < settings.WEATHER_CACHE_TIMEOUT
+                ),
+            })
+        
+        return Response({
+            'count': len(tiles),
+            'stale_count': sum(1 for tile in tiles if not tile['fresh']),
+            'last_prefetch_run': get_last_prefetch_run(),
+            'tiles': tiles,
+        })
+
+
 class HistoryView(APIView):
     """Get weather history (simulated for demo)"""
     permission_classes = [AllowAny]
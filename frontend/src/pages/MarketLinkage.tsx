@@ -15,6 +15,8 @@ import {
 import axios from 'axios';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
+// Nearest places requested per search (map markers + list)
+const MAX_RESULTS = 200;
 
 // Fix Leaflet default icon issue
 delete (L.Icon.Default.prototype as any)._getIconUrl;
@@ -179,7 +181,7 @@ export const MarketLinkage: React.FC = () => {
       const headers = token ? { Authorization: `Bearer ${token}` } : {};
 
       const response = await axios.get(`${API_URL}/api/market/search/all/`, {
-        params: { lat, lon, radius },
+        params: { lat, lon, radius, limit: MAX_RESULTS },
         headers,
       });
 
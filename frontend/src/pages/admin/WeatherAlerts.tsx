@@ -36,9 +36,27 @@ interface AlertHistory {
     created_by: string;
     created_at: string;
     emails_sent_count: number;
+    emails_failed_count: number;
+    total_recipients: number;
+    status: 'pending' | 'running' | 'completed' | 'failed';
     target_all_users: boolean;
 }
 
+interface CampaignProgress {
+    alert_id: number;
+    status: 'pending' | 'running' | 'completed' | 'failed';
+    total: number;
+    sent: number;
+    failed: number;
+    processed: number;
+    percent: number;
+    error: string | null;
+}
+
+const PROGRESS_POLL_INTERVAL = 2000;
+// Weather previews not yet cached are filled in the background; reload the page once
+const PREVIEW_RELOAD_DELAY = 3000;
+
 const WeatherAlerts: React.FC = () => {
     const [stats, setStats] = useState<Stats | null>(null);
     const [eligibleUsers, setEligibleUsers] = useState<User[]>([]);
@@ -46,28 +64,54 @@ const WeatherAlerts: React.FC = () => {
     const [selectedUsers, setSelectedUsers] = useState<number[]>([]);
     const [loading, setLoading] = useState(true);
     const [sending, setSending] = useState(false);
+    const [progress, setProgress] = useState<CampaignProgress | null>(null);
     const [successMessage, setSuccessMessage] = useState('');
     const [errorMessage, setErrorMessage] = useState('');
     const [activeTab, setActiveTab] = useState<'send' | 'history'>('send');
     const [usersWithoutLocation, setUsersWithoutLocation] = useState(0);
+    const [eligibleCount, setEligibleCount] = useState(0);
+    const [usersPage, setUsersPage] = useState(1);
+    const [usersPageCount, setUsersPageCount] = useState(1);
 
     useEffect(() => {
         fetchData();
     }, []);
 
+    const applyUsersPage = (usersRes: any) => {
+        setEligibleUsers(usersRes.eligible_users?.users || []);
+        setEligibleCount(usersRes.eligible_users?.count || 0);
+        setUsersPage(usersRes.eligible_users?.page || 1);
+        setUsersPageCount(usersRes.eligible_users?.num_pages || 1);
+        setUsersWithoutLocation(usersRes.users_without_location?.count || 0);
+    };
+
+    const fetchUsersPage = async (page: number, reloadPreviews: boolean = true) => {
+        try {
+            const usersRes = await notificationsAPI.getEligibleUsers(page);
+            applyUsersPage(usersRes);
+            if (reloadPreviews && usersRes.eligible_users?.previews_pending > 0) {
+                setTimeout(() => fetchUsersPage(page, false), PREVIEW_RELOAD_DELAY);
+            }
+        } catch (error: any) {
+            console.error('Error fetching users:', error);
+        }
+    };
+
     const fetchData = async () => {
         try {
             setLoading(true);
             setErrorMessage('');
             const [statsRes, usersRes, historyRes] = await Promise.all([
                 notificationsAPI.getStats(),
-                notificationsAPI.getEligibleUsers(),
+                notificationsAPI.getEligibleUsers(usersPage),
                 notificationsAPI.getHistory()
             ]);
             setStats(statsRes);
-            setEligibleUsers(usersRes.eligible_users?.users || []);
-            setUsersWithoutLocation(usersRes.users_without_location?.count || 0);
+            applyUsersPage(usersRes);
             setAlertHistory(historyRes.alerts || []);
+            if (usersRes.eligible_users?.previews_pending > 0) {
+                setTimeout(() => fetchUsersPage(usersRes.eligible_users.page, false), PREVIEW_RELOAD_DELAY);
+            }
         } catch (error: any) {
             console.error('Error fetching data:', error);
             setErrorMessage(error.response?.data?.detail || 'Failed to load data. Please try again.');
@@ -76,24 +120,43 @@ const WeatherAlerts: React.FC = () => {
         }
     };
 
+    // Campaigns run as background jobs; poll until the job finishes
+    const waitForCampaign = async (alertId: number): Promise<CampaignProgress> => {
+        while (true) {
+            const current: CampaignProgress = await notificationsAPI.getAlertProgress(alertId);
+            setProgress(current);
+            if (current.status === 'completed' || current.status === 'failed') return current;
+            await new Promise(resolve => setTimeout(resolve, PROGRESS_POLL_INTERVAL));
+        }
+    };
+
+    const reportCampaign = (result: CampaignProgress) => {
+        if (result.status === 'failed') {
+            setErrorMessage(`Campaign stopped after ${result.sent}/${result.total} emails: ${result.error}`);
+        } else {
+            setSuccessMessage(`✅ Weather alerts sent to ${result.sent} farmers` + (result.failed ? ` (${result.failed} failed)` : ''));
+        }
+    };
+
     const handleSendToAll = async () => {
-        if (eligibleUsers.length === 0) {
+        if (eligibleCount === 0) {
             setErrorMessage('No eligible farmers to send alerts to');
             return;
         }
-        if (!window.confirm(`Send weather alerts to all ${eligibleUsers.length} eligible farmers?`)) return;
+        if (!window.confirm(`Send weather alerts to all ${eligibleCount} eligible farmers?`)) return;
 
         try {
             setSending(true);
             setErrorMessage('');
             setSuccessMessage('');
             const response = await notificationsAPI.sendAlerts(true);
-            setSuccessMessage(`✅ ${response.message}`);
+            reportCampaign(await waitForCampaign(response.alert_id));
             fetchData();
         } catch (error: any) {
             setErrorMessage(error.response?.data?.message || 'Failed to send alerts');
         } finally {
             setSending(false);
+            setProgress(null);
         }
     };
 
@@ -109,13 +172,14 @@ const WeatherAlerts: React.FC = () => {
             setErrorMessage('');
             setSuccessMessage('');
             const response = await notificationsAPI.sendAlerts(false, selectedUsers);
-            setSuccessMessage(`✅ ${response.message}`);
+            reportCampaign(await waitForCampaign(response.alert_id));
             setSelectedUsers([]);
             fetchData();
         } catch (error: any) {
             setErrorMessage(error.response?.data?.message || 'Failed to send alerts');
         } finally {
             setSending(false);
+            setProgress(null);
         }
     };
 
@@ -124,7 +188,11 @@ const WeatherAlerts: React.FC = () => {
     };
 
     const selectAllUsers = () => {
-        setSelectedUsers(prev => prev.length === eligibleUsers.length ? [] : eligibleUsers.map(u => u.id));
+        // Selects the farmers on the current page (selection is kept across pages)
+        const pageIds = eligibleUsers.map(u => u.id);
+        setSelectedUsers(prev => pageIds.every(id => prev.includes(id))
+            ? prev.filter(id => !pageIds.includes(id))
+            : [...prev, ...pageIds.filter(id => !prev.includes(id))]);
     };
 
     const formatDate = (dateStr: string) => {
@@ -225,13 +293,13 @@ const WeatherAlerts: React.FC = () => {
                                     <div className="flex flex-wrap gap-4">
                                         <button
                                             onClick={handleSendToAll}
-                                            disabled={sending || eligibleUsers.length === 0}
-                                            className={`px-6 py-3 rounded-lg font-semibold transition-all flex items-center gap-2 ${sending || eligibleUsers.length === 0
+                                            disabled={sending || eligibleCount === 0}
+                                            className={`px-6 py-3 rounded-lg font-semibold transition-all flex items-center gap-2 ${sending || eligibleCount === 0
                                                     ? 'bg-gray-300 text-gray-500 cursor-not-allowed'
                                                     : 'bg-green-600 hover:bg-green-700 text-white shadow-lg'
                                                 }`}
                                         >
-                                            {sending ? '⏳ Sending...' : `🌍 Send to All (${eligibleUsers.length} farmers)`}
+                                            {sending ? (progress ? `⏳ Sending ${progress.processed}/${progress.total}...` : '⏳ Sending...') : `🌍 Send to All (${eligibleCount} farmers)`}
                                         </button>
                                         <button
                                             onClick={handleSendToSelected}
@@ -255,14 +323,14 @@ const WeatherAlerts: React.FC = () => {
                                 <div className="bg-white rounded-xl border border-gray-200 p-6 shadow-sm">
                                     <div className="flex items-center justify-between mb-4">
                                         <h2 className="text-lg font-semibold text-gray-800 flex items-center gap-2">
-                                            👥 Eligible Farmers
+                                            👥 Eligible Farmers ({eligibleCount})
                                         </h2>
                                         {eligibleUsers.length > 0 && (
                                             <button
                                                 onClick={selectAllUsers}
                                                 className="text-sm text-green-600 hover:text-green-700 font-medium"
                                             >
-                                                {selectedUsers.length === eligibleUsers.length ? 'Deselect All' : 'Select All'}
+                                                {eligibleUsers.every(u => selectedUsers.includes(u.id)) ? 'Deselect Page' : 'Select Page'}
                                             </button>
                                         )}
                                     </div>
@@ -309,6 +377,26 @@ const WeatherAlerts: React.FC = () => {
                                             ))}
                                         </div>
                                     )}
+
+                                    {usersPageCount > 1 && (
+                                        <div className="flex items-center justify-between mt-4 text-sm">
+                                            <button
+                                                onClick={() => fetchUsersPage(usersPage - 1)}
+                                                disabled={usersPage <= 1}
+                                                className="px-3 py-1 rounded-lg border border-gray-300 text-gray-600 disabled:opacity-50 disabled:cursor-not-allowed hover:bg-gray-50"
+                                            >
+                                                ← Previous
+                                            </button>
+                                            <span className="text-gray-500">Page {usersPage} of {usersPageCount}</span>
+                                            <button
+                                                onClick={() => fetchUsersPage(usersPage + 1)}
+                                                disabled={usersPage >= usersPageCount}
+                                                className="px-3 py-1 rounded-lg border border-gray-300 text-gray-600 disabled:opacity-50 disabled:cursor-not-allowed hover:bg-gray-50"
+                                            >
+                                                Next →
+                                            </button>
+                                        </div>
+                                    )}
                                 </div>
                             </div>
                         )}
@@ -331,7 +419,9 @@ const WeatherAlerts: React.FC = () => {
                                                         <p className="text-gray-500 text-sm mt-1">{alert.message}</p>
                                                     </div>
                                                     <span className="bg-green-100 text-green-700 px-3 py-1 rounded-full text-sm font-medium">
-                                                        {alert.emails_sent_count} sent
+                                                        {alert.status === 'pending' || alert.status === 'running'
+                                                            ? `${alert.emails_sent_count}/${alert.total_recipients} sending`
+                                                            : `${alert.emails_sent_count} sent`}
                                                     </span>
                                                 </div>
                                                 <div className="flex items-center gap-4 mt-3 pt-3 border-t border-gray-200 text-sm text-gray-500">
@@ -1,8 +1,8 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import Layout from '../../components/Layout';
 import { Card, Input, Button, Badge } from '../../components/UI';
 import { LocationSelector, LocationData } from '../../components/LocationSelector';
-import { soilAPI } from '../../services/api';
+import { soilAPI, recommendationAPI } from '../../services/api';
 import { Sprout, AlertTriangle, CheckCircle, Shield, TrendingUp, TrendingDown, Minus, Lightbulb, Droplets, ThermometerSun, Activity, Printer } from 'lucide-react';
 import type { SoilInputResponse } from '../../types';
 
@@ -21,6 +21,39 @@ const SoilInput: React.FC = () => {
   const [result, setResult] = useState<SoilInputResponse | null>(null);
   const [activeStep, setActiveStep] = useState(1);
 
+  // Explanation and farming guide are generated in the background; poll until they are ready
+  const recommendationId = result?.recommendation.id;
+  const detailsPending =
+    result?.recommendation.explanation_status === 'PENDING' ||
+    result?.recommendation.explanation_status === 'RUNNING';
+
+  useEffect(() => {
+    if (!recommendationId || !detailsPending) return;
+
+    const interval = setInterval(async () => {
+      try {
+        const status = await recommendationAPI.getRecommendationStatus(recommendationId);
+        setResult((current) =>
+          current && current.recommendation.id === status.id
+            ? {
+                ...current,
+                recommendation: {
+                  ...current.recommendation,
+                  explanation: status.explanation,
+                  explanation_status: status.explanation_status,
+                },
+                farming_guide: status.farming_guide,
+              }
+            : current
+        );
+      } catch (err) {
+        console.error('Failed to fetch recommendation status:', err);
+      }
+    }, 1500);
+
+    return () => clearInterval(interval);
+  }, [recommendationId, detailsPending]);
+
   // Helper function to get parameter status and color
   const getParameterStatus = (param: string, value: number) => {
     const ranges: Record<string, { low: number; optimal: [number, number]; high: number }> = {
@@ -518,7 +551,12 @@ const SoilInput: React.FC = () => {
                         <div>
                           <h4 className="font-bold text-gray-900 mb-2">Why This Crop?</h4>
                           <div className="prose prose-sm max-w-none text-gray-700 leading-relaxed whitespace-pre-line">
-                            {result.recommendation.explanation}
+                            {result.recommendation.explanation || (detailsPending ? (
+                              <span className="flex items-center gap-2 text-gray-500">
+                                <span className="w-4 h-4 border-2 border-green-500 border-t-transparent rounded-full animate-spin"></span>
+                                Generating explanation...
+                              </span>
+                            ) : 'Explanation is not available for this recommendation.')}
                           </div>
                         </div>
                       </div>
@@ -601,7 +639,14 @@ const SoilInput: React.FC = () => {
                   </div>
                 </div>
 
-                {/* AI Farming Guide */}
+                {/* AI Farming Guide (generated in the background) */}
+                {!result.farming_guide && detailsPending && (
+                  <div className="bg-gradient-to-br from-purple-50 via-indigo-50 to-blue-50 border-2 border-purple-200 rounded-2xl p-6 shadow-lg flex items-center gap-3">
+                    <div className="w-6 h-6 border-4 border-purple-500 border-t-transparent rounded-full animate-spin"></div>
+                    <p className="text-gray-700 font-medium">Preparing your AI farming guide...</p>
+                  </div>
+                )}
+
                 {result.farming_guide && (
                   <div className="bg-gradient-to-br from-purple-50 via-indigo-50 to-blue-50 border-2 border-purple-200 rounded-2xl p-6 shadow-lg">
                     <div className="flex items-center gap-3 mb-6">
@@ -142,20 +142,14 @@ export const WeatherDashboard: React.FC = () => {
     try {
       setLoading(true);
 
-      // Load all weather data in parallel with location if provided
-      const [weatherData, forecastData, alertsData, riskData, insightsData] = await Promise.all([
-        weatherAPI.getCurrentWeather(lat, lon),
-        weatherAPI.getForecast(lat, lon),
-        weatherAPI.getAlerts(lat, lon),
-        weatherAPI.getRiskScore(lat, lon),
-        weatherAPI.getInsights(selectedCrop, lat, lon),
-      ]);
-
-      setCurrentWeather(weatherData);
-      setForecast(forecastData);
-      setAlerts(alertsData);
-      setRiskScore(riskData);
-      setInsights(insightsData);
+      // Load all weather data in one request with location if provided
+      const dashboard = await weatherAPI.getDashboard(lat, lon);
+
+      setCurrentWeather(dashboard.current);
+      setForecast(dashboard.forecast);
+      setAlerts(dashboard.alerts);
+      setRiskScore(dashboard.risk_score);
+      setInsights(dashboard.insights);
     } catch (error) {
       console.error('Error loading weather data:', error);
     } finally {
@@ -7,6 +7,7 @@ import type {
   SoilInputResponse,
   SoilInput,
   Recommendation,
+  RecommendationStatusResponse,
   FeedbackData,
   Feedback,
   CyberLog,
@@ -118,6 +119,11 @@ export const recommendationAPI = {
     const response = await api.get(`/recommendations/${id}/`);
     return response.data;
   },
+
+  getRecommendationStatus: async (id: number): Promise<RecommendationStatusResponse> => {
+    const response = await api.get(`/recommendations/${id}/status/`);
+    return response.data;
+  },
 };
 
 // Feedback APIs
@@ -171,8 +177,8 @@ export const notificationsAPI = {
     return response.data;
   },
 
-  getEligibleUsers: async () => {
-    const response = await api.get('/notifications/eligible-users/');
+  getEligibleUsers: async (page: number = 1) => {
+    const response = await api.get('/notifications/eligible-users/', { params: { page } });
     return response.data;
   },
 
@@ -188,6 +194,11 @@ export const notificationsAPI = {
     });
     return response.data;
   },
+
+  getAlertProgress: async (alertId: number) => {
+    const response = await api.get(`/notifications/alerts/${alertId}/progress/`);
+    return response.data;
+  },
 };
 
 // Contact Inquiries API (Admin)
@@ -13,6 +13,20 @@ const getAuthHeader = () => {
 };
 
 export const weatherAPI = {
+  // Get current weather, forecast, alerts, risk score and insights in one call
+  getDashboard: async (lat?: number, lon?: number, days: number = 3) => {
+    const params: any = { days };
+    if (lat && lon) {
+      params.lat = lat;
+      params.lon = lon;
+    }
+    const response = await axios.get(`${API_BASE_URL}/dashboard/`, {
+      params,
+      headers: getAuthHeader(),
+    });
+    return response.data;
+  },
+
   // Get current weather
   getCurrentWeather: async (lat?: number, lon?: number) => {
     const params = lat && lon ? { lat, lon } : {};
@@ -49,14 +49,27 @@ export interface SoilInputData {
   temperature: number;
 }
 
+export type RecommendationStatus = 'PENDING' | 'RUNNING' | 'READY' | 'FAILED';
+
 export interface Recommendation {
   id: number;
   crop_name: string;
   explanation: string;
+  explanation_status?: RecommendationStatus;
+  status_url?: string;
+  farming_guide?: FarmingGuide | null;
   created_at: string;
   soil_input?: SoilInput;
 }
 
+export interface RecommendationStatusResponse {
+  id: number;
+  crop_name: string;
+  explanation_status: RecommendationStatus;
+  explanation: string;
+  farming_guide: FarmingGuide | null;
+}
+
 export interface FarmingGuide {
   source: 'gemini_ai' | 'fallback';
   crop_name: string;
@@ -76,7 +89,7 @@ export interface FarmingGuide {
 export interface SoilInputResponse {
   soil_input: SoilInput;
   recommendation: Recommendation;
-  farming_guide?: FarmingGuide;
+  farming_guide?: FarmingGuide | null;
   security_check: {
     anomaly_detected: boolean;
     integrity_status: string;